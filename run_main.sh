@@ -35,8 +35,9 @@ find "$LOG_DIR" -type f -name "*.log" -mtime +$LOG_RETENTION_DAYS -exec rm -f {}
 #    python3 src/main.py --download
 #fi
 
-echo "$(date +'%Y-%m-%d %H:%M:%S') [cron] Звичайний запуск → main.py без аргументів" | tee -a "$FULL_LOG_FILE"
-python3 src/main.py
+# Аргументи скрипта передаються в main.py (напр. run_main.sh --daemon)
+echo "$(date +'%Y-%m-%d %H:%M:%S') [cron] Звичайний запуск → main.py $*" | tee -a "$FULL_LOG_FILE"
+python3 src/main.py "$@"
 
 # --- Відступ у логах ---
 echo | tee -a "$FULL_LOG_FILE"
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Кеш відповідей API a_gpv_g.
+Ключ — (cityId, streetId, before, after). Для кожного ключа зберігаються ETag,
+Last-Modified, sha256 тіла відповіді та вже розібрані дані ({ts: {група: [outage, possible]}},
+див. schedule_bits.dump_packed). Якщо сервер повертає 304 або тіло з тим самим хешем —
+розбір JSON і декодування пропускаються.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+BASE = Path(__file__).parent.parent.absolute()
+CACHE_FILE = BASE / "out/cache/api_response_cache.json"
+CACHE_MAX_AGE = 2 * 86400  # Записи, не використані довше за це (сек), видаляються
+CACHE_FORMAT = 2           # Формат поля data; записи іншого формату ігноруються
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache:
+    """Потокобезпечний кеш відповідей з збереженням на диск"""
+
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = Path(path)
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(city_id: int, street_id: int, before: str, after: str) -> str:
+        return f"{city_id}/{street_id}|{before}|{after}"
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception:
+                self._entries = {}
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None or entry.get("format") != CACHE_FORMAT:
+                return None
+            entry["used"] = time.time()
+            return entry
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict:
+        """Заголовки If-None-Match / If-Modified-Since для збереженого запису (результату get)"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, key: str, digest: str, data: dict, etag: str = None, last_modified: str = None):
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "digest": digest,
+                "format": CACHE_FORMAT,
+                "data": data,
+                "used": time.time(),
+            }
+
+    def save(self):
+        """Записує кеш на диск, видаляючи застарілі записи"""
+        with self._lock:
+            if self._entries is None:
+                return
+            cutoff = time.time() - CACHE_MAX_AGE
+            stale = [k for k, v in self._entries.items() if v.get("used", 0) < cutoff]
+            for k in stale:
+                del self._entries[k]
+            os.makedirs(self.path.parent, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
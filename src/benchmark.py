@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки гарячих шляхів парсера: розбір відповіді API, сортування, порівняння графіків,
+рендеринг зображень та розпізнавання таблиці.
+
+Усі дані синтетичні (12 груп, 1–7 днів, різні «суміші» статусів), мережа та Telegram не
+використовуються: каталоги виводу рендерерів і розпізнавача перенаправляються у тимчасову
+папку, send_photo вимикається.
+
+Для кожного випадку вимірюються: час (медіана, мінімум, середнє), операцій за секунду
+та пікова пам'ять (tracemalloc, окремим прогоном). Результат пишеться у JSON
+(out/benchmark/results.json) і порівнюється зі збереженим еталоном (out/benchmark/baseline.json).
+
+Запуск:
+    python3 src/benchmark.py                    # усі випадки + порівняння з еталоном
+    python3 src/benchmark.py --quick            # менше повторів
+    python3 src/benchmark.py --only render      # лише випадки, що містять "render"
+    python3 src/benchmark.py --save-baseline    # зберегти поточні результати як еталон
+
+Код виходу 1 — є регресії понад поріг.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import TIMEZONE
+from toe_api_parser import ToeOutageParser, ALL_GROUPS
+from schedule_bits import DaySchedule, pack_fact_data
+
+BASE = Path(__file__).parent.parent.absolute()
+RESULTS_FILE = BASE / "out/benchmark/results.json"
+BASELINE_FILE = BASE / "out/benchmark/baseline.json"
+
+# Допустиме погіршення відносно еталона (0.25 — на 25% повільніше)
+TIME_THRESHOLD = 0.25
+MEMORY_THRESHOLD = 0.50
+# Випадки коротші за це не порівнюються за часом — шум таймера більший за поріг
+MIN_COMPARABLE_SECONDS = 20e-6
+
+DAY_COUNTS = (1, 2, 7)
+STATUS_MIXES = {
+    # статус -> вага
+    "calm": {"yes": 20, "maybe": 2, "mfirst": 1, "msecond": 1, "no": 1, "first": 1, "second": 1},
+    "mixed": {"yes": 1, "maybe": 1, "mfirst": 1, "msecond": 1, "no": 1, "first": 1, "second": 1},
+    "heavy": {"yes": 2, "maybe": 1, "mfirst": 1, "msecond": 1, "no": 8, "first": 2, "second": 2},
+}
+# Сирі значення API для пари слотів години, що дають відповідний статус
+STATUS_HALVES = {
+    "yes": ("0", "0"), "no": ("1", "1"), "maybe": ("10", "10"),
+    "first": ("1", "0"), "second": ("0", "1"), "mfirst": ("10", "0"), "msecond": ("0", "10"),
+}
+GROUP_KEYS = [f"GPV{g}" for g in ALL_GROUPS]
+
+
+def process_times_reference(times: dict):
+    """Початкова реалізація process_times (f-рядки + str() + ланцюжок if/elif) — еталон"""
+    hours_map = {}
+    for h in range(1, 25):
+        t1 = f"{h-1:02d}:00"
+        t2 = f"{h-1:02d}:30"
+
+        v1 = str(times.get(t1, "0"))
+        v2 = str(times.get(t2, "0"))
+
+        if v1 == "1" and v2 == "1":
+            status = "no"
+        elif v1 == "0" and v2 == "0":
+            status = "yes"
+        elif v1 == "10" and v2 == "10":
+            status = "maybe"
+        elif v1 == "10":
+            status = "mfirst"
+        elif v2 == "10":
+            status = "msecond"
+        elif v1 == "1" and v2 == "0":
+            status = "first"
+        elif v1 == "0" and v2 == "1":
+            status = "second"
+        else:
+            status = "yes"
+
+        hours_map[str(h)] = status
+    return hours_map
+
+
+# --- Синтетичні дані ---
+def make_times(rng: random.Random) -> dict:
+    """Синтетичний словник times з 48 точок (рядки та числа, як у відповідях API)"""
+    values = ["0", "1", "10", 0, 1, 10]
+    return {f"{h:02d}:{m:02d}": rng.choice(values) for h in range(24) for m in (0, 30)}
+
+
+def make_hours_map(rng: random.Random, mix: str = "mixed") -> dict:
+    """Погодинний графік {"1": status, ..., "24": status} із заданою сумішшю статусів"""
+    weights = STATUS_MIXES[mix]
+    states = rng.choices(list(weights), weights=list(weights.values()), k=24)
+    return {str(h + 1): state for h, state in enumerate(states)}
+
+
+def times_from_hours_map(hours_map: dict) -> dict:
+    """Сирі 48 точок API, з яких process_times відновить hours_map"""
+    times = {}
+    for h_key, state in hours_map.items():
+        h = int(h_key) - 1
+        v1, v2 = STATUS_HALVES[state]
+        times[f"{h:02d}:00"] = v1
+        times[f"{h:02d}:30"] = v2
+    return times
+
+
+def day_keys(n_days: int) -> list:
+    """Timestamps початку доби від сьогодні (як ключі fact.data)"""
+    today = datetime.now(TIMEZONE).replace(hour=0, minute=0, second=0, microsecond=0)
+    return [str(int((today + timedelta(days=d)).timestamp())) for d in range(n_days)]
+
+
+def make_fact_data(rng: random.Random, n_days: int, mix: str = "mixed") -> dict:
+    """fact.data: {ts: {GPVx.y: hours_map}} для 12 груп"""
+    return {ts: {g: make_hours_map(rng, mix) for g in GROUP_KEYS} for ts in day_keys(n_days)}
+
+
+def make_raw_data_map(rng: random.Random, n_days: int, mix: str = "mixed") -> dict:
+    """Невпорядкований raw_data_map, як його повертає fetch_all_groups"""
+    fact_data = make_fact_data(rng, n_days, mix)
+    keys = list(fact_data)
+    rng.shuffle(keys)
+    raw = {}
+    for ts in keys:
+        groups = list(fact_data[ts].items())
+        rng.shuffle(groups)
+        raw[ts] = dict(groups)
+    return raw
+
+
+def mutate_fact_data(rng: random.Random, fact_data: dict, changes: int = 6, mix: str = "mixed") -> dict:
+    """Копія fact.data з кількома зміненими годинами (як між двома публікаціями графіка)"""
+    new_data = {ts: {g: dict(hours) for g, hours in groups.items()} for ts, groups in fact_data.items()}
+    weights = STATUS_MIXES[mix]
+    for _ in range(changes):
+        ts = rng.choice(list(new_data))
+        group = rng.choice(list(new_data[ts]))
+        h_key = str(rng.randint(1, 24))
+        new_data[ts][group][h_key] = rng.choices(list(weights), weights=list(weights.values()))[0]
+    return new_data
+
+
+def make_full_json(fact_data: dict) -> dict:
+    """Повний JSON у форматі main.get_api_data_and_save"""
+    first_ts = min(fact_data, key=int)
+    return {
+        "regionId": "Ternopil",
+        "lastUpdated": datetime.now(TIMEZONE).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "fact": {
+            "data": fact_data,
+            "update": datetime.now(TIMEZONE).strftime("%d.%m.%Y %H:%M"),
+            "today": int(first_ts),
+        },
+        "preset": {
+            "time_type": {
+                "yes": "Світло є",
+                "maybe": "Можливе відключення",
+                "no": "Світла немає",
+                "first": "Світла не буде перші 30 хв.",
+                "second": "Світла не буде другі 30 хв",
+                "mfirst": "Світла можливо не буде перші 30 хв.",
+                "msecond": "Світла можливо не буде другі 30 хв",
+            }
+        },
+    }
+
+
+# Кольори клітинок вихідного зображення обленерго (BGR, як їх читає recognizer)
+SOURCE_RED = (40, 40, 220)
+SOURCE_YELLOW = (60, 220, 250)
+SOURCE_WHITE = (255, 255, 255)
+SOURCE_CELL_W = 56
+SOURCE_CELL_H = 40
+SOURCE_NAME_W = 90
+SOURCE_HEADER_H = 120
+SOURCE_LINE = 2
+# Білий відступ зверху/знизу клітинки: без нього межа червоної/білої половин у сусідніх рядках
+# зливається у вертикальну «лінію» і recognizer бачить зайву клітинку
+SOURCE_CELL_PAD = 4
+
+
+def make_source_image(day_map: dict, path: Path):
+    """
+    Синтетична таблиця обленерго для recognizer.run: заголовок, рядок годин і 12 рядків черг
+    по 24 клітинки; відключення — червоні половини, можливі відключення — жовті.
+    """
+    import cv2
+    import numpy as np
+
+    n_rows = 1 + len(GROUP_KEYS)
+    width = SOURCE_NAME_W + 24 * SOURCE_CELL_W + 2 * 20
+    height = SOURCE_HEADER_H + n_rows * SOURCE_CELL_H + 20
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    x_left, y_top = 20, SOURCE_HEADER_H
+
+    for r, group in enumerate([None] + GROUP_KEYS):
+        y0 = y_top + r * SOURCE_CELL_H
+        hours = day_map.get(group, {}) if group else {}
+        for h in range(24):
+            x0 = x_left + SOURCE_NAME_W + h * SOURCE_CELL_W
+            half = SOURCE_CELL_W // 2
+            state = hours.get(str(h + 1), "yes")
+            v1, v2 = STATUS_HALVES.get(state, ("0", "0"))
+            for offset, value in ((0, v1), (half, v2)):
+                color = {"1": SOURCE_RED, "10": SOURCE_YELLOW}.get(value, SOURCE_WHITE)
+                img[y0 + SOURCE_CELL_PAD:y0 + SOURCE_CELL_H - SOURCE_CELL_PAD, x0 + offset:x0 + offset + half] = color
+
+    black = (0, 0, 0)
+    x_right = x_left + SOURCE_NAME_W + 24 * SOURCE_CELL_W
+    y_bottom = y_top + n_rows * SOURCE_CELL_H
+    for r in range(n_rows + 1):
+        y = y_top + r * SOURCE_CELL_H
+        cv2.line(img, (x_left, y), (x_right, y), black, SOURCE_LINE)
+    for x in [x_left] + [x_left + SOURCE_NAME_W + h * SOURCE_CELL_W for h in range(25)]:
+        cv2.line(img, (x, y_top), (x, y_bottom), black, SOURCE_LINE)
+    cv2.imwrite(str(path), img)
+
+
+# --- Середовище для рендерерів і розпізнавача ---
+@contextlib.contextmanager
+def isolated_outputs(tmp_dir: Path):
+    """
+    Перенаправляє виводи рендерерів і розпізнавача у tmp_dir та вимикає відправку в Telegram.
+    Кеш шаблонів теж тимчасовий: прогін не пише і не прибирає out/cache/templates
+    і не стартує «теплим» з того, що лишив робочий процес
+    """
+    import gener_im_full
+    import gener_im_1_G
+    import image_variants
+    import ocr_engine
+    import recognizer
+    import render_templates
+
+    patches = [
+        (image_variants, "OUT_DIR", tmp_dir / "images"),
+        (image_variants, "MANIFEST_FILE", tmp_dir / "images" / "manifest.json"),
+        (gener_im_full, "OUT_DIR", tmp_dir / "images"),
+        (gener_im_full, "PREV_STATE_FILE", tmp_dir / "prev_state_full.json"),
+        (gener_im_full, "FULL_LOG_FILE", tmp_dir / "full_log.log"),
+        (gener_im_1_G, "OUT_DIR", tmp_dir / "images"),
+        (gener_im_1_G, "PREV_STATE_FILE", tmp_dir / "prev_state_1g.json"),
+        (gener_im_1_G, "FULL_LOG_FILE", tmp_dir / "full_log.log"),
+        (recognizer, "OUTPUT_JSON_PATH", str(tmp_dir / "recognized.json")),
+        (recognizer, "DEBUG_IMAGE_DIR", str(tmp_dir / "debug")),
+        (recognizer, "LOG_FILE", str(tmp_dir / "full_log.log")),
+        (ocr_engine, "LOG_FILE", str(tmp_dir / "full_log.log")),
+        (recognizer, "GRID_CACHE_PATH", str(tmp_dir / "grid_geometry.json")),
+        (recognizer, "HEADER_CACHE_PATH", str(tmp_dir / "header_ocr.json")),
+        (recognizer, "send_photo", lambda *args, **kwargs: None),
+        (render_templates, "CACHE_DIR", tmp_dir / "templates"),
+        (render_templates, "CACHE", render_templates.TemplateCache(tmp_dir / "templates")),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    (tmp_dir / "images").mkdir(parents=True, exist_ok=True)
+    (tmp_dir / "debug").mkdir(parents=True, exist_ok=True)
+    try:
+        for module, name, value in patches:
+            setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+# --- Вимірювання ---
+def measure(func, repeat: int) -> dict:
+    """
+    Час виконання func: кількість викликів у серії підбирається так, щоб серія тривала
+    не менше 0.2 с (timeit.autorange); повертає статистику часу одного виклику та пікову пам'ять.
+    Якщо func повертає bytes (кодування зображень), у результат додається їхній розмір.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = func()  # прогрів: імпорти, шрифти, кеші
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    median = statistics.median(samples)
+    stats = {
+        "wall_s": median,
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "ops_per_sec": 1.0 / median if median else float("inf"),
+        "peak_kib": peak / 1024,
+        "runs": repeat * number,
+    }
+    if isinstance(output, bytes):
+        stats["bytes"] = len(output)
+    return stats
+
+
+# --- Випадки ---
+def case_process_times(rng: random.Random, n_days: int, mix: str):
+    batch = [times_from_hours_map(make_hours_map(rng, mix)) for _ in range(len(GROUP_KEYS) * n_days)]
+    return lambda: ToeOutageParser.process_times_batch(batch)
+
+
+def case_sort_full_data(rng: random.Random, n_days: int, mix: str):
+    from main import sort_full_data
+    raw = make_raw_data_map(rng, n_days, mix)
+    return lambda: sort_full_data(raw)
+
+
+def case_compare(rng: random.Random, n_days: int, mix: str):
+    """Порівняння нового fact.data зі старим, як у main + пошук погіршень/покращень по групах"""
+    old_data = make_fact_data(rng, n_days, mix)
+    new_data = mutate_fact_data(rng, old_data, mix=mix)
+    old_packed = pack_fact_data(old_data)
+
+    def run():
+        new_packed = pack_fact_data(new_data)
+        if new_packed == old_packed:
+            return 0
+        changed = 0
+        for ts, groups in new_packed.items():
+            old_groups = old_packed.get(ts, {})
+            for group, day in groups.items():
+                worse, better = day.compare_to(old_groups.get(group, DaySchedule()))
+                changed += bool(worse or better)
+        return changed
+    return run
+
+
+def case_render_full(rng: random.Random, n_days: int, mix: str):
+    import gener_im_full
+    fact_data = make_fact_data(rng, n_days, mix)
+    data = make_full_json(fact_data)
+    prev_data = mutate_fact_data(rng, fact_data, mix=mix)
+    day_key = next(iter(fact_data))
+    date_str = datetime.fromtimestamp(int(day_key), TIMEZONE).strftime("%d.%m.%Y")
+    return lambda: gener_im_full.render_single_date(
+        data, int(day_key), day_key, "bench-all-today.png", date_str, prev_data)
+
+
+def case_render_group(rng: random.Random, n_days: int, mix: str):
+    import gener_im_1_G
+    fact_data = make_fact_data(rng, n_days, mix)
+    data = make_full_json(fact_data)
+    prev_state = {"data": mutate_fact_data(rng, fact_data, mix=mix)}
+    group = GROUP_KEYS[0]
+    return lambda: gener_im_1_G.ImageRenderer(data, Path("bench.json"), group, prev_state).render()
+
+
+def case_encode_png(rng: random.Random, n_days: int, mix: str, kind: str, mode: str):
+    """
+    Кодування готового зображення (full — загальне, group — групи): mode "rgb" — RGB
+    з optimize=True (попередній шлях), "palette" — індексована палітра проєкту
+    """
+    import gener_im_full
+    import gener_im_1_G
+    fact_data = make_fact_data(rng, n_days, mix)
+    data = make_full_json(fact_data)
+    prev_data = mutate_fact_data(rng, fact_data, mix=mix)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == "full":
+            img = gener_im_full.draw_single_date(data, next(iter(fact_data)), "01.01.2026", prev_data)
+            encoder = gener_im_full.png
+        else:
+            img = gener_im_1_G.ImageRenderer(data, Path("bench.json"), GROUP_KEYS[0], {"data": prev_data}).draw()
+            encoder = gener_im_1_G.png
+    return lambda: encoder.encode(img, palette=(mode == "palette"))
+
+
+def case_recognizer(rng: random.Random, n_days: int, mix: str, tmp_dir: Path, grid_cache: bool = True):
+    """
+    recognizer.run на синтетичній таблиці; результат звіряється з вихідними даними.
+    grid_cache=False — кеш геометрії сітки видаляється перед кожним прогоном (пошук сітки щоразу)
+    """
+    import recognizer
+    day_map = make_fact_data(rng, 1, mix)
+    day_map = next(iter(day_map.values()))
+    image_path = tmp_dir / f"source-{mix}.png"
+    make_source_image(day_map, image_path)
+
+    def run():
+        if not grid_cache:
+            Path(recognizer.GRID_CACHE_PATH).unlink(missing_ok=True)
+        return recognizer.run(str(image_path))
+
+    # Перший прогін заповнює кеш, другий — бере сітку з нього; обидва мають збігтися з даними
+    for _ in range(2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run()
+        recognized = next(iter(result["fact"]["data"].values()))
+        if recognized != day_map:
+            wrong = sum(recognized.get(g, {}).get(h) != s for g, hours in day_map.items() for h, s in hours.items())
+            raise AssertionError(f"recognizer: {wrong} клітинок розпізнано неправильно")
+    return run
+
+
+def source_cell_rects() -> list:
+    """Прямокутники (x, y, w, h) 12 × 24 клітинок черг на зображенні make_source_image"""
+    x_left = 20 + SOURCE_NAME_W
+    return [(x_left + h * SOURCE_CELL_W, SOURCE_HEADER_H + r * SOURCE_CELL_H, SOURCE_CELL_W, SOURCE_CELL_H)
+            for r in range(1, 1 + len(GROUP_KEYS)) for h in range(24)]
+
+
+def case_classify_cells(rng: random.Random, n_days: int, mix: str, method: str, tmp_dir: Path):
+    """
+    Статуси 288 клітинок таблиці: per_cell — get_cell_color_status для кожного зрізу,
+    integral — CellColorClassifier (маски та інтегральні зображення на всю таблицю)
+    """
+    import cv2
+    import recognizer
+    day_map = next(iter(make_fact_data(rng, 1, mix).values()))
+    image_path = tmp_dir / f"cells-{mix}.png"
+    make_source_image(day_map, image_path)
+    image = cv2.imread(str(image_path))
+    rects = source_cell_rects()
+
+    if method == "per_cell":
+        def classify():
+            return [recognizer.get_cell_color_status(image[y:y + h, x:x + w]) for x, y, w, h in rects]
+    else:
+        def classify():
+            classifier = recognizer.CellColorClassifier(image, rects)
+            return [classifier.status(rect) for rect in rects]
+
+    expected = [day_map[group][str(h + 1)] for group in GROUP_KEYS for h in range(24)]
+    if classify() != expected:
+        raise AssertionError(f"classify_cells/{method}: статуси не збігаються з вихідними даними")
+    return classify
+
+
+def case_find_grid(rng: random.Random, n_days: int, mix: str, method: str, tmp_dir: Path):
+    """
+    Сітка 12 × 24 клітинок за масками ліній: projection — профілі проєкцій,
+    contours — findContours і групування рядків; обидва мають дати ті самі прямокутники
+    """
+    import cv2
+    import recognizer
+    day_map = next(iter(make_fact_data(rng, 1, mix).values()))
+    image_path = tmp_dir / f"grid-{mix}.png"
+    make_source_image(day_map, image_path)
+    gray = cv2.cvtColor(cv2.imread(str(image_path)), cv2.COLOR_BGR2GRAY)
+    horizontal_lines, vertical_lines = recognizer.line_masks(gray)
+
+    find = recognizer.find_grid_by_projection if method == "projection" else recognizer.find_grid_by_contours
+    grid = find(horizontal_lines, vertical_lines)
+    reference = recognizer.find_grid_by_contours(horizontal_lines, vertical_lines)
+    if grid is None or grid[1] != reference[1] or \
+            [row[-24:] for row in grid[0]] != [row[-24:] for row in reference[0]]:
+        raise AssertionError(f"find_grid/{method}: сітка не збігається з контурною")
+    return lambda: find(horizontal_lines, vertical_lines)
+
+
+def build_cases(tmp_dir: Path) -> list:
+    """Список (назва, фабрика, параметри); фабрика повертає функцію одного прогону"""
+    cases = []
+    for n_days in DAY_COUNTS:
+        for mix in ("calm", "mixed", "heavy"):
+            params = {"groups": len(GROUP_KEYS), "days": n_days, "mix": mix}
+            cases.append((f"process_times/{n_days}d/{mix}", case_process_times, params))
+        params = {"groups": len(GROUP_KEYS), "days": n_days, "mix": "mixed"}
+        cases.append((f"sort_full_data/{n_days}d", case_sort_full_data, params))
+        cases.append((f"compare/{n_days}d", case_compare, params))
+    for mix in ("calm", "heavy"):
+        params = {"groups": len(GROUP_KEYS), "days": 2, "mix": mix}
+        cases.append((f"render_full/{mix}", case_render_full, params))
+        cases.append((f"render_group/{mix}", case_render_group, params))
+    params = {"groups": len(GROUP_KEYS), "days": 2, "mix": "mixed"}
+    for kind in ("full", "group"):
+        for mode in ("rgb", "palette"):
+            cases.append((f"encode_png/{kind}/{mode}",
+                          lambda r, d, m, k=kind, e=mode: case_encode_png(r, d, m, k, e), params))
+    for mix in ("calm", "heavy"):
+        params = {"groups": len(GROUP_KEYS), "days": 1, "mix": mix}
+        cases.append((f"recognizer/{mix}", lambda r, d, m: case_recognizer(r, d, m, tmp_dir), params))
+        cases.append((f"recognizer/{mix}/no_grid_cache",
+                      lambda r, d, m: case_recognizer(r, d, m, tmp_dir, grid_cache=False), params))
+        for method in ("per_cell", "integral"):
+            cases.append((f"classify_cells/{mix}/{method}",
+                          lambda r, d, m, e=method: case_classify_cells(r, d, m, e, tmp_dir), params))
+    params = {"groups": len(GROUP_KEYS), "days": 1, "mix": "mixed"}
+    for method in ("contours", "projection"):
+        cases.append((f"find_grid/{method}",
+                      lambda r, d, m, e=method: case_find_grid(r, d, m, e, tmp_dir), params))
+    return cases
+
+
+def bench_process_times(n_groups: int = 12, n_days: int = 2, repeat: int = 5, number: int = 200) -> dict:
+    """Порівнює еталонний і табличний process_times на одній «відповіді» (n_groups × n_days)"""
+    rng = random.Random(42)
+    batch = [make_times(rng) for _ in range(n_groups * n_days)]
+    batch.append({})  # порожній times — усі години "yes"
+    batch.append({"00:00": "5", "00:30": None})  # невідомі значення
+
+    for times in batch:
+        if ToeOutageParser.process_times(times) != process_times_reference(times):
+            raise AssertionError("process_times не збігається з еталоном")
+
+    ref = min(timeit.repeat(lambda: [process_times_reference(t) for t in batch], repeat=repeat, number=number))
+    fast = min(timeit.repeat(lambda: ToeOutageParser.process_times_batch(batch), repeat=repeat, number=number))
+    per_call = 1e6 / (number * len(batch))
+    return {
+        "reference_us": ref * per_call,
+        "table_us": fast * per_call,
+        "speedup": ref / fast if fast else float("inf"),
+    }
+
+
+def run_suite(only: list = None, repeat: int = 5) -> dict:
+    """Запускає всі (або відібрані) випадки; повертає словник результатів"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="toe_bench_") as tmp:
+        tmp_dir = Path(tmp)
+        with isolated_outputs(tmp_dir):
+            for name, factory, params in build_cases(tmp_dir):
+                if only and not any(part in name for part in only):
+                    continue
+                rng = random.Random(f"{name}-42")
+                try:
+                    func = factory(rng, params["days"], params["mix"])
+                    stats = measure(func, repeat=repeat)
+                except ImportError as e:
+                    results[name] = {"skipped": f"немає залежності: {e}", "params": params}
+                    print(f"  ⏭️ {name}: пропущено ({e})")
+                    continue
+                stats["params"] = params
+                results[name] = stats
+                size = f", {stats['bytes'] / 1024:.0f} КіБ на виході" if "bytes" in stats else ""
+                print(f"  ⏱️ {name}: {stats['wall_s'] * 1e3:.3f} мс, "
+                      f"{stats['ops_per_sec']:.1f} оп/с, пік {stats['peak_kib']:.0f} КіБ{size}")
+    return results
+
+
+# --- Еталон і регресії ---
+def compare_with_baseline(results: dict, baseline: dict,
+                          time_threshold: float = TIME_THRESHOLD,
+                          memory_threshold: float = MEMORY_THRESHOLD) -> list:
+    """Повертає список регресій [(назва, метрика, еталон, поточне, відношення)]"""
+    regressions = []
+    for name, base in baseline.get("cases", {}).items():
+        cur = results.get(name)
+        if not cur or "skipped" in cur or "skipped" in base:
+            continue
+        if base["wall_s"] >= MIN_COMPARABLE_SECONDS:
+            ratio = cur["wall_s"] / base["wall_s"]
+            if ratio > 1 + time_threshold:
+                regressions.append((name, "wall_s", base["wall_s"], cur["wall_s"], ratio))
+        if base["peak_kib"] > 0:
+            ratio = cur["peak_kib"] / base["peak_kib"]
+            if ratio > 1 + memory_threshold:
+                regressions.append((name, "peak_kib", base["peak_kib"], cur["peak_kib"], ratio))
+    return regressions
+
+
+def write_json(path: Path, payload: dict):
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки гарячих шляхів TOE_PARSER")
+    parser.add_argument("--only", nargs="*", help="Запускати лише випадки, назва яких містить підрядок")
+    parser.add_argument("--repeat", type=int, default=5, help="Кількість серій вимірювань")
+    parser.add_argument("--quick", action="store_true", help="Швидкий прогін (2 серії замість --repeat)")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help="Куди записати результати")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Файл еталона")
+    parser.add_argument("--save-baseline", action="store_true", help="Зберегти результати як еталон")
+    parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                        help="Допустиме сповільнення (частка, 0.25 = +25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD,
+                        help="Допустиме зростання пікової пам'яті (частка)")
+    args = parser.parse_args()
+
+    result = bench_process_times()
+    print(f"process_times: еталон {result['reference_us']:.2f} мкс, "
+          f"таблиця {result['table_us']:.2f} мкс, прискорення ×{result['speedup']:.2f}")
+
+    print("▶️ Бенчмарки:")
+    cases = run_suite(only=args.only, repeat=2 if args.quick else args.repeat)
+    payload = {
+        "timestamp": datetime.now(TIMEZONE).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "process_times_vs_reference": result,
+        "cases": cases,
+    }
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    write_json(args.output, payload)
+    print(f"💾 Результати: {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, payload)
+        print(f"💾 Еталон збережено: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"ℹ️ Еталон не знайдено ({args.baseline}), порівняння пропущено")
+        return 0
+
+    regressions = compare_with_baseline(cases, baseline, args.time_threshold, args.memory_threshold)
+    if not regressions:
+        print("✅ Регресій відносно еталона немає")
+        return 0
+    for name, metric, base, cur, ratio in regressions:
+        print(f"❌ {name}: {metric} {base:.6g} → {cur:.6g} (×{ratio:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
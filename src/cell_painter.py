@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Векторне малювання клітинок таблиці графіка (NumPy).
+
+Замість 24 × N викликів draw_split_cell (до шести draw.rectangle на клітинку) уся
+область клітинок малюється масивами:
+
+1. стани годин -> матриця кольорів півгодин (N × 48) одним векторним кроком за тими
+   самими правилами сусідства для first / second / mfirst / msecond;
+2. матриця розгортається в пікселі (np.repeat) за фіксованою геометрією клітинки
+   (лінія сітки, ліва половина, права половина);
+3. лінії сітки та рамки змін (погіршення / покращення) накладаються масками.
+
+Результат піксель-у-піксель збігається з попереднім малюванням прямокутниками
+(із будь-яким цілим масштабом ScaledDraw). Використовується в gener_im_full та gener_im_1_G.
+"""
+import numpy as np
+from PIL import Image
+
+# Коди станів; NONE — сусідньої години немає (край доби або ключа немає в даних)
+STATE_CODES = {"yes": 0, "no": 1, "maybe": 2, "first": 3, "second": 4, "mfirst": 5, "msecond": 6}
+OTHER = 7
+NONE = 8
+
+# Індекси кольорів у палітрі художника
+AVAILABLE, OUTAGE, POSSIBLE, GRID, WORSE, BETTER = range(6)
+
+
+def half_hour_colors(rows: list) -> np.ndarray:
+    """
+    Матриця кольорів півгодин (len(rows) × 48) для погодинних карт {"1": стан, ..., "24": стан}.
+    Стовпчик 2h — ліва половина години h, 2h+1 — права.
+    """
+    hour_keys = [str(h + 1) for h in range(24)]
+    raw = np.array([[NONE if hours.get(k) is None else STATE_CODES.get(hours[k], OTHER) for k in hour_keys]
+                    for hours in rows], dtype=np.int8).reshape(len(rows), 24)
+    state = np.where(raw == NONE, STATE_CODES["yes"], raw)
+
+    none_col = np.full((len(rows), 1), NONE, dtype=np.int8)
+    prev = np.hstack([none_col, raw[:, :-1]])
+    nxt = np.hstack([raw[:, 1:], none_col])
+
+    def is_in(arr, *names):
+        return np.isin(arr, [STATE_CODES[n] for n in names])
+
+    any_state = ("no", "first", "second", "maybe", "mfirst", "msecond")
+    s = lambda name: state == STATE_CODES[name]
+
+    left = np.select(
+        [s("no"), s("maybe"), s("first"),
+         s("second"),
+         s("mfirst"),
+         s("msecond") & (prev != NONE),
+         s("msecond")],
+        [OUTAGE, POSSIBLE, OUTAGE,
+         np.where(is_in(prev, "no", "second", "maybe"), OUTAGE, AVAILABLE),
+         POSSIBLE,
+         np.where(is_in(prev, "no", "second"), OUTAGE, AVAILABLE),
+         np.where(is_in(nxt, *any_state), AVAILABLE, OUTAGE)],
+        default=AVAILABLE)
+    right = np.select(
+        [s("no"), s("maybe"),
+         s("first"),
+         s("second"),
+         s("mfirst") & (nxt != NONE),
+         s("mfirst"),
+         s("msecond")],
+        [OUTAGE, POSSIBLE,
+         np.where(is_in(nxt, "no", "first", "maybe"), OUTAGE, AVAILABLE),
+         OUTAGE,
+         np.where(is_in(nxt, "no", "first"), OUTAGE, AVAILABLE),
+         np.where(is_in(prev, *any_state), AVAILABLE, OUTAGE),
+         POSSIBLE],
+        default=AVAILABLE)
+
+    colors = np.empty((len(rows), 48), dtype=np.uint8)
+    colors[:, 0::2] = left
+    colors[:, 1::2] = right
+    return colors
+
+
+def changed_cells(changes: list) -> list:
+    """Клітинки зі змінами: [(рядок, година, WORSE / BETTER)] з пар бітових масок (worse, better)"""
+    result = []
+    for r, (worse_mask, better_mask) in enumerate(changes):
+        for h in range(24):
+            if worse_mask >> (2 * h) & 1:
+                result.append((r, h, WORSE))
+            elif better_mask >> (2 * h) & 1:
+                result.append((r, h, BETTER))
+    return result
+
+
+class CellPainter:
+    """Художник області клітинок для заданої геометрії (розмір клітинки, кольори, товщина рамки змін)"""
+
+    def __init__(self, cell_w: int, cell_h: int, available: tuple, outage: tuple, possible: tuple,
+                 grid: tuple, worse: tuple, better: tuple, highlight_width: int):
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.highlight_width = highlight_width
+        self.palette = [c for color in (available, outage, possible, grid, worse, better) for c in color]
+
+        # Стовпчик пікселя -> півгодина: у кожній клітинці лінія сітки, ліва половина
+        # (до half включно перекривається правою), права половина; остання лінія сітки справа
+        half = cell_w // 2
+        cell_cols = np.repeat([0, 0, 1], [1, half - 1, cell_w - half])
+        self._pixel_half = np.append(2 * np.repeat(np.arange(24), cell_w) + np.tile(cell_cols, 24), 47)
+
+        # Кільця рамки змін у межах клітинки (з лініями сітки): відступ 1..highlight_width-1,
+        # кільце 0 збігається з лінією сітки, яка накладається поверх
+        yy, xx = np.mgrid[0:cell_h + 1, 0:cell_w + 1]
+        inset = np.minimum(np.minimum(yy, cell_h - yy), np.minimum(xx, cell_w - xx))
+        self._ring = (inset >= 1) & (inset < highlight_width)
+
+    def render(self, rows: list, changes: list = None) -> np.ndarray:
+        """Індекси кольорів області клітинок у логічних пікселях: (N·cell_h + 1) × (24·cell_w + 1)"""
+        n_rows = len(rows)
+        lines = half_hour_colors(rows)[:, self._pixel_half]
+        # Кожен рядок таблиці — cell_h однакових рядків пікселів (+ нижня лінія сітки)
+        pixels = np.repeat(lines, [self.cell_h] * (n_rows - 1) + [self.cell_h + 1], axis=0)
+        pixels[::self.cell_h, :] = GRID
+        pixels[:, ::self.cell_w] = GRID
+
+        for r, h, color in changed_cells(changes or []):
+            y0, x0 = r * self.cell_h, h * self.cell_w
+            cell = pixels[y0:y0 + self.cell_h + 1, x0:x0 + self.cell_w + 1]
+            cell[self._ring] = color
+        return pixels
+
+    def paint(self, img: Image.Image, x0: int, y0: int, rows: list, changes: list = None, scale: int = 1):
+        """
+        Малює клітинки на img: x0, y0 — логічні координати лівого верхнього кута першої
+        клітинки, rows — погодинні карти станів, changes — пари масок (worse, better) по рядках
+        """
+        block = Image.fromarray(self.render(rows, changes))
+        block.putpalette(self.palette)  # L -> P
+        block = block.convert(img.mode)
+        if scale > 1:
+            # Ціле збільшення NEAREST — кожен логічний піксель стає блоком scale×scale
+            block = block.resize((block.width * scale, block.height * scale), Image.NEAREST)
+        img.paste(block, (x0 * scale, y0 * scale))
@@ -18,3 +18,42 @@ LOG_FILE = os.path.join(BASE_DIR, "logs", "full_log.log")
 # -------------------для телеграм------------------
 BOT_PREFIX="TOE_PARSER"
 
+# -------------------режим демона------------------
+DAEMON_INTERVAL = 300   # Інтервал між циклами у режимі --daemon (сек)
+
+# -------------------адаптивне опитування------------------
+POLL_ADAPTIVE = True              # False — фіксований DAEMON_INTERVAL
+POLL_MIN_INTERVAL = 60            # Мінімальний інтервал опитування (сек)
+POLL_MAX_INTERVAL = 1800          # Максимальний інтервал опитування (сек)
+POLL_DEFAULT_INTERVAL = DAEMON_INTERVAL  # Інтервал, поки історії змін замало
+POLL_BOOST_AFTER_CHANGE = 3600    # Скільки секунд після зміни опитувати з мінімальним інтервалом
+POLL_DAILY_REQUEST_BUDGET = 3000  # Максимум HTTP-запитів до API за добу (0 — без обмеження)
+POLL_HISTORY_DECAY = 0.95         # Множник «забування» історії змін за добу
+
+# -------------------рендеринг------------------
+RENDER_WORKERS = 0   # Кількість процесів для рендерингу зображень (0 — кількість ядер, 1 — без пулу)
+
+# Масштаб зображень (відносно логічного макета) для різних споживачів
+IMAGE_TARGETS = {
+    "telegram": 2,   # Telegram однаково зменшує фото до 2560 px по довшій стороні
+    "web": 3,        # Основні файли out/images (як раніше OUTPUT_SCALE = 3)
+    "retina": 4,
+}
+IMAGE_TARGET = "web"  # Ціль для основних файлів out/images/*.png
+
+# PNG: індексована палітра проєкту замість RGB (див. png_encoder) і рівень стиснення zlib (0–9)
+PNG_PALETTE = True
+PNG_COMPRESS_LEVEL = 9
+
+# Додаткові варіанти кожного зображення (поруч з PNG в out/images, див. image_variants):
+# назва -> формат Pillow, масштаб відносно логічного макета (не більший за масштаб IMAGE_TARGET),
+# якість; інші ключі передаються в Image.save (наприклад, "lossless": True для WEBP)
+IMAGE_VARIANTS = {
+    "telegram": {"format": "JPEG", "scale": IMAGE_TARGETS["telegram"], "quality": 85, "optimize": True},
+    "web": {"format": "WEBP", "scale": IMAGE_TARGETS["web"], "lossless": True, "quality": 0},
+    "thumb": {"format": "WEBP", "scale": 0.5, "quality": 80},
+}
+TELEGRAM_VARIANT = "telegram"  # Варіант, який відправляється в Telegram (якщо немає — PNG)
+
+# SVG-версія кожного зображення (той самий макет векторами, поруч з PNG, див. svg_render)
+SVG_OUTPUT = True
@@ -3,6 +3,7 @@
 TOE Downloader - просто завантажує 2 картинки (today + tomorrow)
 """
 import requests
+import http_client
 import hashlib
 from pathlib import Path
 from datetime import datetime
@@ -58,7 +59,7 @@ def get_img_url(api_url, retries=3):
     for attempt in range(retries):
         try:
             log(f"Запит до API: {api_url} (спроба {attempt + 1}/{retries})")
-            resp = requests.get(
+            resp = http_client.get(
                 api_url, 
                 headers={"Accept": "application/json"},
                 timeout=10
@@ -130,7 +131,7 @@ def download(url, label, retries=3):
     for attempt in range(retries):
         try:
             log(f"⬇️ Завантажую картинку ({label}): {url} (спроба {attempt + 1}/{retries})")
-            resp = requests.get(url, timeout=30)
+            resp = http_client.get(url, timeout=30)
             resp.raise_for_status()
 
             content = resp.content
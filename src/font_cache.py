@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Спільний кеш шрифтів і розмірів тексту для рендерерів.
+
+- font(path, size) — ImageFont.truetype завантажується з диска один раз на процес
+  для кожної пари (шрифт, розмір); ним користуються gener_im_full.pick_font,
+  gener_im_1_G.FontManager.get_font і scaled_draw.scaled_font (шрифти масштабу цілі);
+- textbbox(font, text, xy) — рамка тексту, виміряна один раз для (шлях, розмір, текст).
+  Макет постійно міряє ті самі рядки («00», «-», «01», легенда, футер), тож повторні
+  рендери не звертаються до FreeType зовсім.
+
+Влучання/промахи рахуються для кожного кешу; take_stats() забирає приріст з моменту
+попереднього виклику (воркери render_pool повертають його разом з результатом),
+report() додає його в метрики toe_font_cache_total{cache, result}.
+"""
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+import metrics
+
+TEXT_CACHE_SIZE = 4096  # Максимум виміряних рядків (дати й час публікації щодня нові)
+
+# Рамки тексту міряються на порожньому зображенні 1×1 (режим L — як у RGB-зображень)
+_measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+_reported = {"font": (0, 0), "text": (0, 0)}
+
+
+@lru_cache(maxsize=None)
+def font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Шрифт TrueType path розміру size (помилки завантаження не кешуються)"""
+    return ImageFont.truetype(path, size=size)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _bbox(path: str, size: int, text: str, options: tuple) -> tuple:
+    return _measure.textbbox((0, 0), text, font=font(path, size), **dict(options))
+
+
+def textbbox(font_obj, text: str, xy=(0, 0), **kwargs) -> tuple:
+    """
+    Те саме, що ImageDraw.textbbox(xy, text, font=font_obj, **kwargs).
+    Кешується для шрифтів TrueType і цілих xy (дробовий зсув змінює растеризацію).
+    """
+    path = getattr(font_obj, "path", None)
+    size = getattr(font_obj, "size", None)
+    x, y = xy
+    if not path or not size or x != int(x) or y != int(y):
+        return _measure.textbbox(xy, text, font=font_obj, **kwargs)
+    left, top, right, bottom = _bbox(path, size, text, tuple(sorted(kwargs.items())))
+    return (left + x, top + y, right + x, bottom + y)
+
+
+def take_stats() -> dict:
+    """Влучання/промахи кешів з попереднього виклику: {"font": {"hit": n, "miss": n}, "text": {...}}"""
+    stats = {}
+    for name, cached in (("font", font), ("text", _bbox)):
+        info = cached.cache_info()
+        hits, misses = _reported[name]
+        stats[name] = {"hit": info.hits - hits, "miss": info.misses - misses}
+        _reported[name] = (info.hits, info.misses)
+    return stats
+
+
+def merge_stats(total: dict, stats: dict) -> dict:
+    """Додає stats (результат take_stats) до total"""
+    for name, counts in (stats or {}).items():
+        for result, value in counts.items():
+            total.setdefault(name, {}).setdefault(result, 0)
+            total[name][result] += value
+    return total
+
+
+def hit_rate(stats: dict, name: str) -> float:
+    counts = stats.get(name, {})
+    total = counts.get("hit", 0) + counts.get("miss", 0)
+    return counts.get("hit", 0) / total if total else 0.0
+
+
+def report(stats: dict = None) -> dict:
+    """Записує stats (None — take_stats() цього процесу) у метрики; повертає їх"""
+    stats = take_stats() if stats is None else stats
+    for name, counts in stats.items():
+        for result, value in counts.items():
+            if value:
+                metrics.inc("toe_font_cache_total", value, cache=name, result=result)
+    return stats
+
+
+def describe(stats: dict) -> str:
+    """Короткий рядок для журналу: шрифти 95% (20/21), текст 98% (...)"""
+    parts = []
+    for name, label in (("font", "шрифти"), ("text", "текст")):
+        counts = stats.get(name, {})
+        parts.append(f"{label} {hit_rate(stats, name):.0%} ({counts.get('hit', 0)}/"
+                     f"{counts.get('hit', 0) + counts.get('miss', 0)})")
+    return ", ".join(parts)
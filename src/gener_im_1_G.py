@@ -15,8 +15,20 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from PIL import Image, ImageDraw, ImageFont
 import locale
+import os
+import shutil
 import sys
+from functools import lru_cache
 from telegram_notify import send_error
+from schedule_bits import DaySchedule, Schedule, hours_mask
+import metrics
+import font_cache
+import render_templates
+from scaled_draw import ScaledDraw, target_scale, target_filename
+from svg_render import SvgCanvas
+from cell_painter import CellPainter
+from png_encoder import encoder_for
+import image_variants
 
 # Спроба встановити локаль для українських назв місяців
 try:
@@ -91,14 +103,42 @@ class Config:
     BETTER_OUTLINE = (40, 167, 69)
     HIGHLIGHT_WIDTH = 3 # Ширина контуру для підсвічування змін
     TIMEZONE = "Europe/Kyiv" # Часова зона для відображення дат і часу
-    OUTPUT_SCALE = 3 # Масштаб для покращення якості зображення при збереженні
+    
+    LEGEND_STATES = ("yes", "no", "maybe") # Стани в легенді
+    INFO_LINES = (
+        "Цей проєкт створено волонтерами для вас. Разом ми можемо зробити інформацію доступною для всіх.",
+        "Помітили розбіжності між графіком та офіційним джерелом? Напишіть нам: https://t.me/OUTAGE_CHAT",
+        "Офіційна спільнота проєкту: https://t.me/svitlobot_api",
+    )
+
+# Клітинки таблиці малюються векторно (див. cell_painter)
+painter = CellPainter(Config.CELL_W, Config.CELL_H, Config.AVAILABLE_COLOR, Config.OUTAGE_COLOR,
+                      Config.POSSIBLE_COLOR, Config.GRID_COLOR, Config.WORSE_OUTLINE,
+                      Config.BETTER_OUTLINE, Config.HIGHLIGHT_WIDTH)
+
+# Палітра PNG: базові кольори + згладжування тексту на фонах (див. png_encoder)
+png = encoder_for(
+    (Config.BG, Config.TABLE_BG, Config.GRID_COLOR, Config.TEXT_COLOR, Config.OUTAGE_COLOR,
+     Config.POSSIBLE_COLOR, Config.AVAILABLE_COLOR, Config.HEADER_BG, Config.FOOTER_COLOR,
+     Config.WORSE_OUTLINE, Config.BETTER_OUTLINE, Config.HIGHLIGHT_COLOR, Config.HIGHLIGHT_BG,
+     Config.HIGHLIGHT_BORDER),
+    ((Config.TEXT_COLOR, Config.BG), (Config.TEXT_COLOR, Config.TABLE_BG), (Config.TEXT_COLOR, Config.HEADER_BG),
+     (Config.HIGHLIGHT_COLOR, Config.HIGHLIGHT_BG), (Config.FOOTER_COLOR, Config.BG)),
+)
+
+def state_from_json(data: dict) -> dict:
+    """Стан {"data", "update"} з повного JSON графіка (або вже стан — як є)"""
+    if "fact" not in data:
+        return data
+    fact = data.get("fact", {})
+    return {"data": fact.get("data", {}), "update": fact.get("update")}
 
 def load_previous_state():
-    """Завантажує попередній стан графіків"""
+    """Завантажує попередній стан графіків (стан або копію повного JSON, див. save_current_state)"""
     if PREV_STATE_FILE.exists():
         try:
             with open(PREV_STATE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
+                data = state_from_json(json.load(f))
                 log(f"📂 Завантажено попередній стан. Дата оновлення: {data.get('update', 'невідомо')}")
                 return data
         except Exception as e:
@@ -107,51 +147,35 @@ def load_previous_state():
         log(f"ℹ️ Файл попереднього стану не знайдено: {PREV_STATE_FILE}")
     return {}
 
-def save_current_state(data: dict):
-    """Зберігає поточний стан графіків"""
+def save_current_state(data: dict, source_path=None):
+    """
+    Зберігає поточний стан графіків. source_path — уже записаний JSON тих самих даних
+    (main): файл копіюється без повторного кодування JSON
+    """
     try:
-        fact = data.get("fact", {})
-        state_to_save = {
-            "data": fact.get("data", {}),
-            "update": fact.get("update"),
-            "timestamp": datetime.now(ZoneInfo("Europe/Kyiv")).isoformat()
-        }
-        with open(PREV_STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state_to_save, f, ensure_ascii=False, indent=2)
+        if source_path and os.path.exists(source_path):
+            shutil.copyfile(source_path, PREV_STATE_FILE)
+            state_to_save = state_from_json(data)
+        else:
+            fact = data.get("fact", {})
+            state_to_save = {
+                "data": fact.get("data", {}),
+                "update": fact.get("update"),
+                "timestamp": datetime.now(ZoneInfo("Europe/Kyiv")).isoformat()
+            }
+            with open(PREV_STATE_FILE, "w", encoding="utf-8") as f:
+                json.dump(state_to_save, f, ensure_ascii=False, indent=2)
         log(f"💾 Збережено поточний стан у {PREV_STATE_FILE}. Дата оновлення: {state_to_save.get('update', 'невідомо')}")
+        return state_to_save
     except Exception as e:
         log(f"⚠️ Помилка при збереженні поточного стану: {e}")
 
-def calculate_outage_severity(state: str) -> int:
-    """Повертає числове значення важкості відключення"""
-    severity_map = {
-        "yes": 0,
-        "maybe": 2,
-        "mfirst": 2,
-        "msecond": 2,
-        "first": 3,
-        "second": 3,
-        "no": 4
-    }
-    return severity_map.get(state, 0)
-
-def compare_states(old_state: str, new_state: str) -> str:
-    """Порівнює два стани"""
-    old_severity = calculate_outage_severity(old_state)
-    new_severity = calculate_outage_severity(new_state)
-    
-    if new_severity > old_severity:
-        return "worse"
-    elif new_severity < old_severity:
-        return "better"
-    return "same"
-
 class FontManager:
     @staticmethod
     def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
         try:
             path = Config.TITLE_FONT_PATH if bold else Config.FONT_PATH
-            return ImageFont.truetype(path, size=size)
+            return font_cache.font(path, size)  # Спільний кеш процесу (font_cache)
         except Exception as e:
             log(f"Помилка завантаження шрифту: {e}")
             return ImageFont.load_default()
@@ -194,8 +218,11 @@ class DataProcessor:
         return day_keys
 
 class ImageRenderer:
-    def __init__(self, data: dict, json_path: Path, group_name: str, prev_state: dict = None):
+    def __init__(self, data: dict, json_path: Path, group_name: str, prev_state: dict = None,
+                 target: str = None):
         self.data = data
+        self.target = target
+        self.scale = target_scale(target)  # Малюємо одразу у вихідному масштабі цілі
         self.json_path = json_path
         self.group_name = group_name
         self.prev_data = prev_state.get("data", {}) if prev_state else {}
@@ -203,53 +230,113 @@ class ImageRenderer:
         self.processor = DataProcessor()
         self.changes_worse = 0
         self.changes_better = 0
+        self._cells = None  # Рядки клітинок (спільні для PNG і SVG)
         
         if self.prev_data:
             log(f"🔍 Попередні дані завантажені для {group_name}. Кількість днів: {len(self.prev_data)}")
         else:
             log(f"ℹ️ Попередніх даних немає для {group_name}")
         
-    def render(self) -> None:
+    def draw(self) -> Image.Image:
+        """Зображення групи в пам'яті (RGB, масштаб цілі)"""
+        day_keys = self.processor.get_dates_for_display(self.data)
+        template = self._get_template(day_keys)
+        img = template.new_canvas()
+        self._draw_dynamic(ScaledDraw(ImageDraw.Draw(img), self.scale, img), template, day_keys,
+                           template.meta["legend_x"])
+        return img
+    
+    def draw_svg(self) -> SvgCanvas:
+        """Той самий макет групи у вигляді SVG (svg_render)"""
+        day_keys = self.processor.get_dates_for_display(self.data)
+        static, legend_x = ImageRenderer.build_svg_static_layer(len(day_keys), self._legend_texts())
+        svg = static.copy()
+        self._draw_dynamic(svg, None, day_keys, legend_x)
+        return svg
+    
+    def _draw_dynamic(self, draw, template, day_keys: list, legend_x: float) -> None:
+        """Динамічна частина поверх статичного шару (draw — ScaledDraw або SvgCanvas)"""
+        self._draw_right_header(draw, self.font_manager.get_font(Config.TITLE_FONT_SIZE, bold=True))
+        self._draw_dates_column(draw, day_keys)
+        self._draw_data_cells(draw, day_keys)
+        draw.apply_grid(template, Config.GRID_COLOR)
+        self._draw_change_legend(draw, day_keys, legend_x)
+        self._draw_footer(draw)
+    
+    def render(self) -> dict:
+        """Малює і зберігає зображення групи; повертає запис маніфесту (image_variants)"""
         try:
-            day_keys = self.processor.get_dates_for_display(self.data)
-            img = self._create_base_image(day_keys)
-            draw = ImageDraw.Draw(img)
-            
-            self._draw_header(draw)
-            self._draw_hours_header(draw, day_keys)
-            self._draw_dates_column(draw, day_keys)
-            self._draw_data_cells(draw, day_keys)
-            self._draw_grid(draw, day_keys)
-            self._draw_legend(draw, day_keys)
-            self._draw_footer(draw)
-            
-            self._save_image(img)
+            entry = self._save_image(self.draw())
             
             if self.changes_worse > 0 or self.changes_better > 0:
                 log(f"📈 Зміни в графіку {self.group_name}: погіршень={self.changes_worse}, покращень={self.changes_better}")
             else:
                 log(f"ℹ️ Графік {self.group_name}: змін не виявлено")
+            return entry
             
         except Exception as e:
             log(f"Помилка рендерингу для групи {self.group_name}: {e}")
             raise
     
-    def _create_base_image(self, day_keys: list) -> Image.Image:
+    # --- Статичний шар (кешується в render_templates) ---
+    def _legend_texts(self) -> tuple:
+        return tuple(self._get_description_for_state(state) for state in Config.LEGEND_STATES)
+    
+    def _get_template(self, day_keys: list) -> render_templates.Template:
+        return render_templates.get_template("group", render_templates.constants_of(Config),
+                                             ImageRenderer.build_static_layer, code=sys.modules[__name__],
+                                             n_rows=len(day_keys), legend_texts=self._legend_texts(),
+                                             scale=self.scale)
+    
+    @staticmethod
+    def build_static_layer(n_rows: int, legend_texts: tuple, scale: int = 1) -> render_templates.Template:
+        """Статичний шар у масштабі scale з маскою ліній сітки"""
+        img = ImageRenderer._create_base_image(n_rows, scale)
+        grid_mask = Image.new("L", img.size, 0)
+        legend_x = ImageRenderer._draw_static(ScaledDraw(ImageDraw.Draw(img), scale),
+                                              ScaledDraw(ImageDraw.Draw(grid_mask), scale), n_rows, legend_texts)
+        return render_templates.Template(img, grid_mask, {"legend_x": legend_x})
+    
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def build_svg_static_layer(n_rows: int, legend_texts: tuple) -> tuple:
+        """Статичний шар SVG і x легенди змін (кешується в пам'яті процесу)"""
+        svg = SvgCanvas(*ImageRenderer._image_size(n_rows), Config.BG)
+        return svg, ImageRenderer._draw_static(svg, svg.grid, n_rows, legend_texts)
+    
+    @staticmethod
+    def _draw_static(draw, grid_draw, n_rows: int, legend_texts: tuple) -> int:
+        """Лівий заголовок, рядок годин, «Дата», сітка, поля легенди та рядки про проєкт"""
+        ImageRenderer._draw_header(draw)
+        ImageRenderer._draw_hours_header(draw)
+        ImageRenderer._draw_dates_header(draw)
+        ImageRenderer._draw_grid(draw, n_rows)
+        ImageRenderer._draw_grid(grid_draw, n_rows, fill=255)
+        legend_x = ImageRenderer._draw_legend(draw, n_rows, legend_texts)
+        ImageRenderer._draw_info_lines(draw, n_rows)
+        return legend_x
+    
+    @staticmethod
+    def _image_size(n_rows: int) -> tuple:
+        """Логічний розмір зображення (ширина, висота)"""
         n_hours = 24
-        n_rows = len(day_keys)
         
         width = (Config.SPACING * 2 + Config.LEFT_COL_W + n_hours * Config.CELL_W)
         height = (Config.SPACING * 2 + Config.HEADER_H + Config.HOUR_ROW_H + 
                  n_rows * Config.CELL_H + Config.LEGEND_H + 40 + Config.HEADER_SPACING)
-        
-        return Image.new("RGB", (width, height), Config.BG)
+        return width, height
+    
+    @staticmethod
+    def _create_base_image(n_rows: int, scale: int = 1) -> Image.Image:
+        width, height = ImageRenderer._image_size(n_rows)
+        return Image.new("RGB", (width * scale, height * scale), Config.BG)
     
-    def _draw_header(self, draw: ImageDraw.Draw) -> None:
-        font_title = self.font_manager.get_font(Config.TITLE_FONT_SIZE, bold=True)
+    @staticmethod
+    def _draw_header(draw: ImageDraw.Draw) -> None:
+        font_title = FontManager.get_font(Config.TITLE_FONT_SIZE, bold=True)
         left_title = "Графік відключень:"
         draw.text((Config.SPACING, Config.SPACING), left_title, 
                  fill=Config.TEXT_COLOR, font=font_title)
-        self._draw_right_header(draw, font_title)
     
     def _draw_right_header(self, draw: ImageDraw.Draw, font: ImageFont.FreeTypeFont) -> None:
         right_title = f"Черга {self.group_name.replace('GPV', '')}"
@@ -274,12 +361,13 @@ class ImageRenderer:
         draw.text((text_x, text_y), right_title, 
                  fill=Config.HIGHLIGHT_COLOR, font=font)
     
-    def _draw_hours_header(self, draw: ImageDraw.Draw, day_keys: list) -> None:
+    @staticmethod
+    def _draw_hours_header(draw: ImageDraw.Draw) -> None:
         table_x0 = Config.SPACING
         hour_y0 = Config.SPACING + Config.HEADER_H + Config.HEADER_SPACING
         hour_y1 = hour_y0 + Config.HOUR_ROW_H
         
-        font_hour = self.font_manager.get_font(Config.HOUR_FONT_SIZE)
+        font_hour = FontManager.get_font(Config.HOUR_FONT_SIZE)
         
         for h in range(24):
             x0 = table_x0 + Config.LEFT_COL_W + h * Config.CELL_W
@@ -299,7 +387,8 @@ class ImageRenderer:
                 draw.text((x0 + (Config.CELL_W - w_line) / 2, y), 
                          line, fill=Config.TEXT_COLOR, font=font_hour)
     
-    def _draw_dates_column(self, draw: ImageDraw.Draw, day_keys: list) -> None:
+    @staticmethod
+    def _draw_dates_header(draw: ImageDraw.Draw) -> None:
         table_x0 = Config.SPACING
         table_y0 = (Config.SPACING + Config.HEADER_H + 
                    Config.HOUR_ROW_H + Config.HEADER_SPACING)
@@ -308,7 +397,7 @@ class ImageRenderer:
                        table_x0 + Config.LEFT_COL_W, table_y0], 
                       fill=Config.HEADER_BG, outline=Config.GRID_COLOR)
         
-        font_date = self.font_manager.get_font(Config.DATE_FONT_SIZE)
+        font_date = FontManager.get_font(Config.DATE_FONT_SIZE)
         header_text = "Дата"
         bbox_header = draw.textbbox((0, 0), header_text, font=font_date)
         w_header = bbox_header[2] - bbox_header[0]
@@ -317,6 +406,12 @@ class ImageRenderer:
         draw.text((table_x0 + (Config.LEFT_COL_W - w_header) / 2,
                   table_y0 - Config.HOUR_ROW_H + (Config.HOUR_ROW_H - h_header) / 2),
                  header_text, fill=Config.TEXT_COLOR, font=font_date)
+    
+    def _draw_dates_column(self, draw: ImageDraw.Draw, day_keys: list) -> None:
+        table_x0 = Config.SPACING
+        table_y0 = (Config.SPACING + Config.HEADER_H + 
+                   Config.HOUR_ROW_H + Config.HEADER_SPACING)
+        font_date = self.font_manager.get_font(Config.DATE_FONT_SIZE)
         
         for r, day_key in enumerate(day_keys):
             y0 = table_y0 + r * Config.CELL_H
@@ -333,74 +428,23 @@ class ImageRenderer:
                       y0 + (Config.CELL_H - h) / 2), 
                      date_label, fill=Config.TEXT_COLOR, font=font_date)
     
-    def _draw_split_cell(self, draw: ImageDraw.Draw, x0: int, y0: int, x1: int, y1: int, 
-                        state: str, prev_state: str, next_state: str, outline_color: tuple,
-                        change_type: str = None):
-        cell_width = x1 - x0
-        half_width = cell_width // 2
-
-        if state == "yes":
-            left_color = right_color = Config.AVAILABLE_COLOR
-        elif state == "no":
-            left_color = right_color = Config.OUTAGE_COLOR
-        elif state == "maybe":
-            left_color = right_color = Config.POSSIBLE_COLOR
-        elif state == "first":
-            left_color = Config.OUTAGE_COLOR
-            right_color = Config.OUTAGE_COLOR if next_state in ["no", "first","maybe"] else Config.AVAILABLE_COLOR
-        elif state == "second":
-            right_color = Config.OUTAGE_COLOR
-            left_color = Config.OUTAGE_COLOR if prev_state in ["no", "second","maybe"] else Config.AVAILABLE_COLOR
-        elif state == "mfirst":
-            left_color = Config.POSSIBLE_COLOR
-            if next_state is not None:
-                if next_state in ["no", "first"]:
-                    right_color = Config.OUTAGE_COLOR
-                else:
-                    right_color = Config.AVAILABLE_COLOR
-            else:
-                if prev_state in ["no", "first", "second","maybe", "mfirst","msecond"]:
-                    right_color = Config.AVAILABLE_COLOR
-                else:
-                    right_color = Config.OUTAGE_COLOR
-        elif state == "msecond":
-            right_color = Config.POSSIBLE_COLOR
-            if prev_state is not None:
-                if prev_state in ["no", "second"]:
-                    left_color = Config.OUTAGE_COLOR
-                else:
-                    left_color = Config.AVAILABLE_COLOR
-            else:
-                if next_state in ["no", "first", "second","maybe", "mfirst","msecond"]:
-                    left_color = Config.AVAILABLE_COLOR
-                else:
-                    left_color = Config.OUTAGE_COLOR
-        else:
-            left_color = right_color = Config.AVAILABLE_COLOR
-
-        if left_color == right_color:
-            draw.rectangle([x0, y0, x1, y1], fill=left_color, outline=outline_color)
-        else:
-            draw.rectangle([x0, y0, x0 + half_width, y1], fill=left_color)
-            draw.rectangle([x0 + half_width, y0, x1, y1], fill=right_color)
-            draw.rectangle([x0, y0, x1, y1], outline=outline_color, fill=None)
-        
-        if change_type == "worse":
-            for i in range(Config.HIGHLIGHT_WIDTH):
-                draw.rectangle([x0 + i, y0 + i, x1 - i, y1 - i], outline=Config.WORSE_OUTLINE)
-        elif change_type == "better":
-            for i in range(Config.HIGHLIGHT_WIDTH):
-                draw.rectangle([x0 + i, y0 + i, x1 - i, y1 - i], outline=Config.BETTER_OUTLINE)
-    
-    def _draw_data_cells(self, draw: ImageDraw.Draw, day_keys: list) -> None:
+    def _draw_data_cells(self, draw, day_keys: list) -> None:
         table_x0 = Config.SPACING
         table_y0 = (Config.SPACING + Config.HEADER_H + 
                    Config.HOUR_ROW_H + Config.HEADER_SPACING)
         
+        if self._cells is None:
+            self._cells = self._collect_cells(day_keys)
+        row_hours, row_changes = self._cells
+        draw.paint_cells(painter, table_x0 + Config.LEFT_COL_W, table_y0, row_hours, row_changes)
+    
+    def _collect_cells(self, day_keys: list) -> tuple:
+        """Погодинні карти станів і маски змін (worse, better) по рядках; рахує зміни"""
         fact = self.data.get("fact", {})
+        row_hours = []
+        row_changes = []
         
         for r, day_key in enumerate(day_keys):
-            y0 = table_y0 + r * Config.CELL_H
             day_map = fact["data"][day_key]
             gp_hours = day_map.get(self.group_name, {})
             
@@ -409,40 +453,39 @@ class ImageRenderer:
             
             if r == 0 and prev_gp_hours:
                 log(f"🔍 День {day_key}, група {self.group_name}: знайдено {len(prev_gp_hours)} годин у попередніх даних")
+
+            # Погодинні бітові маски погіршень/покращень відносно попереднього графіка
+            worse_mask = better_mask = 0
+            if prev_gp_hours:
+                try:
+                    worse_mask, better_mask = DaySchedule.from_hours_map(gp_hours).compare_to(
+                        DaySchedule.from_hours_map(prev_gp_hours))
+                except ValueError as e:
+                    log(f"⚠️ {self.group_name}, {day_key}: {e} — зміни не підсвічуються")
+                # Порівнюємо лише години, присутні в попередніх даних
+                known_mask = hours_mask(prev_gp_hours)
+                worse_mask &= known_mask
+                better_mask &= known_mask
             
             for h in range(24):
-                h_key = str(h+1)
-                state = gp_hours.get(h_key, "yes")
-                
-                prev_h_key = str(h) if h > 0 else None
-                next_h_key = str(h + 2) if h < 23 else None
-                prev_state = gp_hours.get(prev_h_key) if prev_h_key else None
-                next_state = gp_hours.get(next_h_key) if next_h_key else None
-                
-                change_type = None
-                if prev_gp_hours and h_key in prev_gp_hours:
-                    old_state = prev_gp_hours[h_key]
-                    comparison = compare_states(old_state, state)
-                    
-                    if comparison != "same" and self.changes_worse == 0 and self.changes_better == 0:
-                        log(f"🔍 Перша зміна: день={day_key}, година={h_key}, старий={old_state}, новий={state}, тип={comparison}")
-                    
-                    if comparison == "worse":
-                        change_type = "worse"
+                if (worse_mask | better_mask) >> (2 * h) & 1:
+                    h_key = str(h+1)
+                    change_type = "worse" if worse_mask >> (2 * h) & 1 else "better"
+                    if self.changes_worse == 0 and self.changes_better == 0:
+                        log(f"🔍 Перша зміна: день={day_key}, година={h_key}, старий={prev_gp_hours[h_key]}, новий={gp_hours.get(h_key, 'yes')}, тип={change_type}")
+                    if change_type == "worse":
                         self.changes_worse += 1
-                    elif comparison == "better":
-                        change_type = "better"
+                    else:
                         self.changes_better += 1
-                
-                x0 = table_x0 + Config.LEFT_COL_W + h * Config.CELL_W
-                x1 = x0 + Config.CELL_W
-                
-                self._draw_split_cell(draw, x0, y0, x1, y0 + Config.CELL_H, 
-                                     state, prev_state, next_state, Config.GRID_COLOR,
-                                     change_type)
-    
-    def _draw_grid(self, draw: ImageDraw.Draw, day_keys: list) -> None:
-        n_rows = len(day_keys)
+            
+            row_hours.append(gp_hours)
+            row_changes.append((worse_mask, better_mask))
+        
+        return row_hours, row_changes
+    
+    @staticmethod
+    def _draw_grid(draw: ImageDraw.Draw, n_rows: int, fill=None) -> None:
+        fill = fill if fill is not None else Config.GRID_COLOR
         table_x0 = Config.SPACING
         table_y0 = (Config.SPACING + Config.HEADER_H + 
                    Config.HOUR_ROW_H + Config.HEADER_SPACING)
@@ -452,12 +495,12 @@ class ImageRenderer:
         for i in range(25):
             x = table_x0 + Config.LEFT_COL_W + i * Config.CELL_W
             draw.line([(x, table_y0 - Config.HOUR_ROW_H), (x, table_y1)], 
-                     fill=Config.GRID_COLOR)
+                     fill=fill)
         
         for r in range(n_rows + 1):
             y = table_y0 + r * Config.CELL_H
             draw.line([(table_x0, y), (table_x1, y)], 
-                     fill=Config.GRID_COLOR)
+                     fill=fill)
     
     def _get_description_for_state(self, state: str) -> str:
         preset = self.data.get("preset", {})
@@ -473,17 +516,16 @@ class ImageRenderer:
         }
         return time_type.get(state, descriptions.get(state, "Невідомий стан"))
     
-    def _draw_legend(self, draw: ImageDraw.Draw, day_keys: list) -> None:
-        n_rows = len(day_keys)
+    @staticmethod
+    def _draw_legend(draw: ImageDraw.Draw, n_rows: int, legend_texts: tuple) -> int:
+        """Поля легенди станів; повертає x, з якого продовжується легенда змін"""
         table_y1 = (Config.SPACING + Config.HEADER_H + 
                    Config.HOUR_ROW_H + Config.HEADER_SPACING + 
                    n_rows * Config.CELL_H)
         
-        legend_states = ["yes", "no", "maybe"]
         legend_items = []
-        for state in legend_states:
-            color = self._get_color_for_state(state)
-            description = self._get_description_for_state(state)
+        for state, description in zip(Config.LEGEND_STATES, legend_texts):
+            color = ImageRenderer._get_color_for_state(state)
             legend_items.append((color, description, state))
         
         legend_y = table_y1 + 15
@@ -491,7 +533,7 @@ class ImageRenderer:
         gap = 15
         x_cursor = Config.SPACING
         
-        font_legend = self.font_manager.get_font(Config.LEGEND_FONT_SIZE)
+        font_legend = FontManager.get_font(Config.LEGEND_FONT_SIZE)
         
         for col, text, state in legend_items:
             text_bbox = draw.textbbox((0, 0), text, font=font_legend)
@@ -504,6 +546,18 @@ class ImageRenderer:
             draw.text((x_cursor + box_size + 4, legend_y + (box_size - (text_bbox[3]-text_bbox[1]))/2), 
                      text, fill=Config.TEXT_COLOR, font=font_legend)
             x_cursor += block_w + gap
+        return x_cursor
+    
+    def _draw_change_legend(self, draw: ImageDraw.Draw, day_keys: list, x_cursor: int) -> None:
+        """Легенда погіршень/покращень (лише якщо є зміни) після полів легенди станів"""
+        n_rows = len(day_keys)
+        table_y1 = (Config.SPACING + Config.HEADER_H + 
+                   Config.HOUR_ROW_H + Config.HEADER_SPACING + 
+                   n_rows * Config.CELL_H)
+        legend_y = table_y1 + 15
+        box_size = 20
+        gap = 15
+        font_legend = self.font_manager.get_font(Config.LEGEND_FONT_SIZE)
         
         if self.changes_worse > 0 or self.changes_better > 0:
             x_cursor += gap * 2
@@ -523,7 +577,8 @@ class ImageRenderer:
             draw.text((x_cursor + box_size + 4, legend_y + (box_size - (text_bbox[3]-text_bbox[1]))/2), 
                      better_text, fill=Config.TEXT_COLOR, font=font_legend)
     
-    def _get_color_for_state(self, state: str) -> tuple:
+    @staticmethod
+    def _get_color_for_state(state: str) -> tuple:
         color_map = {
             "yes": Config.AVAILABLE_COLOR,
             "no": Config.OUTAGE_COLOR,
@@ -553,58 +608,147 @@ class ImageRenderer:
         
         draw.text((width - w_pub - Config.SPACING, legend_bottom - 20), 
                  pub_label, fill=Config.FOOTER_COLOR, font=font_small)
+    
+    @staticmethod
+    def _draw_info_lines(draw: ImageDraw.Draw, n_rows: int) -> None:
+        font_small = FontManager.get_font(Config.SMALL_FONT_SIZE)
+        legend_bottom = (Config.SPACING + Config.HEADER_H + Config.HOUR_ROW_H + 
+                        Config.HEADER_SPACING + n_rows * Config.CELL_H + 
+                        Config.LEGEND_H)
         
         x_text = Config.SPACING
         y_base = legend_bottom - 20
         line_gap = 6
 
-        info_lines = [
-            "Цей проєкт створено волонтерами для вас. Разом ми можемо зробити інформацію доступною для всіх.",
-            "Помітили розбіжності між графіком та офіційним джерелом? Напишіть нам: https://t.me/OUTAGE_CHAT",
-            "Офіційна спільнота проєкту: https://t.me/svitlobot_api"        
-        ]
-
-
-        for i, line in enumerate(info_lines):
+        for i, line in enumerate(Config.INFO_LINES):
             bbox_line = draw.textbbox((0, 0), line, font=font_small)
             draw.text((x_text, y_base + i * (bbox_line[3] - bbox_line[1] + line_gap)),
                       line, fill=Config.FOOTER_COLOR, font=font_small)
     
-    def _save_image(self, img: Image.Image) -> None:
-        safe_group_name = self.group_name.replace('GPV', '').replace('.', '-')
-        out_name = OUT_DIR / f"gpv-{safe_group_name}-emergency.png"
-        
-        img_resized = img.resize((img.width * Config.OUTPUT_SCALE, 
-                                img.height * Config.OUTPUT_SCALE), 
-                               resample=Image.LANCZOS)
-        img_resized.save(out_name, optimize=True)
-        log(f"✅ Збережено {out_name}")
+    def _save_image(self, img: Image.Image) -> dict:
+        out_name = group_image_path(self.group_name, self.target)
+        if self.target:
+            png.write(img, out_name)
+            log(f"✅ Збережено {out_name}")
+            return {}
+        # Основна ціль: PNG + варіанти для Telegram / вебу та SVG (image_variants)
+        entry = image_variants.save_all(img, out_name, png, self.scale)
+        entry.update(image_variants.save_svg(self.draw_svg, out_name))
+        log(f"✅ Збережено {out_name} (+ варіанти: {', '.join(n for n in entry if n != image_variants.MASTER) or '—'})")
+        return entry
+
+def group_image_path(group_name: str, target: str = None) -> Path:
+    """Шлях до зображення групи: GPV1.2 -> out/images/gpv-1-2-emergency.png"""
+    safe_group_name = group_name.replace('GPV', '').replace('.', '-')
+    return OUT_DIR / target_filename(f"gpv-{safe_group_name}-emergency.png", target)
 
-def generate_from_json(json_path: str, prev_state: dict = None):
+def select_groups_to_render(data, groups: list, prev_state: dict = None) -> tuple:
     """
-    Генерація зображень для всіх груп з JSON файлу
+    Визначає, які зображення груп треба перегенерувати.
+    Група перемальовується, якщо її рядки на показаних датах відрізняються від попереднього
+    знімка або зображення немає на диску. Якщо змінився сам набір показаних дат
+    (наприклад, з'явилось «завтра»), перемальовуються всі групи.
     
     Args:
-        json_path: Шлях до JSON файлу
+        data: графік (dict або Schedule)
+    
+    Returns:
+        (to_render, skipped): списки назв груп
+    """
+    prev_data = prev_state.get("data", {}) if prev_state else {}
+    if not prev_data:
+        return list(groups), []
+    
+    schedule = Schedule.wrap(data)
+    day_keys = DataProcessor.get_dates_for_display(schedule.data)
+    # Порівнюється весь показаний набір дат попереднього знімка: і нове «завтра»,
+    # і відкликане «завтра» (дат стало менше), і зсув на наступну добу
+    prev_day_keys = DataProcessor.get_dates_for_display({"fact": {"data": prev_data}})
+    if prev_day_keys != day_keys:
+        log("🗓️ Набір дат для відображення змінився — перегенеровую всі групи")
+        return list(groups), []
+    
+    to_render, skipped = [], []
+    for group in groups:
+        changed = False
+        for day_key in day_keys:
+            old_day = prev_data.get(day_key, {})
+            old_hours = old_day.get(group) if isinstance(old_day, dict) else None
+            try:
+                # Попередній стан — погодинний JSON, тож порівнюється згорнутий графік
+                changed = not isinstance(old_hours, dict) or \
+                    schedule.day(day_key, group).folded() != DaySchedule.from_hours_map(old_hours)
+            except ValueError as e:
+                log(f"⚠️ {group}, {day_key}: {e} у попередньому стані — перемальовую")
+                changed = True
+            if changed:
+                break
+        if changed or not group_image_path(group).exists():
+            to_render.append(group)
+        else:
+            skipped.append(group)
+    return to_render, skipped
+
+def generate_from_data(data, prev_state: dict = None, force: bool = False, json_path: str = None) -> dict:
+    """
+    Генерація зображень для груп з уже побудованого графіка (dict або Schedule).
+    Перемальовуються лише групи, графік яких змінився відносно попереднього стану
+    (або force=True — усі групи); решта зображень лишаються на диску без змін.
+    
+    Args:
+        data: Графік (dict у форматі JSON або Schedule)
         prev_state: Попередній стан (необов'язковий). Якщо None - завантажується автоматично
+        force: Перегенерувати всі групи незалежно від змін
+        json_path: Шлях до JSON, з якого отримано дані (лише для інформації)
+    
+    Returns:
+        {"rendered": [...], "skipped": [...]}
     """
     # ВИПРАВЛЕННЯ: Якщо prev_state не передано - завантажуємо автоматично
     if prev_state is None:
         log("ℹ️ prev_state не передано, завантажую автоматично")
         prev_state = load_previous_state()
     
-    processor = DataProcessor()
-    data = processor.load_json_data(json_path)
-    groups = processor.get_groups_from_data(data)
+    schedule = Schedule.wrap(data)
+    data = schedule.data
+    groups = DataProcessor.get_groups_from_data(data)
     
-    for group in groups:
+    if force:
+        to_render, skipped = list(groups), []
+    else:
+        to_render, skipped = select_groups_to_render(schedule, groups, prev_state)
+    
+    outputs = {}
+    for group in to_render:
         log(f"▶ Генерую для {group}…")
-        renderer = ImageRenderer(data, Path(json_path), group, prev_state)
-        renderer.render()
+        renderer = ImageRenderer(data, Path(json_path) if json_path else None, group, prev_state)
+        with metrics.timer("toe_render_seconds", image=group):
+            outputs[group_image_path(group).name] = renderer.render()
+    image_variants.update_manifest(outputs)
+    log(f"🔤 Кеш шрифтів і тексту: {font_cache.describe(font_cache.report())}")
+    
+    metrics.inc("toe_group_images_total", len(to_render), result="rendered")
+    metrics.inc("toe_group_images_total", len(skipped), result="skipped")
+    log(f"🎯 Перегенеровано {len(to_render)} з {len(groups)}: {', '.join(to_render) or '—'}")
+    if skipped:
+        log(f"⏭️ Без змін, пропущено: {', '.join(skipped)}")
     
     #Зберігаємо поточний стан після генерації всіх груп
     save_current_state(data)
     log("💾 Збережено поточний стан після генерації груп")
+    return {"rendered": to_render, "skipped": skipped}
+
+def generate_from_json(json_path: str, prev_state: dict = None, force: bool = False) -> dict:
+    """
+    Генерація зображень для груп з JSON файлу (див. generate_from_data)
+    
+    Args:
+        json_path: Шлях до JSON файлу
+        prev_state: Попередній стан (необов'язковий). Якщо None - завантажується автоматично
+        force: Перегенерувати всі групи незалежно від змін
+    """
+    data = DataProcessor.load_json_data(json_path)
+    return generate_from_data(data, prev_state, force=force, json_path=json_path)
 
 def load_latest_json(json_dir: Path):
     """Завантаження останнього JSON"""
@@ -628,16 +772,9 @@ def main():
     prev_state = load_previous_state()
     
     try:
-        # Завантажуємо поточні дані
-        processor = DataProcessor()
-        current_data = processor.load_json_data(str(path))
-        
-        # Генеруємо з порівнянням
+        # Генеруємо з порівнянням (поточний стан зберігається всередині)
         generate_from_json(str(path), prev_state)
         
-        # Зберігаємо поточний стан
-        save_current_state(current_data)
-        
         log("✅ Генерація завершена успішно")
     except Exception as e:
         log(f"❌ Помилка: {e}")
@@ -14,8 +14,19 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from PIL import Image, ImageDraw, ImageFont
 import os
+import shutil
 import sys
+from functools import lru_cache
 from telegram_notify import send_error, send_photo, send_message
+from schedule_bits import DaySchedule, Schedule, popcount
+import metrics
+import font_cache
+import render_templates
+from scaled_draw import ScaledDraw, target_scale, target_filename
+from svg_render import SvgCanvas
+from cell_painter import CellPainter
+from png_encoder import encoder_for
+import image_variants
 
 # --- Налаштування шляхів ---
 BASE = Path(__file__).parent.parent.absolute()
@@ -78,65 +89,55 @@ WORSE_OUTLINE = (220, 53, 69)  # Червоний - більше відключ
 BETTER_OUTLINE = (40, 167, 69)  # Зелений - менше відключень
 HIGHLIGHT_WIDTH = 3  # Товщина обводки
 
+# Стани в легенді та рядки про проєкт унизу зображення
+LEGEND_STATES = ("yes", "no", "maybe")
+INFO_LINES = (
+    "Цей проєкт створено волонтерами для вас. Разом ми можемо зробити інформацію доступною для всіх.",
+    "Помітили розбіжності між графіком та офіційним джерелом? Напишіть нам: https://t.me/OUTAGE_CHAT",
+    "Офіційна спільнота проєкту: https://t.me/svitlobot_api",
+)
+
 # --- Функції для роботи з попереднім станом ---
+def state_from_json(data: dict) -> dict:
+    """Стан {"data", "update"} з повного JSON графіка (або вже стан — як є)"""
+    if "fact" not in data:
+        return data
+    fact = data.get("fact", {})
+    return {"data": fact.get("data", {}), "update": fact.get("update")}
+
 def load_previous_state():
-    """Завантажує попередній стан графіків"""
+    """Завантажує попередній стан графіків (стан або копію повного JSON, див. save_current_state)"""
     if PREV_STATE_FILE.exists():
         try:
             with open(PREV_STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                return state_from_json(json.load(f))
         except Exception as e:
             log(f"⚠️ Помилка при завантаженні попереднього стану: {e}")
     return {}
 
-def save_current_state(data: dict):
-    """Зберігає поточний стан графіків"""
+def save_current_state(data: dict, source_path=None):
+    """
+    Зберігає поточний стан графіків. source_path — уже записаний JSON тих самих даних
+    (main): файл копіюється без повторного кодування JSON
+    """
     try:
-        fact = data.get("fact", {})
-        state_to_save = {
-            "data": fact.get("data", {}),
-            "update": fact.get("update"),
-            "timestamp": datetime.now(ZoneInfo("Europe/Kyiv")).isoformat()
-        }
-        with open(PREV_STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state_to_save, f, ensure_ascii=False, indent=2)
+        if source_path and os.path.exists(source_path):
+            shutil.copyfile(source_path, PREV_STATE_FILE)
+            state_to_save = state_from_json(data)
+        else:
+            fact = data.get("fact", {})
+            state_to_save = {
+                "data": fact.get("data", {}),
+                "update": fact.get("update"),
+                "timestamp": datetime.now(ZoneInfo("Europe/Kyiv")).isoformat()
+            }
+            with open(PREV_STATE_FILE, "w", encoding="utf-8") as f:
+                json.dump(state_to_save, f, ensure_ascii=False, indent=2)
         log(f"💾 Збережено поточний стан у {PREV_STATE_FILE}")
+        return state_to_save
     except Exception as e:
         log(f"⚠️ Помилка при збереженні поточного стану: {e}")
 
-def calculate_outage_severity(state: str) -> int:
-    """
-    Повертає числове значення "важкості" відключення
-    Більше число = гірший стан (більше відключень)
-    """
-    severity_map = {
-        "yes": 0,        # Світло є
-        "maybe": 2,      # Можливе відключення
-        "mfirst": 2,     # Можливе відключення перші 30 хв
-        "msecond": 2,    # Можливе відключення другі 30 хв
-        "first": 3,      # Відключення перші 30 хв
-        "second": 3,     # Відключення другі 30 хв
-        "no": 4          # Повне відключення
-    }
-    return severity_map.get(state, 0)
-
-def compare_states(old_state: str, new_state: str) -> str:
-    """
-    Порівнює два стани і повертає:
-    - "worse" якщо стан погіршився (більше відключень)
-    - "better" якщо стан покращився (менше відключень)
-    - "same" якщо стан не змінився
-    """
-    old_severity = calculate_outage_severity(old_state)
-    new_severity = calculate_outage_severity(new_state)
-    
-    if new_severity > old_severity:
-        return "worse"
-    elif new_severity < old_severity:
-        return "better"
-    else:
-        return "same"
-
 # --- Завантаження останнього JSON ---
 def load_latest_json(json_dir: Path):
     files = sorted(json_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
@@ -147,10 +148,11 @@ def load_latest_json(json_dir: Path):
     return data, files[0]
 
 # --- Вибір шрифту з fallback ---
+# Шрифти кешуються на весь час життя процесу (font_cache, спільний з gener_im_1_G)
 def pick_font(size, bold=False):
     try:
         path = TITLE_FONT_PATH if bold else FONT_PATH
-        return ImageFont.truetype(path, size=size)
+        return font_cache.font(path, size)
     except Exception:
         try:
             return ImageFont.load_default()
@@ -174,6 +176,16 @@ def cleanup_tomorrow_image(generated_files: list):
             log(f"🗑️ Видалено застаріле зображення: {tomorrow_file}")
         except Exception as e:
             log(f"⚠️ Помилка при видаленні {tomorrow_file}: {e}")
+    
+    # Варіанти (JPEG/WebP) і запис маніфесту — разом з основним файлом
+    if "gpv-all-tomorrow.png" not in generated_files:
+        try:
+            removed = image_variants.remove_variants("gpv-all-tomorrow.png")
+            image_variants.update_manifest(removed=["gpv-all-tomorrow.png"])
+            if removed:
+                log(f"🗑️ Видалено варіанти: {', '.join(removed)}")
+        except Exception as e:
+            log(f"⚠️ Помилка при видаленні варіантів gpv-all-tomorrow.png: {e}")
 
 # --- Визначення дат для генерації ---
 def get_dates_to_generate(fact_data: dict) -> list:
@@ -273,84 +285,161 @@ def get_description_for_state(state: str, preset: dict) -> str:
     }
     return time_type.get(state, descriptions.get(state, "Невідомий стан"))
 
-# --- Функція для малювання розділеної клітинки ---
-def draw_split_cell(draw, x0, y0, x1, y1, state, prev_state, next_state, change_type=None):
-    half = (x1 - x0) // 2
+# --- Клітинки таблиці (векторно, див. cell_painter) ---
+painter = CellPainter(CELL_W, CELL_H, AVAILABLE_COLOR, OUTAGE_COLOR, POSSIBLE_COLOR,
+                      GRID_COLOR, WORSE_OUTLINE, BETTER_OUTLINE, HIGHLIGHT_WIDTH)
+
+# --- Палітра PNG (базові кольори + згладжування тексту на фонах, див. png_encoder) ---
+png = encoder_for(
+    (BG, TABLE_BG, GRID_COLOR, TEXT_COLOR, OUTAGE_COLOR, POSSIBLE_COLOR, AVAILABLE_COLOR,
+     HEADER_BG, FOOTER_COLOR, WORSE_OUTLINE, BETTER_OUTLINE),
+    ((TEXT_COLOR, BG), (TEXT_COLOR, TABLE_BG), (TEXT_COLOR, HEADER_BG), (TEXT_COLOR, POSSIBLE_COLOR),
+     (FOOTER_COLOR, BG)),
+)
+
+# --- Статичний шар зображення (кешується в render_templates) ---
+def image_size(n_rows: int) -> tuple:
+    """Логічний розмір зображення (ширина, висота) для n_rows рядків"""
+    width = SPACING*2 + LEFT_COL_W + 24*CELL_W
+    height = SPACING*2 + HEADER_H + HOUR_ROW_H + n_rows*CELL_H + LEGEND_H + 40
+    return width, height
+
+def build_static_layer(n_rows: int, legend_texts: tuple, scale: int = 1) -> render_templates.Template:
+    """Статичний шар у вихідному масштабі scale з маскою ліній сітки (для кешу шаблонів)"""
+    width, height = image_size(n_rows)
+    img = Image.new("RGB", (width*scale, height*scale), BG)
+    grid_mask = Image.new("L", (width*scale, height*scale), 0)
+    legend_x = draw_static_layer(ScaledDraw(ImageDraw.Draw(img), scale),
+                                 ScaledDraw(ImageDraw.Draw(grid_mask), scale), n_rows, legend_texts)
+    return render_templates.Template(img, grid_mask, {"legend_x": legend_x})
+
+@lru_cache(maxsize=16)
+def build_svg_static_layer(n_rows: int, legend_texts: tuple) -> tuple:
+    """Статичний шар SVG і x легенди змін (кешується в пам'яті процесу)"""
+    svg = SvgCanvas(*image_size(n_rows), BG)
+    return svg, draw_static_layer(svg, svg.grid, n_rows, legend_texts)
+
+def draw_static_layer(draw, grid_draw, n_rows: int, legend_texts: tuple) -> float:
+    """
+    Малює все, що не залежить від даних: фон таблиці, рядок годин, «Черга», лінії сітки,
+    поля легенди та рядки про проєкт. Динамічні частини малює draw_day.
+    draw — ScaledDraw або svg_render.SvgCanvas (координати логічні); лінії сітки
+    повторюються на grid_draw. Повертає x, з якого продовжується легенда змін.
+    """
+    n_hours = 24
+    font_hour = pick_font(HOUR_FONT_SIZE)
+    font_small = pick_font(SMALL_FONT_SIZE)
+    font_legend = pick_font(LEGEND_FONT_SIZE)
 
-    if state == "yes":
-        left = right = AVAILABLE_COLOR
+    # --- Таблиця ---
+    table_x0 = SPACING
+    table_y0 = SPACING + HEADER_H + HOUR_ROW_H + HEADER_SPACING
+    table_x1 = table_x0 + LEFT_COL_W + n_hours*CELL_W
+    table_y1 = table_y0 + n_rows*CELL_H
+    draw.rectangle([table_x0, table_y0, table_x1, table_y1], fill=TABLE_BG, outline=GRID_COLOR)
+
+    # --- Рядок годин ---
+    hour_y0 = table_y0 - HOUR_ROW_H
+    hour_y1 = table_y0
+    for h in range(24):
+        x0 = table_x0 + LEFT_COL_W + h*CELL_W
+        x1 = x0 + CELL_W
+        draw.rectangle([x0, hour_y0, x1, hour_y1], fill=HEADER_BG, outline=GRID_COLOR)
+        start = f"{h:02d}"
+        middle = "-"
+        end = f"{(h+1)%24:02d}"
+        bbox1 = draw.textbbox((0,0), start, font=font_hour)
+        bbox2 = draw.textbbox((0,0), middle, font=font_hour)
+        bbox3 = draw.textbbox((0,0), end, font=font_hour)
+        h1 = bbox1[3]-bbox1[1]
+        h2 = bbox2[3]-bbox2[1]
+        h3 = bbox3[3]-bbox3[1]
+        total_h = h1 + HOUR_LINE_GAP + h2 + HOUR_LINE_GAP + h3
+        y_cursor = hour_y0 + (HOUR_ROW_H - total_h)/2
+        draw.text((x0 + (CELL_W - (bbox1[2]-bbox1[0]))/2, y_cursor), start, fill=TEXT_COLOR, font=font_hour)
+        y_cursor += h1 + HOUR_LINE_GAP
+        draw.text((x0 + (CELL_W - (bbox2[2]-bbox2[0]))/2, y_cursor), middle, fill=TEXT_COLOR, font=font_hour)
+        y_cursor += h2 + HOUR_LINE_GAP
+        draw.text((x0 + (CELL_W - (bbox3[2]-bbox3[0]))/2, y_cursor), end, fill=TEXT_COLOR, font=font_hour)
 
-    elif state == "no":
-        left = right = OUTAGE_COLOR
+    # --- Ліва колонка ---
+    left_label = "Черга"
+    draw.rectangle([table_x0, hour_y0, table_x0+LEFT_COL_W, hour_y1], fill=HEADER_BG, outline=GRID_COLOR)
+    bbox = draw.textbbox((0,0), left_label, font=font_hour)
+    draw.text((table_x0 + (LEFT_COL_W - (bbox[2]-bbox[0]))/2, hour_y0 + (HOUR_ROW_H - (bbox[3]-bbox[1]))/2),
+              left_label, fill=TEXT_COLOR, font=font_hour)
 
-    elif state == "maybe":
-        left = right = POSSIBLE_COLOR
+    # --- Лінії сітки (і маска для повторного накладання поверх клітинок) ---
+    for target, fill in ((draw, GRID_COLOR), (grid_draw, 255)):
+        for i in range(0, 25):
+            x = table_x0 + LEFT_COL_W + i*CELL_W
+            target.line([(x, table_y0 - HOUR_ROW_H), (x, table_y1)], fill=fill)
+        for r in range(n_rows+1):
+            y = table_y0 + r*CELL_H
+            target.line([(table_x0, y), (table_x1, y)], fill=fill)
 
-    elif state == "first":
-        left = OUTAGE_COLOR
-        right = OUTAGE_COLOR if next_state in ["no", "first","maybe"] else AVAILABLE_COLOR
+    # --- Легенда ---
+    legend_y_start = table_y1 + 15
+    box_size = 18
+    gap = 15
+    
+    x_cursor = SPACING
+    for state, description in zip(LEGEND_STATES, legend_texts):
+        color = get_color_for_state(state)
+        text_bbox = draw.textbbox((0,0), description, font=font_legend)
+        w_text = text_bbox[2] - text_bbox[0]
+        
+        draw.rectangle([x_cursor, legend_y_start, x_cursor + box_size, legend_y_start + box_size], 
+                      fill=color, outline=GRID_COLOR)
+        draw.text((x_cursor + box_size + 4, legend_y_start + (box_size - (text_bbox[3]-text_bbox[1]))/2), 
+                 description, fill=TEXT_COLOR, font=font_legend)
+        x_cursor += box_size + 4 + w_text + gap
 
-    elif state == "second":
-        right = OUTAGE_COLOR
-        left = OUTAGE_COLOR if prev_state in ["no", "second","maybe"] else AVAILABLE_COLOR
+    # --- Інформація про проєкт ---   
+    info_y_start = legend_y_start + box_size + 20
+    x_text = SPACING
+    line_gap = 6
 
-    elif state == "mfirst":
-        left = POSSIBLE_COLOR
-        if next_state is not None: # Перевіряємо, чи існує next_state
-            if next_state in ["no", "first"]:
-                right = OUTAGE_COLOR
-            else:
-                right = AVAILABLE_COLOR
-        else:
-            if prev_state in ["no", "first", "second","maybe", "mfirst","msecond"]:
-                right = AVAILABLE_COLOR
-            else:
-                right = OUTAGE_COLOR
+    for i, line in enumerate(INFO_LINES):
+        bbox_line = draw.textbbox((0, 0), line, font=font_small)
+        draw.text(
+            (x_text, info_y_start + i * (bbox_line[3] - bbox_line[1] + line_gap)),
+            line,
+            fill=FOOTER_COLOR,
+            font=font_small
+        )
 
-    elif state == "msecond":
-        right = POSSIBLE_COLOR
-        if prev_state is not None:
-            if prev_state in ["no", "second"]:
-                left = OUTAGE_COLOR
-            else:
-                left = AVAILABLE_COLOR
-        else:
-            if next_state in ["no", "first", "second","maybe", "mfirst","msecond"]:
-                left = AVAILABLE_COLOR
-            else:
-                left = OUTAGE_COLOR            
-
-    else:
-        left = right = AVAILABLE_COLOR
-
-    # --- Малювання ---
-    if left == right:
-        draw.rectangle([x0, y0, x1, y1], fill=left, outline=GRID_COLOR)
-    else:
-        draw.rectangle([x0, y0, x0 + half, y1], fill=left)
-        draw.rectangle([x0 + half, y0, x1, y1], fill=right)
-        draw.rectangle([x0, y0, x1, y1], outline=GRID_COLOR)
-    
-    # --- Підсвічування змін ---
-    if change_type == "worse":
-        # Червона обводка для погіршення
-        for i in range(HIGHLIGHT_WIDTH):
-            draw.rectangle([x0 + i, y0 + i, x1 - i, y1 - i], outline=WORSE_OUTLINE)
-    elif change_type == "better":
-        # Зелена обводка для покращення
-        for i in range(HIGHLIGHT_WIDTH):
-            draw.rectangle([x0 + i, y0 + i, x1 - i, y1 - i], outline=BETTER_OUTLINE)
+    return x_cursor
 
 # --- Основна функція рендерингу ---
-def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: str, date_str: str, prev_data: dict = None):
-    fact = data.get("fact", {})
-    preset = data.get("preset", {}) or {}
-    
-    day_map = fact["data"].get(day_key, {})
-    
+def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: str, date_str: str,
+                       prev_data: dict = None, target: str = None):
+    """
+    Малює зображення дня в масштабі цілі target (config.IMAGE_TARGETS) і зберігає його.
+    Для основної цілі поруч записуються варіанти image_variants і SVG (config.SVG_OUTPUT);
+    повертається запис маніфесту.
+    """
+    rows = day_rows(data, day_key, prev_data)
+    img = draw_single_date(data, day_key, date_str, target=target, rows=rows)
+    out_path = OUT_DIR / target_filename(output_filename, target)
+    if target:
+        png.write(img, out_path)
+        log(f"✅ Збережено {out_path}")
+        return {}
+    entry = image_variants.save_all(img, out_path, png, target_scale())
+    entry.update(image_variants.save_svg(lambda: svg_single_date(data, day_key, date_str, rows=rows), out_path))
+    log(f"✅ Збережено {out_path} (+ варіанти: {', '.join(n for n in entry if n != image_variants.MASTER) or '—'})")
+    return entry
+
+def day_rows(data: dict, day_key: str, prev_data: dict = None) -> tuple:
+    """
+    Рядки таблиці дня: (групи, погодинні карти станів, пари масок змін (worse, better)
+    відносно попереднього графіка prev_data)
+    """
+    day_map = data.get("fact", {})["data"].get(day_key, {})
+
     # Отримуємо попередні дані для порівняння
     prev_day_map = {}
-    has_changes = False
     if prev_data:
         prev_day_map = prev_data.get(day_key, {})
         log(f"📊 Порівнюю з попереднім графіком для {day_key}")
@@ -366,19 +455,80 @@ def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: s
             pass
         return (1, s)
     groups = sorted(list(day_map.keys()), key=sort_key)
-    rows = groups
+
+    # Лічильники змін
+    changes_worse = 0
+    changes_better = 0
+
+    row_hours = []
+    row_changes = []
+    for group in groups:
+        gp_hours = day_map.get(group, {}) if isinstance(day_map.get(group, {}), dict) else {}
+        prev_gp_hours = prev_day_map.get(group, {}) if isinstance(prev_day_map.get(group, {}), dict) else {}
+
+        # Порівняння з попереднім станом — погодинні бітові маски погіршень/покращень
+        worse_mask = better_mask = 0
+        if prev_gp_hours:
+            try:
+                worse_mask, better_mask = DaySchedule.from_hours_map(gp_hours).compare_to(
+                    DaySchedule.from_hours_map(prev_gp_hours))
+            except ValueError as e:
+                log(f"⚠️ {group}: {e} — зміни не підсвічуються")
+            changes_worse += popcount(worse_mask)
+            changes_better += popcount(better_mask)
+        row_hours.append(gp_hours)
+        row_changes.append((worse_mask, better_mask))
+
+    # Виводимо статистику змін
+    if changes_worse > 0 or changes_better > 0:
+        log(f"📈 Зміни в графіку: погіршень={changes_worse}, покращень={changes_better}")
+    return groups, row_hours, row_changes
+
+def draw_single_date(data: dict, day_key: str, date_str: str, prev_data: dict = None,
+                     target: str = None, rows: tuple = None) -> Image.Image:
+    """Зображення дня в пам'яті (RGB, масштаб цілі target); rows — готовий результат day_rows"""
+    scale = target_scale(target)
+
+    def canvas(n_rows, legend_texts):
+        # Статичний шар (рядок годин, «Черга», сітка, легенда, футер) — з кешу шаблонів
+        template = render_templates.get_template("full", render_templates.constants_of(sys.modules[__name__]),
+                                                 build_static_layer, code=sys.modules[__name__],
+                                                 n_rows=n_rows, legend_texts=legend_texts, scale=scale)
+        img = template.new_canvas()
+        return ScaledDraw(ImageDraw.Draw(img), scale, img), template, template.meta["legend_x"]
+
+    rows = rows or day_rows(data, day_key, prev_data)
+    return draw_day(data, date_str, rows, canvas).image
+
+def svg_single_date(data: dict, day_key: str, date_str: str, prev_data: dict = None,
+                    rows: tuple = None) -> SvgCanvas:
+    """Той самий макет дня у вигляді SVG (svg_render)"""
+    def canvas(n_rows, legend_texts):
+        static, legend_x = build_svg_static_layer(n_rows, legend_texts)
+        return static.copy(), None, legend_x
+
+    rows = rows or day_rows(data, day_key, prev_data)
+    return draw_day(data, date_str, rows, canvas)
+
+def draw_day(data: dict, date_str: str, rows: tuple, canvas):
+    """
+    Динамічна частина зображення дня: заголовок, назви груп, клітинки, легенда змін, дата публікації.
+    canvas(n_rows, legend_texts) повертає (draw, шаблон, x легенди змін) зі статичним шаром;
+    повертається draw.
+    """
+    fact = data.get("fact", {})
+    preset = data.get("preset", {}) or {}
+    groups, row_hours, row_changes = rows
 
     n_hours = 24
-    n_rows = max(1, len(rows))
-    width = SPACING*2 + LEFT_COL_W + n_hours*CELL_W
-    height = SPACING*2 + HEADER_H + HOUR_ROW_H + n_rows*CELL_H + LEGEND_H + 40
+    n_rows = max(1, len(groups))
+    width, _ = image_size(n_rows)
 
-    img = Image.new("RGB", (width, height), BG)
-    draw = ImageDraw.Draw(img)
+    legend_texts = tuple(get_description_for_state(state, preset) for state in LEGEND_STATES)
+    draw, template, legend_x = canvas(n_rows, legend_texts)
 
     # --- Шрифти ---
     font_title = pick_font(TITLE_FONT_SIZE, bold=True)
-    font_hour = pick_font(HOUR_FONT_SIZE)
     font_group = pick_font(GROUP_FONT_SIZE)
     font_small = pick_font(SMALL_FONT_SIZE)
     font_legend = pick_font(LEGEND_FONT_SIZE)
@@ -395,47 +545,10 @@ def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: s
     # --- Таблиця ---
     table_x0 = SPACING
     table_y0 = SPACING + HEADER_H + HOUR_ROW_H + HEADER_SPACING
-    table_x1 = table_x0 + LEFT_COL_W + n_hours*CELL_W
     table_y1 = table_y0 + n_rows*CELL_H
-    draw.rectangle([table_x0, table_y0, table_x1, table_y1], fill=TABLE_BG, outline=GRID_COLOR)
-
-    # --- Рядок годин ---
-    hour_y0 = table_y0 - HOUR_ROW_H
-    hour_y1 = table_y0
-    for h in range(24):
-        x0 = table_x0 + LEFT_COL_W + h*CELL_W
-        x1 = x0 + CELL_W
-        draw.rectangle([x0, hour_y0, x1, hour_y1], fill=HEADER_BG, outline=GRID_COLOR)
-        start = f"{h:02d}"
-        middle = "-"
-        end = f"{(h+1)%24:02d}"
-        bbox1 = draw.textbbox((0,0), start, font=font_hour)
-        bbox2 = draw.textbbox((0,0), middle, font=font_hour)
-        bbox3 = draw.textbbox((0,0), end, font=font_hour)
-        h1 = bbox1[3]-bbox1[1]
-        h2 = bbox2[3]-bbox2[1]
-        h3 = bbox3[3]-bbox3[1]
-        total_h = h1 + HOUR_LINE_GAP + h2 + HOUR_LINE_GAP + h3
-        y_cursor = hour_y0 + (HOUR_ROW_H - total_h)/2
-        draw.text((x0 + (CELL_W - (bbox1[2]-bbox1[0]))/2, y_cursor), start, fill=TEXT_COLOR, font=font_hour)
-        y_cursor += h1 + HOUR_LINE_GAP
-        draw.text((x0 + (CELL_W - (bbox2[2]-bbox2[0]))/2, y_cursor), middle, fill=TEXT_COLOR, font=font_hour)
-        y_cursor += h2 + HOUR_LINE_GAP
-        draw.text((x0 + (CELL_W - (bbox3[2]-bbox3[0]))/2, y_cursor), end, fill=TEXT_COLOR, font=font_hour)
-
-    # --- Ліва колонка ---
-    left_label = "Черга"
-    draw.rectangle([table_x0, hour_y0, table_x0+LEFT_COL_W, hour_y1], fill=HEADER_BG, outline=GRID_COLOR)
-    bbox = draw.textbbox((0,0), left_label, font=font_hour)
-    draw.text((table_x0 + (LEFT_COL_W - (bbox[2]-bbox[0]))/2, hour_y0 + (HOUR_ROW_H - (bbox[3]-bbox[1]))/2),
-              left_label, fill=TEXT_COLOR, font=font_hour)
-
-    # Лічильники змін
-    changes_worse = 0
-    changes_better = 0
 
     # --- Рядки груп і клітинки ---
-    for r, group in enumerate(rows):
+    for r, group in enumerate(groups):
         y0 = table_y0 + r*CELL_H
         y1 = y0 + CELL_H
         draw.rectangle([table_x0, y0, table_x0 + LEFT_COL_W, y1], outline=GRID_COLOR, fill=TABLE_BG)
@@ -443,70 +556,19 @@ def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: s
         bbox = draw.textbbox((0,0), label, font=font_group)
         draw.text((table_x0 + (LEFT_COL_W - (bbox[2]-bbox[0]))/2, y0 + (CELL_H - (bbox[3]-bbox[1]))/2),
                   label, fill=TEXT_COLOR, font=font_group)
+    draw.paint_cells(painter, table_x0 + LEFT_COL_W, table_y0, row_hours, row_changes)
 
-        gp_hours = day_map.get(group, {}) if isinstance(day_map.get(group, {}), dict) else {}
-        prev_gp_hours = prev_day_map.get(group, {}) if isinstance(prev_day_map.get(group, {}), dict) else {}
-        
-        for h in range(24):
-            h_key = str(h + 1)
-            state = gp_hours.get(h_key, "yes")
-            
-            prev_h_key = str(h) if h > 0 else None
-            next_h_key = str(h + 2) if h < 23 else None            
-            prev_state = gp_hours.get(prev_h_key) if prev_h_key else None
-            next_state = gp_hours.get(next_h_key) if next_h_key else None
-
-            # Порівняння з попереднім станом
-            change_type = None
-            if prev_gp_hours:
-                old_state = prev_gp_hours.get(h_key, "yes")
-                comparison = compare_states(old_state, state)
-                if comparison == "worse":
-                    change_type = "worse"
-                    changes_worse += 1
-                elif comparison == "better":
-                    change_type = "better"
-                    changes_better += 1
-            
-            x0h = table_x0 + LEFT_COL_W + h*CELL_W
-            x1h = x0h + CELL_W
-            
-            draw_split_cell(draw, x0h, y0, x1h, y1, state, prev_state, next_state, change_type)
-
-    # Виводимо статистику змін
-    if changes_worse > 0 or changes_better > 0:
-        log(f"📈 Зміни в графіку: погіршень={changes_worse}, покращень={changes_better}")
-        has_changes = True
-
-    # --- Лінії сітки ---
-    for i in range(0, 25):
-        x = table_x0 + LEFT_COL_W + i*CELL_W
-        draw.line([(x, table_y0 - HOUR_ROW_H), (x, table_y1)], fill=GRID_COLOR)
-    for r in range(n_rows+1):
-        y = table_y0 + r*CELL_H
-        draw.line([(table_x0, y), (table_x1, y)], fill=GRID_COLOR)
+    # --- Лінії сітки (поверх клітинок) ---
+    draw.apply_grid(template, GRID_COLOR)
 
     # --- Легенда ---
-    legend_states = ["yes", "no", "maybe"]
     legend_y_start = table_y1 + 15
     box_size = 18
     gap = 15
-    
-    x_cursor = SPACING
-    for state in legend_states:
-        color = get_color_for_state(state)
-        description = get_description_for_state(state, preset)
-        text_bbox = draw.textbbox((0,0), description, font=font_legend)
-        w_text = text_bbox[2] - text_bbox[0]
-        
-        draw.rectangle([x_cursor, legend_y_start, x_cursor + box_size, legend_y_start + box_size], 
-                      fill=color, outline=GRID_COLOR)
-        draw.text((x_cursor + box_size + 4, legend_y_start + (box_size - (text_bbox[3]-text_bbox[1]))/2), 
-                 description, fill=TEXT_COLOR, font=font_legend)
-        x_cursor += box_size + 4 + w_text + gap
+    x_cursor = legend_x
     
     # Додаємо легенду для змін якщо є зміни
-    if has_changes:
+    if any(worse_mask or better_mask for worse_mask, better_mask in row_changes):
         x_cursor += gap * 2
         
         # Червона рамка - погіршення
@@ -534,43 +596,17 @@ def render_single_date(data: dict, day_ts: int, day_key: str, output_filename: s
     pub_x = width - w_pub - SPACING
     pub_y = legend_y_start + box_size + 20
     draw.text((pub_x, pub_y), pub_label, fill=FOOTER_COLOR, font=font_small)
-
-    # --- Інформація про проєкт ---   
-    info_y_start = legend_y_start + box_size + 20
-    x_text = SPACING
-    line_gap = 6
-
-    
-    info_lines = [
-        "Цей проєкт створено волонтерами для вас. Разом ми можемо зробити інформацію доступною для всіх.",
-        "Помітили розбіжності між графіком та офіційним джерелом? Напишіть нам: https://t.me/OUTAGE_CHAT",
-        "Офіційна спільнота проєкту: https://t.me/svitlobot_api"        
-    ]
-
-
-    for i, line in enumerate(info_lines):
-        bbox_line = draw.textbbox((0, 0), line, font=font_small)
-        draw.text(
-            (x_text, info_y_start + i * (bbox_line[3] - bbox_line[1] + line_gap)),
-            line,
-            fill=FOOTER_COLOR,
-            font=font_small
-        )
-
-    out_path = OUT_DIR / output_filename
-    scale = 3
-    img_resized = img.resize((img.width*scale, img.height*scale), resample=Image.LANCZOS)
-    img_resized.save(out_path, optimize=True)
-    log(f"✅ Збережено {out_path}")
+    return draw
 
 # --- Головна функція рендерингу ---
-def render(data: dict, json_path: Path):
+def render(data: dict, json_path: Path = None, prev_state: dict = None):
     fact = data.get("fact", {})
     if "today" not in fact or "data" not in fact:
         raise ValueError("JSON не містить ключі 'fact.today' або 'fact.data'")
 
     # Завантажуємо попередній стан для порівняння
-    prev_state = load_previous_state()
+    if prev_state is None:
+        prev_state = load_previous_state()
     prev_fact_data = prev_state.get("data", {})
 
     # Отримуємо всі дати для генерації
@@ -578,21 +614,34 @@ def render(data: dict, json_path: Path):
     
     log(f"📅 Буде згенеровано {len(dates_to_generate)} зображень(я)")
     
-    # Список згенерованих файлів
+    # Список згенерованих файлів і їхні записи маніфесту
     generated_files = []
+    outputs = {}
     
     # Генеруємо зображення для кожної дати
     for day_ts, day_key, filename, date_str in dates_to_generate:
         log(f"🖼️ Генерую {filename} для дати {date_str}")
-        render_single_date(data, day_ts, day_key, filename, date_str, prev_fact_data)
+        with metrics.timer("toe_render_seconds", image=filename):
+            outputs[filename] = render_single_date(data, day_ts, day_key, filename, date_str, prev_fact_data)
         generated_files.append(filename)
     
     # Видаляємо tomorrow якщо його не було згенеровано
     cleanup_tomorrow_image(generated_files)
+    image_variants.update_manifest(outputs)
+    log(f"🔤 Кеш шрифтів і тексту: {font_cache.describe(font_cache.report())}")
     
     # Зберігаємо поточний стан для наступного порівняння
     save_current_state(data)
 
+def render_from_data(data, prev_state: dict = None):
+    """
+    Генерація з уже побудованого графіка (dict або Schedule) без читання JSON з диска.
+    prev_state — попередній стан, якщо він уже є в пам'яті.
+    """
+    data = Schedule.wrap(data).data
+    log("▶️ Запускаю генерацію зображень з даних у пам'яті")
+    render(data, prev_state=prev_state)
+
 def generate_from_json(json_path):
     path = Path(json_path)
     if not path.exists():
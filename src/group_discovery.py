@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Пошук мінімального набору адрес (cityId, streetId) для GROUP_KEYS.
+Один запит a_gpv_g може повернути кілька черг для однієї вулиці
+(див. Test_groups.py, напр. (1032, 9982): ['4.1', '5.1']).
+Скрипт опитує адреси-кандидати, запам'ятовує які черги повертає кожна відповідь,
+обчислює мінімальне покриття всіх 12 черг і зберігає його як активну таблицю ключів
+(out/group_keys.json), яку використовує ToeOutageParser.
+
+Запуск:
+    python3 src/group_discovery.py
+    python3 src/group_discovery.py --base-url http://127.0.0.1:8080/api --candidates candidates.json
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import combinations
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from toe_api_parser import ToeOutageParser, ALL_GROUPS, ACTIVE_GROUP_KEYS_FILE
+
+# Адреси, відомі з Test_groups.py (можуть повертати кілька черг)
+EXTRA_CANDIDATES = [
+    (514,   31361),
+    (604,   6050),
+    (919,   8835),
+    (1032,  9982),
+    (1032,  9996),
+    (1032,  9999),
+    (1032,  10021),
+    (21346, 35118),
+    (21547, 36889),
+]
+
+# Межа повного перебору; більші набори кандидатів покриваються жадібно
+EXACT_SEARCH_MAX_CANDIDATES = 40
+
+
+def log(message):
+    ToeOutageParser.log(f"[discovery] {message}")
+
+
+def default_candidates() -> list:
+    """Кандидати: поточні GROUP_KEYS + адреси з Test_groups.py"""
+    candidates = list(ToeOutageParser.GROUP_KEYS.keys())
+    for addr in EXTRA_CANDIDATES:
+        if addr not in candidates:
+            candidates.append(addr)
+    return candidates
+
+
+def load_candidates(path: str) -> list:
+    """Читає кандидатів з JSON: [[cityId, streetId], ...]"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [tuple(int(v) for v in pair) for pair in json.load(f)]
+
+
+def probe(candidates: list, before: str, after: str, base_url: str = None) -> dict:
+    """
+    Опитує кожну адресу та повертає {(cityId, streetId): set(черг)}.
+    Адреси з помилкою або порожньою відповіддю пропускаються.
+    Запити йдуть повз кеш відповідей циклу (RESPONSE_CACHE): кандидати в ньому не потрібні.
+    group[] запиту — відома черга адреси або, для нових кандидатів, заповнювач
+    (див. ToeOutageParser.fetch_group): черги беруться з відповіді, а не з запиту.
+    """
+    hint = ToeOutageParser.GROUP_KEYS
+    coverage = {}
+    now_ts = int(time.time() * 1000)
+    for city_id, street_id in candidates:
+        try:
+            decoded = ToeOutageParser.fetch_group(
+                city_id, street_id, hint.get((city_id, street_id), []),
+                before, after, now_ts, base_url=base_url, use_cache=False)
+        except Exception as e:
+            log(f"❌ Помилка опитування {city_id}/{street_id}: {e}")
+            continue
+        groups = {name.replace("GPV", "") for day in decoded.values() for name in day}
+        groups &= set(ALL_GROUPS)
+        if groups:
+            coverage[(city_id, street_id)] = groups
+            log(f"📍 {city_id}/{street_id}: {sorted(groups)}")
+        else:
+            log(f"⚠️ {city_id}/{street_id}: черг не знайдено")
+    return coverage
+
+
+def greedy_cover(coverage: dict, universe: set) -> list:
+    """Жадібне покриття: щоразу береться адреса з найбільшою кількістю непокритих черг"""
+    remaining = set(universe)
+    chosen = []
+    while remaining:
+        best = max(coverage, key=lambda a: len(coverage[a] & remaining), default=None)
+        if best is None or not coverage[best] & remaining:
+            break
+        chosen.append(best)
+        remaining -= coverage[best]
+    return chosen
+
+
+def minimal_cover(coverage: dict, universe: set) -> list:
+    """
+    Мінімальна за кількістю адрес множина, що покриває universe.
+    Повний перебір для невеликої кількості кандидатів, інакше — жадібний результат.
+    Якщо повного покриття не існує, повертає покриття досяжних черг.
+    """
+    reachable = universe & set().union(*coverage.values()) if coverage else set()
+    best = greedy_cover(coverage, reachable)
+    # Адреси, що не дають нічого з досяжного, не розглядаємо
+    useful = [a for a in coverage if coverage[a] & reachable]
+    if len(useful) > EXACT_SEARCH_MAX_CANDIDATES:
+        return best
+    for size in range(1, len(best)):
+        for combo in combinations(useful, size):
+            if reachable <= set().union(*(coverage[a] for a in combo)):
+                return list(combo)
+    return best
+
+
+def build_group_keys(cover: list, coverage: dict) -> dict:
+    """
+    Таблиця {(cityId, streetId): [черги]}. Кожна черга закріплюється за однією адресою,
+    щоб у лозі та кеші не було дублів.
+    """
+    assigned = set()
+    keys = {}
+    for addr in cover:
+        groups = sorted(coverage[addr] - assigned, key=lambda g: [int(p) for p in g.split(".")])
+        assigned |= coverage[addr]
+        keys[addr] = groups
+    return keys
+
+
+def save_group_keys(keys: dict, path: Path = ACTIVE_GROUP_KEYS_FILE):
+    payload = {
+        "generated": datetime.now(ZoneInfo("Europe/Kyiv")).isoformat(),
+        "keys": [
+            {"cityId": city_id, "streetId": street_id, "groups": groups}
+            for (city_id, street_id), groups in keys.items()
+        ],
+    }
+    os.makedirs(Path(path).parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    log(f"💾 Активну таблицю ключів збережено у {path}")
+
+
+def discover(candidates: list = None, base_url: str = None, save: bool = True,
+             path: Path = ACTIVE_GROUP_KEYS_FILE) -> dict:
+    """Повний цикл: опитування → мінімальне покриття → збереження. Повертає нову таблицю ключів"""
+    candidates = candidates or default_candidates()
+    now = datetime.now(ZoneInfo("Europe/Kyiv"))
+    after = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+    before = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+
+    log(f"🔎 Опитування {len(candidates)} адрес-кандидатів")
+    coverage = probe(candidates, before, after, base_url=base_url)
+    universe = set(ALL_GROUPS)
+    cover = minimal_cover(coverage, universe)
+    keys = build_group_keys(cover, coverage)
+
+    covered = set().union(*keys.values()) if keys else set()
+    missing = universe - covered
+    log(f"✅ Мінімальне покриття: {len(keys)} запитів замість {len(ToeOutageParser.GROUP_KEYS)}")
+    for (city_id, street_id), groups in keys.items():
+        log(f"   {city_id}/{street_id}: {groups}")
+
+    if missing:
+        log(f"⚠️ Не покрито черги: {', '.join(sorted(missing))} — таблицю не збережено")
+        return keys
+    if save:
+        save_group_keys(keys, path)
+    return keys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пошук мінімального набору адрес для GROUP_KEYS")
+    parser.add_argument("--base-url", help="Базовий URL API (напр. локальний тестовий сервер)")
+    parser.add_argument("--candidates", help="JSON-файл з парами [cityId, streetId]")
+    parser.add_argument("--output", default=str(ACTIVE_GROUP_KEYS_FILE), help="Куди зберегти таблицю ключів")
+    parser.add_argument("--dry-run", action="store_true", help="Не зберігати результат")
+    args = parser.parse_args()
+
+    cands = load_candidates(args.candidates) if args.candidates else None
+    discover(cands, base_url=args.base_url, save=not args.dry_run, path=Path(args.output))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Спільний HTTP-клієнт для всіх мережевих модулів (toe_api_parser, downloader, telegram_notify).
+Одна requests.Session на процес: пул з'єднань з keep-alive, один SSL-контекст
+та обмеження кількості з'єднань на хост. Теплий цикл повторно використовує сокети
+замість нових TCP/TLS рукостискань.
+"""
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+# --- Налаштування пулу ---
+POOL_HOSTS = 8            # Кількість хостів, для яких тримаються пули
+POOL_MAXSIZE_PER_HOST = 4 # Максимум з'єднань у пулі одного хоста
+POOL_BLOCK = False        # True — чекати вільне з'єднання замість створення зайвого
+
+# Один SSL-контекст на процес
+SSL_CONTEXT = ssl.create_default_context()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter, що використовує спільний SSL_CONTEXT для всіх з'єднань"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = SSL_CONTEXT
+        return super().init_poolmanager(*args, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """Повертає спільну сесію (створює при першому виклику)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = _PooledAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=POOL_MAXSIZE_PER_HOST,
+                    pool_block=POOL_BLOCK,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Connection"] = "keep-alive"
+                _session = session
+    return _session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Запит через спільну сесію з метриками (тривалість, статус, байти) по хосту"""
+    host = urlsplit(url).netloc
+    started = time.perf_counter()
+    try:
+        resp = get_session().request(method, url, **kwargs)
+    except Exception as e:
+        metrics.inc("toe_http_errors_total", host=host, method=method, error=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("toe_http_request_seconds", time.perf_counter() - started, host=host, method=method)
+    metrics.inc("toe_http_requests_total", host=host, method=method, status=resp.status_code)
+    metrics.inc("toe_http_response_bytes_total", len(resp.content), host=host, method=method)
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def close():
+    """Закриває всі з'єднання пулу (наприклад, при завершенні процесу)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Варіанти зображень графіків для різних споживачів.
+
+Рендерер малює зображення один раз у пам'яті (масштаб IMAGE_TARGET). З нього паралельно
+(потоки — Pillow відпускає GIL під час кодування) записуються:
+- основний PNG з палітрою проєкту (архів, GitHub) — як і раніше;
+- варіанти з config.IMAGE_VARIANTS: компактний JPEG для Telegram, WebP для вебу, мініатюра;
+- SVG-версія того самого макета (config.SVG_OUTPUT, див. svg_render) для вебу.
+
+Зменшені варіанти отримуються з того самого зображення (LANCZOS), без повторного малювання.
+Маніфест out/images/manifest.json містить для кожного зображення всі його файли з розміром,
+габаритами та SHA-256; його оновлює батьківський процес (render_pool) після рендерингу.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from PIL import Image, features
+
+from config import IMAGE_VARIANTS, TELEGRAM_VARIANT, SVG_OUTPUT
+
+BASE = Path(__file__).parent.parent.absolute()
+OUT_DIR = BASE / "out/images"
+MANIFEST_FILE = OUT_DIR / "manifest.json"
+
+# Розширення файлів і модулі Pillow, потрібні для формату
+FORMAT_EXTENSIONS = {"PNG": "png", "JPEG": "jpg", "WEBP": "webp"}
+FORMAT_FEATURES = {"JPEG": "jpg", "WEBP": "webp"}
+
+MASTER = "png"  # Назва основного файлу в маніфесті
+SVG = "svg"     # Назва SVG-версії в маніфесті
+
+_manifest_lock = threading.Lock()
+
+
+def variant_filename(filename: str, name: str, fmt: str) -> str:
+    """gpv-all-today.png + telegram/JPEG -> gpv-all-today-telegram.jpg"""
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}-{name}.{FORMAT_EXTENSIONS.get(fmt.upper(), fmt.lower())}"
+
+
+def _describe(filename: str, fmt: str, size: tuple, payload: bytes, seconds: float) -> dict:
+    return {
+        "file": filename,
+        "format": fmt,
+        "width": size[0],
+        "height": size[1],
+        "bytes": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "seconds": round(seconds, 4),
+    }
+
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _encode_variant(img: Image.Image, scale: float, spec: dict, encoder) -> tuple:
+    """Зменшує (за потреби) і кодує один варіант; повертає (розмір, байти)"""
+    spec = dict(spec)
+    fmt = spec.pop("format").upper()
+    target_scale = spec.pop("scale", scale)
+    ratio = min(1.0, target_scale / scale)
+    if ratio < 1.0:
+        size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+        img = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    if fmt == "PNG":
+        return img.size, encoder.encode(img, spec.get("compress_level"))
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **spec)
+    return img.size, buf.getvalue()
+
+
+def save_all(img: Image.Image, out_path: Path, encoder, scale: float, variants: dict = None) -> dict:
+    """
+    Записує основний PNG (через encoder з png_encoder) і всі варіанти поруч з ним.
+
+    Args:
+        img: зображення в пам'яті (RGB)
+        out_path: шлях основного PNG
+        encoder: PaletteEncoder рендерера (основний PNG і PNG-варіанти)
+        scale: масштаб img відносно логічного макета
+        variants: специфікації варіантів (None — config.IMAGE_VARIANTS)
+
+    Returns:
+        Запис маніфесту: {"png": {...}, "<варіант>": {...}}
+    """
+    out_path = Path(out_path)
+    variants = IMAGE_VARIANTS if variants is None else variants
+
+    def master():
+        started = time.perf_counter()
+        payload = encoder.encode(img)
+        _write_atomic(out_path, payload)
+        return MASTER, _describe(out_path.name, "PNG", img.size, payload, time.perf_counter() - started)
+
+    def variant(name, spec):
+        started = time.perf_counter()
+        fmt = spec["format"].upper()
+        feature = FORMAT_FEATURES.get(fmt)
+        if feature and not features.check(feature):
+            return name, None  # Pillow зібрано без підтримки формату
+        size, payload = _encode_variant(img, scale, spec, encoder)
+        filename = variant_filename(out_path.name, name, fmt)
+        _write_atomic(out_path.with_name(filename), payload)
+        return name, _describe(filename, fmt, size, payload, time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=1 + len(variants)) as pool:
+        futures = [pool.submit(master)] + [pool.submit(variant, name, spec) for name, spec in variants.items()]
+        entry = dict(f.result() for f in futures)
+    return {name: info for name, info in entry.items() if info is not None}
+
+
+def svg_filename(filename: str) -> str:
+    """gpv-all-today.png -> gpv-all-today.svg"""
+    return filename.rsplit(".", 1)[0] + ".svg"
+
+
+def save_svg(render, out_path: Path) -> dict:
+    """
+    Малює (render() -> svg_render.SvgCanvas) і записує SVG поруч з основним PNG.
+    Повертає {"svg": запис маніфесту} або {}, якщо SVG вимкнено (config.SVG_OUTPUT).
+    """
+    if not SVG_OUTPUT:
+        return {}
+    out_path = Path(out_path)
+    started = time.perf_counter()
+    canvas = render()
+    payload = canvas.to_svg().encode("utf-8")
+    filename = svg_filename(out_path.name)
+    _write_atomic(out_path.with_name(filename), payload)
+    return {SVG: _describe(filename, "SVG", canvas.size, payload, time.perf_counter() - started)}
+
+
+# --- Маніфест ---
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("images"), dict):
+            return manifest
+    except Exception:
+        pass
+    return {"images": {}}
+
+
+def update_manifest(entries: dict = None, removed: list = ()) -> dict:
+    """
+    Додає/замінює записи зображень (ім'я основного PNG -> запис save_all) і видаляє removed.
+    Викликається з одного (батьківського) процесу.
+    """
+    with _manifest_lock:
+        manifest = load_manifest()
+        images = manifest["images"]
+        for filename in removed:
+            images.pop(filename, None)
+        images.update(entries or {})
+        manifest["images"] = dict(sorted(images.items()))
+        manifest["updated"] = datetime.now(ZoneInfo("Europe/Kyiv")).isoformat(timespec="seconds")
+
+        os.makedirs(OUT_DIR, exist_ok=True)
+        payload = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        _write_atomic(MANIFEST_FILE, payload)
+    return manifest
+
+
+def remove_variants(filename: str) -> list:
+    """Видаляє файли варіантів зображення filename (основний PNG не чіпає); повертає видалені"""
+    names = {variant_filename(filename, name, spec["format"]) for name, spec in IMAGE_VARIANTS.items()}
+    names.add(svg_filename(filename))
+    entry = load_manifest()["images"].get(filename, {})
+    names.update(info["file"] for name, info in entry.items() if name != MASTER and "file" in info)
+    removed = []
+    for name in sorted(names):
+        path = OUT_DIR / name
+        try:
+            path.unlink()
+            removed.append(name)
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def telegram_path(filename: str) -> Path:
+    """Файл для відправки в Telegram: варіант TELEGRAM_VARIANT з маніфесту або сам PNG"""
+    info = load_manifest()["images"].get(filename, {}).get(TELEGRAM_VARIANT)
+    if info:
+        path = OUT_DIR / info["file"]
+        if path.exists():
+            return path
+    return OUT_DIR / filename
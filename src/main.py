@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 import os
 import json
+import time
+import signal
+import argparse
+import threading
 from pathlib import Path
 from zoneinfo import ZoneInfo
 from datetime import datetime, timedelta
 
 # Твої модулі
 from telegram_notify import send_error, send_photo
-import gener_im_full
-import gener_im_1_G
+import render_pool
+import image_variants
 from utils import clean_log, clean_old_files
 from toe_api_parser import ToeOutageParser
+from schedule_bits import Schedule, fold_packed, pack_fact_data, unpack_fact_data
+from config import DAEMON_INTERVAL, POLL_ADAPTIVE
+from poll_scheduler import AdaptivePollScheduler
+import http_client
+import metrics
 
 # Налаштування
 json_path = "out/Ternopiloblenerho.json"
@@ -18,6 +27,16 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 FULL_LOG_FILE = LOG_DIR / "full_log.log"
 
+# Останній збережений графік у бітовому вигляді, усі 48 півгодин
+# (щоб не перечитувати JSON у тому ж процесі)
+_last_packed = None
+
+# Подія зупинки для режиму демона (SIGTERM / SIGINT)
+_stop_event = threading.Event()
+
+# Історія змін графіка для адаптивного опитування
+scheduler = AdaptivePollScheduler()
+
 def log(message):
     timestamp = datetime.now(ZoneInfo("Europe/Kyiv")).strftime("%Y-%m-%d %H:%M:%S")
     line = f"{timestamp} [main] {message}"
@@ -39,6 +58,7 @@ def sort_full_data(raw_data_map):
     return final_data
 
 def get_api_data_and_save():
+    global _last_packed
     log("🌐 Запит даних з API...")
     now = datetime.now(ZoneInfo("Europe/Kyiv"))
     log("⏳ Формування часових меж...")
@@ -47,25 +67,34 @@ def get_api_data_and_save():
     before = ((now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat())
     log(f"⏳ Before: {before}")
     
-    raw_data_map = ToeOutageParser.fetch_all_groups(before, after)
+    with metrics.timer("toe_stage_seconds", stage="api_fetch"):
+        raw_data_map = ToeOutageParser.fetch_all_groups(before, after)
     
     if not raw_data_map:
         log("❌ Даних не отримано. Оновлення скасовано.")
+        scheduler.record_poll(changed=False, requests=ToeOutageParser.LAST_REQUEST_COUNT)
         return None, False
 
-    data_map = sort_full_data(raw_data_map)
+    with metrics.timer("toe_stage_seconds", stage="sort_full_data"):
+        new_packed = sort_full_data(raw_data_map)
+        # Погодинний JSON — єдиний крок, де змішані пари півгодин згортаються
+        data_map = unpack_fact_data(new_packed)
 
     # --- ПЕРЕВІРКА НА ЗМІНИ ---
+    # Порівнюємо суто вміст графіків (data) у вигляді бітових масок: з попереднім циклом
+    # цього процесу — всі 48 півгодин, зі старим файлом — після того ж згортання, що й у JSON
     has_changes = True
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                old_json = json.load(f)
-                # Порівнюємо суто вміст графіків (data)
-                if old_json.get("fact", {}).get("data") == data_map:
-                    has_changes = False
-        except Exception as e:
-            log(f"⚠️ Помилка читання старого файлу: {e}")
+    with metrics.timer("toe_stage_seconds", stage="compare"):
+        if _last_packed is not None:
+            has_changes = _last_packed != new_packed
+        elif os.path.exists(json_path):
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    old_json = json.load(f)
+                old_packed = pack_fact_data(old_json.get("fact", {}).get("data", {}))
+                has_changes = old_packed != fold_packed(new_packed)
+            except Exception as e:
+                log(f"⚠️ Помилка читання старого файлу: {e}")
 
     full_json = {
         "regionId": "Ternopil",
@@ -91,11 +120,14 @@ def get_api_data_and_save():
     }
 
     os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(full_json, f, ensure_ascii=False, indent=2)
+    with metrics.timer("toe_stage_seconds", stage="json_write"):
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(full_json, f, ensure_ascii=False, indent=2)
+    _last_packed = new_packed
+    scheduler.record_poll(changed=has_changes, requests=ToeOutageParser.LAST_REQUEST_COUNT)
     
     log(f"✅ JSON оновлено. Зміни виявлено: {has_changes}")
-    return full_json, has_changes
+    return Schedule(full_json, new_packed), has_changes
 
 def send_tg_updates(json_data):
     try:
@@ -104,11 +136,13 @@ def send_tg_updates(json_data):
         has_tomorrow = any(int(ts) > today_ts for ts in ts_list)
         
         if has_tomorrow:
-            photo = "out/images/gpv-all-tomorrow.png"
+            image = "gpv-all-tomorrow.png"
             caption = "🔄 <b>Тернопільобленерго</b>\nГрафік на завтра\n#Тернопільобленерго"
         else:
-            photo = "out/images/gpv-all-today.png"
+            image = "gpv-all-today.png"
             caption = "🔄 <b>Тернопільобленерго</b>\nГрафік на сьогодні\n#Тернопільобленерго"
+        # Компактний варіант для Telegram (image_variants), якщо він є; інакше PNG
+        photo = str(image_variants.telegram_path(image))
 
         if os.path.exists(photo):
             send_photo(photo, caption)
@@ -118,32 +152,98 @@ def send_tg_updates(json_data):
 
 def main():
     log("=== ПОЧАТОК ЦИКЛУ ===")
+    cycle_started = time.perf_counter()
     clean_old_files("DEBUG_IMAGES", 3, [".png"])
     clean_log(FULL_LOG_FILE, days=2)
 
-    data, has_changes = get_api_data_and_save()
-    
-    if data and has_changes:
-        try:
-            log("🎨 Дані змінилися! Генерація зображень...")
-            gener_im_full.main()
-            gener_im_1_G.main()
-            
-            log("☁️ Завантаження на GitHub...")
+    try:
+        with metrics.timer("toe_stage_seconds", stage="get_api_data_and_save"):
+            schedule, has_changes = get_api_data_and_save()
+
+        if schedule and has_changes:
+            metrics.inc("toe_cycles_total", result="changed")
             try:
-                import upload_to_github
-                upload_to_github.run_upload()
-            except ImportError:
-                log("⚠️ Скрипт upload_to_github не знайдено")
-
-            send_tg_updates(data)
-        except Exception as e:
-            log(f"❌ Критична помилка генерації: {e}")
-            send_error(f"Помилка в пайплайні: {e}")
-    elif data and not has_changes:
-        log("😴 Графік не змінився. Генерацію та відправку пропущено.")
+                log("🎨 Дані змінилися! Генерація зображень...")
+                with metrics.timer("toe_stage_seconds", stage="render"):
+                    report = render_pool.render_all(schedule, json_path)
+                if report["errors"]:
+                    failed = ", ".join(f"{r['name']} ({r['error']})" for r in report["errors"])
+                    raise RuntimeError(f"Не вдалося згенерувати зображення: {failed}")
+                
+                log("☁️ Завантаження на GitHub...")
+                try:
+                    import upload_to_github
+                    with metrics.timer("toe_stage_seconds", stage="upload"):
+                        upload_to_github.run_upload()
+                except ImportError:
+                    log("⚠️ Скрипт upload_to_github не знайдено")
+
+                with metrics.timer("toe_stage_seconds", stage="telegram"):
+                    send_tg_updates(schedule.data)
+            except Exception as e:
+                metrics.inc("toe_pipeline_errors_total")
+                log(f"❌ Критична помилка генерації: {e}")
+                send_error(f"Помилка в пайплайні: {e}")
+        elif schedule and not has_changes:
+            metrics.inc("toe_cycles_total", result="unchanged")
+            log("😴 Графік не змінився. Генерацію та відправку пропущено.")
+        else:
+            metrics.inc("toe_cycles_total", result="no_data")
+    finally:
+        metrics.observe("toe_cycle_seconds", time.perf_counter() - cycle_started)
+        metrics.flush(cycle=datetime.now(ZoneInfo("Europe/Kyiv")).isoformat())
 
     log("=== ЗАВЕРШЕНО ===")
 
+def _handle_stop_signal(signum, frame):
+    log(f"🛑 Отримано сигнал {signal.Signals(signum).name} — завершую після поточного циклу")
+    _stop_event.set()
+
+def run_daemon(interval: int = None):
+    """
+    Режим демона: один «теплий» процес виконує цикли main() кожні interval секунд.
+    Якщо interval не задано і POLL_ADAPTIVE увімкнено — інтервал визначає
+    AdaptivePollScheduler за історією змін графіка.
+    Імпорти, шрифти та HTTP-з'єднання лишаються в пам'яті між циклами,
+    помилка одного циклу не зупиняє процес. SIGTERM/SIGINT — коректне завершення
+    (для systemd Type=simple).
+    """
+    signal.signal(signal.SIGTERM, _handle_stop_signal)
+    signal.signal(signal.SIGINT, _handle_stop_signal)
+    adaptive = interval is None and POLL_ADAPTIVE
+    if interval is None:
+        interval = DAEMON_INTERVAL
+    log(f"🟢 Режим демона запущено. Інтервал: {'адаптивний' if adaptive else f'{interval} с'}")
+
+    while not _stop_event.is_set():
+        started = time.monotonic()
+        try:
+            main()
+        except (Exception, SystemExit) as e:
+            # SystemExit можуть кидати генератори зображень — не зупиняємо демон
+            log(f"❌ Помилка циклу: {e!r}")
+            try:
+                send_error(f"Помилка циклу демона: {e!r}")
+            except Exception:
+                pass
+        if adaptive:
+            interval = scheduler.next_interval(requests_per_poll=max(1, ToeOutageParser.LAST_REQUEST_COUNT))
+            log(f"⏱ Наступне опитування через {interval} с")
+        elapsed = time.monotonic() - started
+        _stop_event.wait(max(0.0, interval - elapsed))
+
+    render_pool.shutdown()
+    http_client.close()
+    log("🔴 Режим демона зупинено")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="TOE_PARSER")
+    parser.add_argument("--daemon", action="store_true", help="Працювати постійно, виконуючи цикли за розкладом")
+    parser.add_argument("--interval", type=int, default=None,
+                        help="Фіксований інтервал між циклами (сек); без нього — адаптивний або DAEMON_INTERVAL")
+    args = parser.parse_args()
+
+    if args.daemon:
+        run_daemon(args.interval)
+    else:
+        main()
\ No newline at end of file
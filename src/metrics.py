@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Легкий шар метрик: лічильники, таймери та гістограми.
+Експорт:
+- Prometheus textfile (out/metrics/toe_parser.prom) — для node_exporter textfile collector
+- JSON-lines журнал (logs/metrics.jsonl) — один рядок на цикл з усіма вимірами циклу
+
+Використання:
+    import metrics
+    with metrics.timer("toe_stage_seconds", stage="fetch"):
+        ...
+    metrics.inc("toe_http_requests_total", host="api.example", status=200)
+    metrics.observe("toe_group_fetch_bytes", 1234, buckets=metrics.BYTES_BUCKETS, address="1032/47931")
+    metrics.flush()
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import TIMEZONE
+
+BASE = Path(__file__).parent.parent.absolute()
+PROM_FILE = BASE / "out/metrics/toe_parser.prom"
+JSONL_FILE = BASE / "logs/metrics.jsonl"
+JSONL_MAX_BYTES = 5 * 1024 * 1024  # Після цього розміру журнал переноситься в metrics.jsonl.1
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> value
+_histograms = {}    # (name, labels) -> {"buckets": tuple, "counts": list, "sum": float, "count": int}
+_events = []        # виміри поточного циклу для JSON-lines
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Збільшує лічильник"""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        _events.append({"type": "counter", "name": name, "value": value, "labels": labels})
+
+
+def observe(name: str, value: float, buckets: tuple = SECONDS_BUCKETS, **labels):
+    """Додає вимір у гістограму (межі кошиків задаються першим виміром)"""
+    key = (name, _label_key(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = {"buckets": tuple(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[key] = hist
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+        _events.append({"type": "observe", "name": name, "value": value, "labels": labels})
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """Вимірює тривалість блоку в секундах (гістограма name)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items
+    )
+    return "{" + escaped + "}"
+
+
+def render_prometheus() -> str:
+    """Поточні значення у текстовому форматі Prometheus"""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: dict(v, counts=list(v["counts"])) for k, v in _histograms.items()}
+
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (n, labels), hist in sorted(histograms.items(), key=lambda kv: kv[0]):
+            if n != name:
+                continue
+            for bound, count in zip(hist["buckets"], hist["counts"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    lines.append("# TYPE toe_metrics_last_flush_timestamp_seconds gauge")
+    lines.append(f"toe_metrics_last_flush_timestamp_seconds {time.time():.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def flush(cycle: str = None):
+    """
+    Записує Prometheus textfile (атомарно) та дописує рядок циклу в JSON-lines журнал.
+    Виміри циклу після цього очищаються, накопичені лічильники — ні.
+    """
+    global _events
+    with _lock:
+        events, _events = _events, []
+
+    try:
+        os.makedirs(PROM_FILE.parent, exist_ok=True)
+        tmp_path = PROM_FILE.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, PROM_FILE)
+    except Exception as e:
+        print(f"Не вдалося записати метрики Prometheus: {e}")
+
+    if not events:
+        return
+    record = {
+        "timestamp": datetime.now(TIMEZONE).isoformat(),
+        "cycle": cycle,
+        "events": events,
+    }
+    try:
+        os.makedirs(JSONL_FILE.parent, exist_ok=True)
+        if JSONL_FILE.exists() and JSONL_FILE.stat().st_size > JSONL_MAX_BYTES:
+            os.replace(JSONL_FILE, JSONL_FILE.with_name(JSONL_FILE.name + ".1"))
+        with open(JSONL_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Не вдалося записати журнал метрик: {e}")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Постійний OCR-рушій для заголовків графіків обленерго.
+
+pytesseract.image_to_string запускає окремий процес tesseract і щоразу заново завантажує
+моделі ukr + eng — найдорожчий крок recognizer.run. Тут рушій tesseract (tesserocr,
+PyTessBaseAPI) створюється один раз на процес у фоновому потоці-воркері: моделі лишаються
+завантаженими, а вирізки заголовків надходять через чергу і повертаються як Future.
+Пакетний прогін розпізнавача (кілька зображень за один запуск) платить за завантаження
+моделей лише один раз.
+
+tesserocr — необов'язкова залежність (pip install tesserocr, потрібна libtesseract;
+див. requirements.txt та Instruction.txt, «Постійний рушій OCR»).
+Якщо його немає, рушій не стартує або розпізнавання завершилося помилкою — image_to_string
+повертається до pytesseract з тими самими параметрами (--psm 6 --oem 3).
+"""
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytesseract
+
+OCR_LANG = "ukr+eng"
+OCR_PSM = 6          # Один суцільний блок тексту
+OCR_OEM = 3          # Рушій за замовчуванням
+OCR_TIMEOUT = 30     # Секунд на одну вирізку, після чого — pytesseract
+START_TIMEOUT = 60   # Секунд на завантаження моделей
+
+LOG_FILE = os.path.join("logs", "full_log.log")
+
+
+def log(message: str):
+    timestamp = datetime.now(ZoneInfo("Europe/Kyiv")).strftime("%Y-%m-%d %H:%M:%S")
+    line = f"{timestamp} [ocr_engine] {message}"
+    print(line)
+    try:
+        with open(LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception:
+        pass
+
+
+class OcrEngine:
+    """
+    Рушій tesseract у власному потоці: PyTessBaseAPI не потокобезпечний, тож з ним працює
+    лише воркер, а інші потоки передають зображення через чергу (submit -> Future).
+    """
+
+    def __init__(self, lang: str = OCR_LANG, psm: int = OCR_PSM, oem: int = OCR_OEM):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self._requests = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = None
+
+    def start(self, timeout: float = START_TIMEOUT) -> "OcrEngine":
+        """Запускає воркер і чекає завантаження моделей; помилка ініціалізації піднімається тут"""
+        self._thread = threading.Thread(target=self._serve, name="ocr-engine", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Рушій OCR не завантажився за {timeout} с")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def _serve(self):
+        try:
+            import tesserocr
+            api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm, oem=self.oem)
+        except Exception as e:  # ImportError, RuntimeError (немає traineddata) тощо
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        with api:
+            while True:
+                item = self._requests.get()
+                if item is None:
+                    break
+                image, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    height, width = image.shape[:2]
+                    channels = 1 if image.ndim == 2 else image.shape[2]
+                    api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+                    future.set_result(api.GetUTF8Text())
+                except Exception as e:
+                    future.set_exception(e)
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Ставить у чергу зображення (uint8, сіре або 3 канали); Future дасть розпізнаний текст"""
+        future = Future()
+        self._requests.put((np.ascontiguousarray(image, dtype=np.uint8), future))
+        return future
+
+    def image_to_string(self, image: np.ndarray, timeout: float = OCR_TIMEOUT) -> str:
+        return self.submit(image).result(timeout)
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._requests.put(None)
+            self._thread.join(timeout=5)
+
+
+_engine = None
+_engine_failed = False
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Optional[OcrEngine]:
+    """Спільний рушій процесу (створюється під час першого виклику) або None, якщо tesserocr недоступний"""
+    global _engine, _engine_failed
+    with _engine_lock:
+        if _engine is None and not _engine_failed:
+            try:
+                _engine = OcrEngine().start()
+                log(f"🔤 Рушій OCR tesserocr ({OCR_LANG}) завантажено — моделі лишаються в пам'яті")
+            except Exception as e:
+                _engine_failed = True
+                log(f"⚠️ Постійний рушій OCR недоступний ({e}) — використовується pytesseract")
+        return _engine
+
+
+def image_to_string(image: np.ndarray) -> str:
+    """Текст зображення: постійний рушій, у разі недоступності чи помилки — pytesseract"""
+    engine = get_engine()
+    if engine is not None:
+        try:
+            return engine.image_to_string(image)
+        except Exception as e:
+            log(f"⚠️ Помилка рушія OCR: {e} — повтор через pytesseract")
+    return pytesseract.image_to_string(image, lang=OCR_LANG, config=f"--psm {OCR_PSM} --oem {OCR_OEM}")
+
+
+@atexit.register
+def shutdown():
+    """Зупиняє воркер (викликається й автоматично під час завершення процесу)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Збереження зображень графіків як PNG з індексованою палітрою.
+
+Зображення містять близько десяти «чистих» кольорів (фон, клітинки, сітка, рамки змін)
+і згладжені краї тексту між кольором тексту та фоном. Фіксована палітра проєкту —
+базові кольори рендерера плюс рівномірні градієнти (ramps) «текст -> фон» — вміщує все
+це в 256 індексів: базові кольори зберігаються точно, згладжування тексту — з
+похибкою в кілька рівнів яскравості (крок градієнта). Індексований PNG у кілька разів менший
+за RGB і кодується швидше, ніж RGB з optimize=True.
+
+Відображення кольорів у індекси — через відсортований список уже відомих ключів RGB
+(np.searchsorted), який поповнюється лише кольорами, що трапились у зображеннях, і живе
+весь процес: їх сотні, тож пам'ять не залежить від розміру простору 2^24 кольорів.
+Вбудоване Image.quantize(palette=...) не підходить: воно шукає найближчий колір для
+грубих комірок 5-6-5 біт і зсуває навіть базові кольори.
+
+Налаштування: config.PNG_PALETTE (вимкнути — RGB з optimize=True, як раніше)
+та config.PNG_COMPRESS_LEVEL (рівень zlib 0–9).
+"""
+import io
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from config import PNG_PALETTE, PNG_COMPRESS_LEVEL
+
+RAMP_STEPS = 32  # Кількість відтінків у кожному градієнті «текст -> фон»
+MAX_COLORS = 255  # Максимальна кількість кольорів палітри
+CHUNK_PIXELS = 1 << 20
+
+
+class PaletteEncoder:
+    """Фіксована палітра (базові кольори + градієнти) та кодування RGB -> індексований PNG"""
+
+    def __init__(self, colors: tuple, ramps: tuple = (), ramp_steps: int = RAMP_STEPS):
+        palette = list(dict.fromkeys(tuple(c) for c in colors))
+        for fg, bg in ramps:
+            for k in range(ramp_steps):
+                t = k / (ramp_steps - 1)
+                color = tuple(round(a + (b - a) * t) for a, b in zip(fg, bg))
+                if color not in palette:
+                    palette.append(color)
+        if len(palette) > MAX_COLORS:
+            raise ValueError(f"Палітра завелика: {len(palette)} кольорів (максимум {MAX_COLORS})")
+
+        self.colors = palette
+        self._rgb = np.array(palette, dtype=np.int32)
+        self._flat = [v for color in palette for v in color]
+        # (відомі ключі 0xBBGGRR, відсортовані; індекс палітри для кожного ключа).
+        # Одна пара замінюється одним присвоєнням: читач без блокування не змішає старі
+        # ключі з новими індексами, коли інший потік кодує те саме зображення
+        self._table = (np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint8))
+        self._lock = threading.Lock()
+
+    def _nearest(self, keys: np.ndarray) -> np.ndarray:
+        """Індекси найближчих кольорів палітри для ключів 0xBBGGRR"""
+        rgb = np.stack([keys & 0xFF, (keys >> 8) & 0xFF, (keys >> 16) & 0xFF], axis=1).astype(np.int32)
+        dist = ((rgb[:, None, :] - self._rgb[None, :, :]) ** 2).sum(axis=2)
+        return dist.argmin(axis=1).astype(np.uint8)
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Індекси палітри для ключів; нові кольори відображаються на найближчі й запам'ятовуються"""
+        known, indices = self._table
+        if known.size:
+            pos = np.searchsorted(known, keys)
+            np.minimum(pos, known.size - 1, out=pos)
+            missing = known[pos] != keys
+        else:
+            pos, missing = None, np.ones(keys.shape, dtype=bool)
+        if not missing.any():
+            return indices[pos]
+
+        with self._lock:
+            known, indices = self._table
+            new_keys = np.setdiff1d(np.unique(keys[missing]), known, assume_unique=True)
+            merged = np.concatenate([known, new_keys])
+            order = np.argsort(merged, kind="stable")
+            known, indices = merged[order], np.concatenate([indices, self._nearest(new_keys)])[order]
+            self._table = (known, indices)
+        return indices[np.searchsorted(known, keys)]
+
+    def quantize(self, img: Image.Image) -> Image.Image:
+        """RGB -> режим P з палітрою проєкту"""
+        # Смугами по ~CHUNK_PIXELS пікселів: проміжні масиви лишаються малими
+        width, height = img.size
+        band = max(1, CHUNK_PIXELS // width)
+        index = np.empty(width * height, dtype=np.uint8)
+        for y in range(0, height, band):
+            part = img.crop((0, y, width, min(height, y + band))).convert("RGBX")
+            keys = np.frombuffer(part.tobytes(), dtype="<u4") & 0xFFFFFF
+            # Рядки складаються з довгих серій одного кольору: шукаємо лише початки серій
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            chunk = np.repeat(self._lookup(keys[starts]), np.diff(np.append(starts, keys.size)))
+            index[y * width:y * width + chunk.size] = chunk
+
+        out = Image.frombuffer("L", img.size, index.tobytes(), "raw", "L", 0, 1)
+        out.putpalette(self._flat)  # L -> P
+        return out
+
+    def encode(self, img: Image.Image, compress_level: int = None, palette: bool = None) -> bytes:
+        buf = io.BytesIO()
+        self.write(img, buf, compress_level, palette)
+        return buf.getvalue()
+
+    def write(self, img: Image.Image, fp, compress_level: int = None, palette: bool = None):
+        """Записує PNG у файл або шлях fp (palette=False — RGB з optimize=True)"""
+        palette = PNG_PALETTE if palette is None else palette
+        if not palette:
+            img.save(fp, format="PNG", optimize=True)
+            return
+        level = PNG_COMPRESS_LEVEL if compress_level is None else compress_level
+        self.quantize(img).save(fp, format="PNG", compress_level=level)
+
+
+@lru_cache(maxsize=None)
+def _encoder(colors: tuple, ramps: tuple) -> PaletteEncoder:
+    return PaletteEncoder(colors, ramps)
+
+
+def encoder_for(colors, ramps=()) -> PaletteEncoder:
+    """
+    Спільний кодувальник для набору кольорів: рендерери з однаковими кольорами отримують
+    той самий об'єкт (і ті самі відомі кольори)
+    """
+    colors = tuple(sorted(set(tuple(c) for c in colors)))
+    ramps = tuple(sorted(set((tuple(fg), tuple(bg)) for fg, bg in ramps)))
+    return _encoder(colors, ramps)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Адаптивний планувальник опитування API.
+Запам'ятовує, коли fact.data справді змінювався (визначає main.get_api_data_and_save),
+і веде статистику змін по півгодинних інтервалах доби з поступовим «забуванням» старих даних.
+У «гарячі» години опитує частіше, у «холодні» — рідше, після кожної зміни деякий час
+опитує з мінімальним інтервалом. Добовий бюджет запитів обмежує загальну кількість звернень.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import (TIMEZONE, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_DEFAULT_INTERVAL,
+                    POLL_BOOST_AFTER_CHANGE, POLL_DAILY_REQUEST_BUDGET, POLL_HISTORY_DECAY)
+
+BASE = Path(__file__).parent.parent.absolute()
+HISTORY_FILE = BASE / "out/poll_history.json"
+
+BUCKET_MINUTES = 30
+BUCKETS = 24 * 60 // BUCKET_MINUTES
+# Мінімальна сумарна вага історії, з якої їй можна довіряти
+MIN_HISTORY_WEIGHT = 3.0
+
+
+class AdaptivePollScheduler:
+    def __init__(self, history_file: Path = HISTORY_FILE,
+                 min_interval: int = POLL_MIN_INTERVAL,
+                 max_interval: int = POLL_MAX_INTERVAL,
+                 default_interval: int = POLL_DEFAULT_INTERVAL,
+                 boost_after_change: int = POLL_BOOST_AFTER_CHANGE,
+                 daily_budget: int = POLL_DAILY_REQUEST_BUDGET,
+                 decay_per_day: float = POLL_HISTORY_DECAY):
+        self.history_file = Path(history_file)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.default_interval = default_interval
+        self.boost_after_change = boost_after_change
+        self.daily_budget = daily_budget
+        self.decay_per_day = decay_per_day
+        self.state = self._load()
+
+    # --- Стан ---
+    def _empty_state(self) -> dict:
+        return {
+            "weights": [0.0] * BUCKETS,     # зважена кількість змін у кожному інтервалі доби
+            "updated": None,                # коли ваги востаннє «старіли»
+            "last_change": None,            # час останньої зміни (ISO)
+            "requests_date": None,          # дата для лічильника запитів
+            "requests_today": 0,
+        }
+
+    def _load(self) -> dict:
+        state = self._empty_state()
+        if self.history_file.exists():
+            try:
+                with open(self.history_file, "r", encoding="utf-8") as f:
+                    state.update(json.load(f))
+                if len(state["weights"]) != BUCKETS:
+                    state["weights"] = [0.0] * BUCKETS
+            except Exception:
+                state = self._empty_state()
+        return state
+
+    def save(self):
+        os.makedirs(self.history_file.parent, exist_ok=True)
+        tmp_path = self.history_file.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.history_file)
+
+    @staticmethod
+    def _now(now: datetime = None) -> datetime:
+        return now.astimezone(TIMEZONE) if now else datetime.now(TIMEZONE)
+
+    @staticmethod
+    def bucket_of(moment: datetime) -> int:
+        return (moment.hour * 60 + moment.minute) // BUCKET_MINUTES
+
+    def _decay(self, now: datetime):
+        """Зменшує вагу старої історії, щоб планувальник підлаштовувався під нові звички"""
+        updated = self.state.get("updated")
+        if updated:
+            days = (now - datetime.fromisoformat(updated)).total_seconds() / 86400
+            if days > 0:
+                factor = self.decay_per_day ** days
+                self.state["weights"] = [w * factor for w in self.state["weights"]]
+        self.state["updated"] = now.isoformat()
+
+    def _requests_today(self, now: datetime) -> int:
+        if self.state.get("requests_date") != now.date().isoformat():
+            return 0
+        return self.state.get("requests_today", 0)
+
+    # --- Запис подій ---
+    def record_poll(self, changed: bool, requests: int = 1, now: datetime = None):
+        """Фіксує один цикл опитування: скільки запитів зроблено і чи змінився графік"""
+        now = self._now(now)
+        self.state["requests_today"] = self._requests_today(now) + requests
+        self.state["requests_date"] = now.date().isoformat()
+        if changed:
+            self._decay(now)
+            self.state["weights"][self.bucket_of(now)] += 1.0
+            self.state["last_change"] = now.isoformat()
+        try:
+            self.save()
+        except Exception:
+            pass
+
+    # --- Розрахунок інтервалу ---
+    def heat(self, now: datetime = None) -> float:
+        """
+        Відносна ймовірність зміни в найближчі півгодини (0..1) або None, якщо історії замало.
+        Згладжується сусідніми інтервалами, щоб не «пропускати» межі.
+        """
+        weights = self.state["weights"]
+        if sum(weights) < MIN_HISTORY_WEIGHT:
+            return None
+        smoothed = [
+            0.25 * weights[(b - 1) % BUCKETS] + 0.5 * weights[b] + 0.25 * weights[(b + 1) % BUCKETS]
+            for b in range(BUCKETS)
+        ]
+        peak = max(smoothed)
+        if peak <= 0:
+            return None
+        return smoothed[self.bucket_of(self._now(now))] / peak
+
+    def next_interval(self, requests_per_poll: int = 1, now: datetime = None) -> int:
+        """Кількість секунд до наступного опитування"""
+        now = self._now(now)
+
+        last_change = self.state.get("last_change")
+        if last_change and (now - datetime.fromisoformat(last_change)).total_seconds() < self.boost_after_change:
+            interval = self.min_interval
+        else:
+            heat = self.heat(now)
+            if heat is None:
+                interval = self.default_interval
+            else:
+                interval = self.max_interval - (self.max_interval - self.min_interval) * heat
+
+        # Добовий бюджет: рівномірно розподіляємо залишок запитів до кінця доби
+        if self.daily_budget:
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            seconds_left = (midnight - now).total_seconds()
+            polls_left = (self.daily_budget - self._requests_today(now)) // max(1, requests_per_poll)
+            if polls_left <= 0:
+                interval = max(interval, seconds_left)
+            else:
+                interval = max(interval, seconds_left / polls_left)
+
+        return int(max(self.min_interval, interval))
@@ -1,14 +1,18 @@
 import cv2
 import numpy as np
-import pytesseract
 import re
 import json
+import hashlib
 import os
 import shutil
+import atexit
+import sys
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from typing import Tuple, List, Dict, Any
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Any, Optional
 from telegram_notify import send_error, send_photo 
+import ocr_engine
 
 # --- КОНФІГУРАЦІЯ ТА ШЛЯХИ ---
 TZ = ZoneInfo("Europe/Kyiv")
@@ -17,6 +21,9 @@ LOG_FILE = os.path.join(LOG_DIR, "full_log.log")
 OUTPUT_JSON_PATH = "out/Ternopiloblenerho.json"
 OUTPUT_IMG_DIR = "out"
 DEBUG_IMAGE_DIR = "DEBUG_IMAGES"
+GRID_CACHE_PATH = os.path.join(OUTPUT_IMG_DIR, "cache", "grid_geometry.json")
+HEADER_CACHE_PATH = os.path.join(OUTPUT_IMG_DIR, "cache", "header_ocr.json")
+HEADER_CACHE_LIMIT = 256  # Максимум розпізнаних заголовків у кеші (найдавніше використані видаляються)
 
 # Створення необхідних папок
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -57,9 +64,87 @@ def sort_contours(cnts: List[np.ndarray], method: str = "left-to-right") -> Tupl
                                          key=lambda b: b[1][i], reverse=reverse))
     return list(cnts), list(boundingBoxes)
 
+
+# --- ДИСКОВІ КЕШІ (JSON) ---
+def _load_json_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_json_cache(path: str, cache: dict):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log(f"⚠️ Не вдалося зберегти кеш {path}: {e}")
+
+
+def header_digest(thresh: np.ndarray) -> str:
+    """Ключ кешу OCR: SHA-256 бінаризованої вирізки заголовка (разом з її розміром)"""
+    digest = hashlib.sha256(repr(thresh.shape).encode())
+    digest.update(np.ascontiguousarray(thresh).tobytes())
+    return digest.hexdigest()
+
+
+# LRU заголовків у пам'яті процесу: {шлях кешу: OrderedDict(digest -> [дата, оновлення])}.
+# Влучання лише переставляє запис у пам'яті; на диск кеш пишеться в remember_header
+# та під час завершення процесу, якщо порядок змінився.
+_header_caches: Dict[str, "OrderedDict[str, list]"] = {}
+_header_dirty: set = set()
+
+
+def _header_cache() -> "OrderedDict[str, list]":
+    cache = _header_caches.get(HEADER_CACHE_PATH)
+    if cache is None:
+        cache = OrderedDict((digest, entry) for digest, entry in _load_json_cache(HEADER_CACHE_PATH).items()
+                            if isinstance(entry, list) and len(entry) == 2)
+        _header_caches[HEADER_CACHE_PATH] = cache
+    return cache
+
+
+def cached_header(digest: str) -> Optional[Tuple[str, str]]:
+    """(дата_графіка, дата_та_час_оновлення) заголовка, вже розпізнаного раніше, або None"""
+    cache = _header_cache()
+    entry = cache.get(digest)
+    if entry is None:
+        return None
+    # LRU: використаний запис переноситься в кінець (видаляються записи з початку)
+    if next(reversed(cache)) != digest:
+        cache.move_to_end(digest)
+        _header_dirty.add(HEADER_CACHE_PATH)
+    return entry[0], entry[1]
+
+
+def remember_header(digest: str, clean_date: str, update_str: str):
+    cache = _header_cache()
+    cache[digest] = [clean_date, update_str]
+    cache.move_to_end(digest)
+    while len(cache) > HEADER_CACHE_LIMIT:
+        cache.popitem(last=False)
+    _save_json_cache(HEADER_CACHE_PATH, cache)
+    _header_dirty.discard(HEADER_CACHE_PATH)
+
+
+@atexit.register
+def _save_header_order():
+    """Зберігає порядок LRU, змінений лише влучаннями (без нових записів)"""
+    for path in list(_header_dirty):
+        _save_json_cache(path, _header_caches[path])
+    _header_dirty.clear()
+
+
 def get_date_from_header(image: np.ndarray, table_y: int, original_img: np.ndarray) -> Tuple[str, str]:
     """
     Вирізає заголовок над таблицею та шукає дату у кількох форматах.
+    Той самий (побайтово) бінаризований заголовок розпізнається лише раз — результат
+    береться з кешу HEADER_CACHE_PATH.
     Повертає: (дата_графіка, дата_та_час_оновлення)
     """
     header_img = original_img[0:max(0, table_y), :]
@@ -74,10 +159,17 @@ def get_date_from_header(image: np.ndarray, table_y: int, original_img: np.ndarr
     blur = cv2.GaussianBlur(gray, (3,3), 0)
     _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
 
+    digest = header_digest(thresh)
+    cached = cached_header(digest)
+    if cached is not None:
+        log(f"📅 Заголовок уже розпізнавався (кеш OCR): дата графіка {cached[0]}, оновлення {cached[1]}")
+        return cached
+
     try:
-        text = pytesseract.image_to_string(thresh, lang='ukr+eng', config='--psm 6 --oem 3')
+        # Постійний рушій tesseract (моделі завантажені один раз), запасний шлях — pytesseract
+        text = ocr_engine.image_to_string(thresh)
     except Exception as e:
-        log(f"Помилка pytesseract: {e}")
+        log(f"Помилка OCR: {e}")
         text = ""
     text = text.replace('\n', ' ')
     log(f"Розпізнаний текст заголовка: {text}")
@@ -125,8 +217,55 @@ def get_date_from_header(image: np.ndarray, table_y: int, original_img: np.ndarr
         update_str = datetime.now(TZ).strftime("%d.%m.%Y %H:%M")
         log(f"⚠️ Дата оновлення не знайдена, використано поточну: {update_str}")
 
+    # Кешуються лише дати, знайдені в тексті (підставлені поточні залежать від часу запуску)
+    if m and update_match:
+        remember_header(digest, clean_date, update_str)
+
     return clean_date, update_str
 
+# --- КЛАСИФІКАЦІЯ КОЛЬОРУ КЛІТИНОК ---
+CELL_MARGIN = 3     # Відступ від країв клітинки (лінії сітки)
+SECTION_MARGIN = 2  # Додатковий відступ усередині половини клітинки
+COLOR_RATIO = 0.30  # Частка пікселів кольору, з якої половина вважається червоною / жовтою
+
+
+# Маски рахуються в uint8 без копій у ширший тип: r - 50 переповнюється лише при r < 50,
+# а такі пікселі відкидає умова r > 150
+def _red_mask(b_channel: np.ndarray, g_channel: np.ndarray, r_channel: np.ndarray) -> np.ndarray:
+    """Червоний колір (переважання R, низькі G і B): R > 150, G, B < 100, R > G + 50, R > B + 50"""
+    r_minus = r_channel - np.uint8(50)
+    return (r_channel > 150) & (g_channel < 100) & (b_channel < 100) & \
+           (r_minus > g_channel) & (r_minus > b_channel)
+
+
+def _yellow_mask(b_channel: np.ndarray, g_channel: np.ndarray, r_channel: np.ndarray) -> np.ndarray:
+    """Жовтий колір (високі R і G, низький B): R, G > 150, B < 150, |R - G| < 50"""
+    return (r_channel > 150) & (g_channel > 150) & (b_channel < 150) & \
+           (np.maximum(r_channel, g_channel) - np.minimum(r_channel, g_channel) < 50)
+
+
+def _status_from_halves(is_left_red: bool, is_right_red: bool,
+                        is_left_yellow: bool, is_right_yellow: bool) -> str:
+    """Погодинний статус за кольорами половин клітинки"""
+    # 1. Можливе відключення (жовтий)
+    if is_left_yellow and is_right_yellow:
+        return 'maybe'
+    elif is_left_yellow:
+        return 'mfirst'
+    elif is_right_yellow:
+        return 'msecond'
+
+    # 2. Точне відключення (червоний)
+    elif is_left_red and is_right_red:
+        return 'no'
+    elif is_left_red:
+        return 'first'
+    elif is_right_red:
+        return 'second'
+
+    # 3. Є світло
+    return 'yes'
+
 def _is_red_section(section_img: np.ndarray) -> Tuple[bool, int, int]:
     """Визначає, чи секція має червоний колір (відключення)."""
     if section_img.size == 0: return False, 0, 0
@@ -140,11 +279,10 @@ def _is_red_section(section_img: np.ndarray) -> Tuple[bool, int, int]:
     r_channel = crop[:, :, 2]
     
     # Маска для червоного кольору (переважання R, низькі G і B)
-    red_mask = (r_channel > 150) & (g_channel < 100) & (b_channel < 100) & \
-               (r_channel > g_channel + 50) & (r_channel > b_channel + 50)
+    red_mask = _red_mask(b_channel, g_channel, r_channel)
     num_red_pixels = np.sum(red_mask)
     ratio = num_red_pixels / total_pixels
-    is_red = ratio > 0.30 # 30% червоних пікселів
+    is_red = ratio > COLOR_RATIO # 30% червоних пікселів
     return is_red, num_red_pixels, total_pixels
 
 def _is_yellow_section(section_img: np.ndarray) -> Tuple[bool, int, int]:
@@ -160,17 +298,17 @@ def _is_yellow_section(section_img: np.ndarray) -> Tuple[bool, int, int]:
     r_channel = crop[:, :, 2]
     
     # Маска для жовтого кольору (високі R і G, низький B)
-    yellow_mask = (r_channel > 150) & (g_channel > 150) & (b_channel < 150) & \
-                  (np.abs(r_channel.astype(int) - g_channel.astype(int)) < 50)
+    yellow_mask = _yellow_mask(b_channel, g_channel, r_channel)
     num_yellow_pixels = np.sum(yellow_mask)
     ratio = num_yellow_pixels / total_pixels
-    is_yellow = ratio > 0.30 # 30% жовтих пікселів
+    is_yellow = ratio > COLOR_RATIO # 30% жовтих пікселів
     return is_yellow, num_yellow_pixels, total_pixels
 
 def get_cell_color_status(cell_img: np.ndarray) -> str:
     """
     Визначає погодинний статус клітинки.
     Повертає: 'yes', 'no', 'first', 'second', 'maybe', 'mfirst', 'msecond'.
+    Покліткова версія (еталон для CellColorClassifier, який run використовує для всієї таблиці).
     """
     h, w, _ = cell_img.shape
     if h < 10 or w < 10: return 'yes'
@@ -192,50 +330,169 @@ def get_cell_color_status(cell_img: np.ndarray) -> str:
     is_left_yellow, _, _ = _is_yellow_section(left_half)
     is_right_yellow, _, _ = _is_yellow_section(right_half)
 
-    # 1. Можливе відключення (жовтий)
-    if is_left_yellow and is_right_yellow:
-        return 'maybe'
-    elif is_left_yellow:
-        return 'mfirst'
-    elif is_right_yellow:
-        return 'msecond'
+    return _status_from_halves(is_left_red, is_right_red, is_left_yellow, is_right_yellow)
 
-    # 2. Точне відключення (червоний)
-    elif is_left_red and is_right_red:
-        return 'no'
-    elif is_left_red:
-        return 'first'
-    elif is_right_red:
-        return 'second'
 
-    # 3. Є світло
-    return 'yes'
+class CellColorClassifier:
+    """
+    Статуси клітинок таблиці за інтегральними зображеннями (summed-area tables).
 
+    Маски червоного і жовтого рахуються один раз для всієї області таблиці, далі
+    кількість кольорових пікселів у будь-якій половині клітинки — чотири звертання
+    до інтегрального зображення. Відступи, пороги і статуси — ті самі, що в
+    get_cell_color_status (результат збігається з покліточною перевіркою).
+    """
 
-def run(image_path: str) -> Dict[str, Any]:
-    log(f"=== Старт обробки файлу: {image_path} ===")
-    
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Файл не знайдено: {image_path}")
-        
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"Не вдалося завантажити зображення: {image_path}")
-        
-    original = image.copy()
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # Бінаризація та морфологічні операції для виділення сітки
+    def __init__(self, image: np.ndarray, rects: List[Tuple[int, int, int, int]] = None):
+        height, width = image.shape[:2]
+        # Область, що покриває всі клітинки (або все зображення)
+        if rects:
+            x0 = max(0, min(x for x, _, _, _ in rects))
+            y0 = max(0, min(y for _, y, _, _ in rects))
+            x1 = min(width, max(x + w for x, _, w, _ in rects))
+            y1 = min(height, max(y + h for _, y, _, h in rects))
+        else:
+            x0, y0, x1, y1 = 0, 0, width, height
+        self.origin = (x0, y0)
+        self.image_size = (width, height)
+
+        b_channel, g_channel, r_channel = cv2.split(image[y0:y1, x0:x1])  # Суцільні масиви каналів
+        red = _red_mask(b_channel, g_channel, r_channel).view(np.uint8)
+        yellow = _yellow_mask(b_channel, g_channel, r_channel).view(np.uint8)
+        # (h + 1) × (w + 1): sat[y, x] — кількість пікселів у прямокутнику [0, y) × [0, x)
+        self._red = cv2.integral(red, sdepth=cv2.CV_32S)
+        self._yellow = cv2.integral(yellow, sdepth=cv2.CV_32S)
+
+    def _section(self, x: int, y: int, w: int, h: int) -> Tuple[bool, bool]:
+        """(червона, жовта) для половини клітинки з лівим верхнім кутом x, y (як _is_*_section)"""
+        if w < 5 or h < 5:
+            return False, False
+        ox, oy = self.origin
+        x0, y0 = x + SECTION_MARGIN - ox, y + SECTION_MARGIN - oy
+        x1, y1 = x + w - SECTION_MARGIN - ox, y + h - SECTION_MARGIN - oy
+        total_pixels = (x1 - x0) * (y1 - y0)
+        if total_pixels <= 0:
+            return False, False
+        flags = []
+        for sat in (self._red, self._yellow):
+            count = int(sat[y1, x1]) - int(sat[y0, x1]) - int(sat[y1, x0]) + int(sat[y0, x0])
+            flags.append(count / total_pixels > COLOR_RATIO)
+        return flags[0], flags[1]
+
+    def status(self, rect: Tuple[int, int, int, int]) -> str:
+        """Статус клітинки rect = (x, y, w, h) (прямокутник cv2.boundingRect)"""
+        x, y, w, h = rect
+        width, height = self.image_size
+        # Розміри зрізу original[y:y+h, x:x+w] біля країв зображення
+        w = min(x + w, width) - max(x, 0)
+        h = min(y + h, height) - max(y, 0)
+        x, y = max(x, 0), max(y, 0)
+        if h < 10 or w < 10: return 'yes'
+
+        # Обрізаємо краї, щоб уникнути ліній сітки
+        cx, cy = x + CELL_MARGIN, y + CELL_MARGIN
+        w_c, h_c = w - 2 * CELL_MARGIN, h - 2 * CELL_MARGIN
+        if w_c < 2: return 'yes'
+
+        mid_w = w_c // 2
+        is_left_red, is_left_yellow = self._section(cx, cy, mid_w, h_c)
+        is_right_red, is_right_yellow = self._section(cx + mid_w, cy, w_c - mid_w, h_c)
+        return _status_from_halves(is_left_red, is_right_red, is_left_yellow, is_right_yellow)
+
+
+# --- ПОШУК СІТКИ ТАБЛИЦІ ---
+GRID_ROWS = 12         # Рядки черг
+GRID_COLS = 24         # Години
+LINE_COVERAGE = 0.9    # Частка ширини / висоти таблиці, яку має покривати лінія сітки
+SPACING_TOLERANCE = 0.2  # Допустиме відхилення кроку ліній від медіани
+
+Rect = Tuple[int, int, int, int]
+
+
+def line_masks(gray: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Маски горизонтальних і вертикальних ліній (бінаризація та морфологічні операції)"""
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                    cv2.THRESH_BINARY_INV, 9, 2)
     
     scale = 10 
-    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (int(image.shape[1] / scale), 1))
-    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, int(image.shape[0] / scale)))
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (int(gray.shape[1] / scale), 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, int(gray.shape[0] / scale)))
 
     horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel)
     vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel)
+    return horizontal_lines, vertical_lines
+
+
+def _profile(mask: np.ndarray, axis: int) -> np.ndarray:
+    """Кількість пікселів лінії (маска 0/255) у кожному стовпчику (axis=0) або рядку (axis=1)"""
+    sums = cv2.reduce(mask, axis, cv2.REDUCE_SUM, dtype=cv2.CV_32S)
+    return sums.ravel() // 255
+
+
+def _line_bands(profile: np.ndarray, min_count: float) -> List[Tuple[int, int]]:
+    """Суцільні смуги індексів, де профіль не менший за min_count: [(перший, останній)]"""
+    on = np.concatenate(([False], profile >= min_count, [False]))
+    edges = np.flatnonzero(on[1:] != on[:-1])
+    return [(int(a), int(b) - 1) for a, b in zip(edges[::2], edges[1::2])]
 
+
+def _regular(bands: List[Tuple[int, int]]) -> bool:
+    """Рівномірний крок ліній (клітинки однакового розміру)"""
+    centers = np.array([(a + b) / 2 for a, b in bands])
+    steps = np.diff(centers)
+    median = np.median(steps)
+    return median > 0 and bool(np.all(np.abs(steps - median) <= SPACING_TOLERANCE * median))
+
+
+def find_grid_by_projection(horizontal_lines: np.ndarray,
+                            vertical_lines: np.ndarray) -> Optional[Tuple[List[List[Rect]], int]]:
+    """
+    Сітка за проєкціями масок ліній: 25 останніх вертикальних ліній (години) і 13 останніх
+    горизонтальних (черги), що перетинають усю таблицю. Повертає (12 × 24 прямокутників
+    клітинок, min_table_y) або None, якщо проєкції не відповідають очікуваній структурі.
+    Прямокутники — як у контурного пошуку: від останнього пікселя лінії до першого пікселя наступної.
+    """
+    # Вертикальні лінії: стовпчики, де лінія займає не менше половини найдовшої
+    col_profile = _profile(vertical_lines, 0)
+    if not col_profile.any():
+        return None
+    v_bands = _line_bands(col_profile, col_profile.max() * 0.5)
+    if len(v_bands) < GRID_COLS + 1:
+        return None
+    v_bands = v_bands[-(GRID_COLS + 1):]
+    x0, x1 = v_bands[0][0], v_bands[-1][1]
+
+    # Горизонтальні лінії, що проходять через усі години
+    row_profile = _profile(horizontal_lines[:, x0:x1 + 1], 1)
+    table_bands = _line_bands(row_profile, (x1 - x0 + 1) * LINE_COVERAGE)
+    if len(table_bands) < GRID_ROWS + 1:
+        return None
+    h_bands = table_bands[-(GRID_ROWS + 1):]
+    y0, y1 = h_bands[0][0], h_bands[-1][1]
+
+    # Вертикальні лінії мають перетинати всі рядки черг
+    col_profile = _profile(vertical_lines[y0:y1 + 1, :], 0)
+    if any(col_profile[a:b + 1].max() < (y1 - y0 + 1) * LINE_COVERAGE for a, b in v_bands):
+        return None
+    if not (_regular(v_bands) and _regular(h_bands)):
+        return None
+
+    rows = [[(left[1], top[1], right[0] - left[1] + 1, bottom[0] - top[1] + 1)
+             for left, right in zip(v_bands, v_bands[1:])]
+            for top, bottom in zip(h_bands, h_bands[1:])]
+
+    # Межа заголовка — як у контурному пошуку: між двома верхніми рядками таблиці, трохи вище
+    y_row1, y_row2 = table_bands[0][1], table_bands[1][1]
+    min_table_y = max(0, int((y_row1 + y_row2) / 2) - 35)
+    return rows, min_table_y
+
+
+def find_grid_by_contours(horizontal_lines: np.ndarray,
+                          vertical_lines: np.ndarray) -> Tuple[List[List[Rect]], int]:
+    """
+    Сітка за контурами клітинок (запасний шлях): рядки групуються за Y, останні 12 рядків —
+    черги. Повертає (рядки прямокутників клітинок, min_table_y).
+    """
     table_mask = cv2.addWeighted(horizontal_lines, 0.5, vertical_lines, 0.5, 0.0)
     _, table_mask = cv2.threshold(table_mask, 0, 255, cv2.THRESH_BINARY)
 
@@ -244,7 +501,7 @@ def run(image_path: str) -> Dict[str, Any]:
     
     cell_contours = []
     min_cell_area = 1000 
-    max_cell_area = (image.shape[0] * image.shape[1] * 0.05) 
+    max_cell_area = (table_mask.shape[0] * table_mask.shape[1] * 0.05) 
     
     for c in contours:
         area = cv2.contourArea(c)
@@ -263,16 +520,16 @@ def run(image_path: str) -> Dict[str, Any]:
     previous_y = bounds[0][1]
     row_tolerance = 15 
 
-    for c, b in zip(cnts, bounds):
+    for b in bounds:
         x, y, w, h = b
         if abs(y - previous_y) <= row_tolerance:
-            current_row.append((c, b))
+            current_row.append(b)
         else:
-            current_row.sort(key=lambda k: k[1][0])
+            current_row.sort(key=lambda k: k[0])
             rows.append(current_row)
-            current_row = [(c, b)]
+            current_row = [b]
             previous_y = y
-    current_row.sort(key=lambda k: k[1][0])
+    current_row.sort(key=lambda k: k[0])
     rows.append(current_row)
     
     # Визначення межі заголовка
@@ -280,13 +537,155 @@ def run(image_path: str) -> Dict[str, Any]:
         min_table_y = min([b[1] for b in bounds])
     else:
         # Беремо Y перших клітинок двох верхніх рядів
-        y_row1 = rows[0][0][1][1]
-        y_row2 = rows[1][0][1][1]
+        y_row1 = rows[0][0][1]
+        y_row2 = rows[1][0][1]
         # Беремо середину між рядком 1 і 2, щоб OCR охоплював більше тексту
         min_table_y = int((y_row1 + y_row2) / 2)    
         # Трошки піднімемо OCR ще вище (на 10–25px)
         min_table_y = max(0, min_table_y - 35)
 
+    # Останні 12 рядків — це черги
+    return rows[-GRID_ROWS:], min_table_y
+
+
+# --- КЕШ ГЕОМЕТРІЇ СІТКИ ---
+# Зображення обленерго щодня має ті самі розміри й положення таблиці, тож знайдена сітка
+# (12 × 24 прямокутників і межа заголовка) зберігається на диску під ключем «розмір
+# зображення» разом з відбитком ліній в області таблиці. Якщо відбиток нового зображення
+# збігається, морфологія та пошук сітки пропускаються; кілька пікселів ліній сітки
+# перевіряються, перш ніж довіритися кешу.
+GRID_CACHE_LIMIT = 8          # Максимум макетів на один розмір зображення
+LINE_DARK = 128               # Піксель лінії: усі канали темніші (кольори клітинок — ні)
+FINGERPRINT_STEP = 4          # Зменшення маски ліній для відбитка
+GRID_PAD = 3                  # Відступ області відбитка за межі клітинок (зовнішні лінії)
+GRID_CHECK_RATIO = 0.9        # Частка перевірених пікселів ліній, які мають бути темними
+
+
+def _dark_pixels(image: np.ndarray) -> np.ndarray:
+    """Маска темних нейтральних пікселів (лінії, текст): 255, якщо всі канали < LINE_DARK"""
+    return cv2.inRange(image, (0, 0, 0), (LINE_DARK - 1,) * 3)
+
+
+def _grid_bbox(rows: List[List[Rect]], shape: tuple) -> Tuple[int, int, int, int]:
+    """Область таблиці (x0, y0, x1, y1) з лініями навколо клітинок"""
+    rects = [rect for row in rows for rect in row]
+    x0 = max(0, min(x for x, _, _, _ in rects) - GRID_PAD)
+    y0 = max(0, min(y for _, y, _, _ in rects) - GRID_PAD)
+    x1 = min(shape[1], max(x + w for x, _, w, _ in rects) + GRID_PAD)
+    y1 = min(shape[0], max(y + h for _, y, _, h in rects) + GRID_PAD)
+    return x0, y0, x1, y1
+
+
+def grid_fingerprint(image: np.ndarray, bbox: Tuple[int, int, int, int]) -> str:
+    """Відбиток ліній таблиці: зменшена маска темних пікселів області bbox (кольори клітинок не впливають)"""
+    x0, y0, x1, y1 = bbox
+    mask = _dark_pixels(image[y0:y1, x0:x1])
+    size = (max(1, mask.shape[1] // FINGERPRINT_STEP), max(1, mask.shape[0] // FINGERPRINT_STEP))
+    small = cv2.resize(mask, size, interpolation=cv2.INTER_AREA) > 0
+    digest = hashlib.sha1(np.packbits(small).tobytes())
+    digest.update(repr(small.shape).encode())
+    return digest.hexdigest()[:16]
+
+
+def grid_lines_present(image: np.ndarray, rows: List[List[Rect]]) -> bool:
+    """
+    Самоперевірка сітки з кешу: на межах кількох клітинок (кути й середина таблиці)
+    мають бути лінії — у смузі 3 пікселі назовні від кожної сторони прямокутника.
+    """
+    height, width = image.shape[:2]
+    r_idx = sorted({0, len(rows) // 2, len(rows) - 1})
+    checked = dark = 0
+    for r in r_idx:
+        row = rows[r]
+        for c in sorted({0, len(row) // 2, len(row) - 1}):
+            x, y, w, h = row[c]
+            cx, cy = x + w // 2, y + h // 2
+            for band in (image[cy, max(0, x - 2):x + 1],
+                         image[cy, x + w - 1:min(width, x + w + 2)],
+                         image[max(0, y - 2):y + 1, cx],
+                         image[y + h - 1:min(height, y + h + 2), cx]):
+                checked += 1
+                # Найтемніший піксель смуги (за найяскравішим каналом)
+                dark += band.size > 0 and int(band.max(axis=1).min()) < LINE_DARK
+    return checked > 0 and dark >= checked * GRID_CHECK_RATIO
+
+
+def _size_key(image: np.ndarray) -> str:
+    return f"{image.shape[1]}x{image.shape[0]}"
+
+
+def cached_grid(image: np.ndarray) -> Optional[Tuple[List[List[Rect]], int]]:
+    """Сітка з кешу для зображення того самого розміру й макета ліній або None"""
+    cache = _load_json_cache(GRID_CACHE_PATH)
+    entries = cache.get(_size_key(image))
+    if not isinstance(entries, list):
+        return None
+    for entry in entries:
+        try:
+            bbox = tuple(entry["bbox"])
+            if grid_fingerprint(image, bbox) != entry["fingerprint"]:
+                continue
+            rows = [[tuple(rect) for rect in row] for row in entry["rows"]]
+            min_table_y = int(entry["min_table_y"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if grid_lines_present(image, rows):
+            return rows, min_table_y
+        log("⚠️ Відбиток сітки збігся, але лінії не на місці — запис кешу видалено")
+        entries.remove(entry)
+        _save_json_cache(GRID_CACHE_PATH, cache)
+        break
+    return None
+
+
+def remember_grid(image: np.ndarray, rows: List[List[Rect]], min_table_y: int):
+    """Зберігає повну сітку 12 × 24 у кеш (неповні сітки контурного пошуку не кешуються)"""
+    rows = [row[-GRID_COLS:] for row in rows]
+    if len(rows) != GRID_ROWS or any(len(row) != GRID_COLS for row in rows):
+        return
+    bbox = _grid_bbox(rows, image.shape)
+    entry = {
+        "bbox": list(bbox),
+        "fingerprint": grid_fingerprint(image, bbox),
+        "rows": [[list(map(int, rect)) for rect in row] for row in rows],
+        "min_table_y": int(min_table_y),
+    }
+    cache = _load_json_cache(GRID_CACHE_PATH)
+    entries = cache.get(_size_key(image))
+    entries = [e for e in entries if isinstance(e, dict) and e.get("fingerprint") != entry["fingerprint"]] \
+        if isinstance(entries, list) else []
+    cache[_size_key(image)] = ([entry] + entries)[:GRID_CACHE_LIMIT]
+    _save_json_cache(GRID_CACHE_PATH, cache)
+
+
+def run(image_path: str) -> Dict[str, Any]:
+    log(f"=== Старт обробки файлу: {image_path} ===")
+    
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Файл не знайдено: {image_path}")
+        
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Не вдалося завантажити зображення: {image_path}")
+        
+    original = image.copy()
+
+    # Сітка 12 × 24: з кешу геометрії, інакше за проєкціями ліній, контури — лише якщо
+    # структура не збіглася
+    grid = cached_grid(image)
+    if grid is not None:
+        log("📐 Сітку таблиці взято з кешу геометрії")
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        horizontal_lines, vertical_lines = line_masks(gray)
+        grid = find_grid_by_projection(horizontal_lines, vertical_lines)
+        if grid is not None:
+            log("📐 Сітку таблиці знайдено за проєкціями ліній")
+        else:
+            log("⚠️ Проєкції ліній не відповідають сітці 12×24 — шукаю клітинки за контурами")
+            grid = find_grid_by_contours(horizontal_lines, vertical_lines)
+        remember_grid(image, *grid)
+    data_rows, min_table_y = grid
 
     # Отримання дати та Unix Timestamp
     # Отримання дати графіка та дати оновлення
@@ -294,9 +693,6 @@ def run(image_path: str) -> Dict[str, Any]:
     date_timestamp = date_to_unix_timestamp(date_str)
     date_timestamp_str = str(date_timestamp)
     
-    # Останні 12 рядків — це черги
-    data_rows = rows[-12:] 
-    
     queue_names = [
         "1.1", "1.2", "2.1", "2.2", "3.1", "3.2", 
         "4.1", "4.2", "5.1", "5.2", "6.1", "6.2"
@@ -309,6 +705,10 @@ def run(image_path: str) -> Dict[str, Any]:
     # 🔶 Обведення заголовка ОРАНЖЕВИМ
     cv2.rectangle(debug_img, (0, 0), (image.shape[1], min_table_y), (0,165,255), 3)
     
+    # Кольори клітинок: маски та інтегральні зображення один раз для всієї таблиці
+    classifier = CellColorClassifier(
+        original, [rect for row_data in data_rows[:len(queue_names)] for rect in row_data[-24:]])
+
     # --- Обробка кожного рядка даних ---    
     for i, row_data in enumerate(data_rows):
         if i >= len(queue_names): 
@@ -325,13 +725,12 @@ def run(image_path: str) -> Dict[str, Any]:
             log(f"⚠️ Увага: рядок {q_name_original} має {len(time_cells)} клітинок часу замість 24.")
 
         # Обробка кожної клітинки часу   
-        for col_idx, (cnt, rect) in enumerate(time_cells):
+        for col_idx, rect in enumerate(time_cells):
 
             x, y, w, h = rect
-            cell_img = original[y:y+h, x:x+w]
             
             # Отримання статусу (він вже відповідає погодинному статусу)
-            hourly_status = get_cell_color_status(cell_img)
+            hourly_status = classifier.status(rect)
             
             # Ключі годин: "1", "2", ..., "24"
             hour_key = str(col_idx + 1)  
@@ -438,17 +837,22 @@ def run(image_path: str) -> Dict[str, Any]:
 if __name__ == "__main__":
     TEST_IMAGE_PATH = "in/GPV.png"
     
-    # Автоматичне копіювання файлу, якщо він завантажений, але не знаходиться у папці 'in'
-    if os.path.exists("GPV.png") and not os.path.exists(TEST_IMAGE_PATH):
-        shutil.copy("GPV.png", TEST_IMAGE_PATH)
-        log(f"Скопійовано файл GPV.png в {TEST_IMAGE_PATH}")
-    elif not os.path.exists(TEST_IMAGE_PATH):
-        log(f"❌ Критична помилка: Не знайдено тестового файлу за шляхом: {TEST_IMAGE_PATH}")
-        log("Будь ласка, помістіть зображення графіку у папку 'in' під назвою GPV.png.")
+    # Пакетний режим: python recognizer.py a.png b.png ... — один процес і один рушій OCR на всі файли
+    image_paths = sys.argv[1:]
+    if not image_paths:
+        # Автоматичне копіювання файлу, якщо він завантажений, але не знаходиться у папці 'in'
+        if os.path.exists("GPV.png") and not os.path.exists(TEST_IMAGE_PATH):
+            shutil.copy("GPV.png", TEST_IMAGE_PATH)
+            log(f"Скопійовано файл GPV.png в {TEST_IMAGE_PATH}")
+        elif not os.path.exists(TEST_IMAGE_PATH):
+            log(f"❌ Критична помилка: Не знайдено тестового файлу за шляхом: {TEST_IMAGE_PATH}")
+            log("Будь ласка, помістіть зображення графіку у папку 'in' під назвою GPV.png.")
+        image_paths = [TEST_IMAGE_PATH] if os.path.exists(TEST_IMAGE_PATH) else []
     
-    if os.path.exists(TEST_IMAGE_PATH):
+    for image_path in image_paths:
         try:
-            run(TEST_IMAGE_PATH)
+            run(image_path)
         except Exception as e:
             log(f"Критична помилка виконання скрипта: {e}")
-            send_error(f"Критична помилка виконання скрипта: {e}")
\ No newline at end of file
+            send_error(f"Критична помилка виконання скрипта: {e}")
+    ocr_engine.shutdown()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Паралельний рендеринг усіх зображень циклу в пулі процесів.
+
+Кожне зображення — окреме завдання: gpv-all-today.png, gpv-all-tomorrow.png та
+gpv-X-Y-emergency.png для кожної групи, яку треба перемалювати (див.
+gener_im_1_G.select_groups_to_render). Малювання і кодування PNG та варіантів
+займають CPU, тому завдання розподіляються між процесами (до RENDER_WORKERS).
+
+Пул один на процес: створюється під час першого рендерингу і живе до shutdown()
+(у режимі демона — до його зупинки), тож воркери між циклами зберігають кеш шрифтів,
+кеш шаблонів (render_templates.CACHE) і таблиці палітри. Дані циклу лише для читання
+(поточний JSON і попередні стани) передаються з кожним завданням. Результат і помилка
+кожного завдання збираються окремо; попередні стани зберігаються лише для рендерера, всі завдання якого
+завершилися успішно. Збережені стани лишаються в пам'яті процесу, тож у режимі демона
+файли попередніх станів читаються лише в першому циклі.
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import gener_im_full
+import gener_im_1_G
+import font_cache
+import image_variants
+import metrics
+from config import RENDER_WORKERS
+from schedule_bits import Schedule
+
+BASE = Path(__file__).parent.parent.absolute()
+LOG_DIR = BASE / "logs"
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+FULL_LOG_FILE = LOG_DIR / "full_log.log"
+
+# Пул процесів, спільний для всіх циклів (створює _get_pool, зупиняє shutdown)
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Попередні стани рендерерів, збережені в цьому процесі: "full" / "1g" -> стан
+_prev_states = {}
+
+
+def log(message):
+    timestamp = datetime.now(ZoneInfo("Europe/Kyiv")).strftime("%Y-%m-%d %H:%M:%S")
+    line = f"{timestamp} [render_pool] {message}"
+    print(line)
+    try:
+        with open(FULL_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception:
+        pass
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Спільний пул на workers процесів; інший розмір — пул перестворюється"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+            log(f"🧵 Запущено пул рендерингу на {workers} процесів")
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Зламаний пул (воркер упав) відкидається — наступний цикл створить новий"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    """Зупиняє воркери спільного пулу (main.run_daemon під час завершення)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_job(job: tuple, shared: dict) -> dict:
+    """
+    Виконує одне завдання рендерингу у воркері.
+    job: ("full", day_ts, day_key, filename, date_str) або ("group", group_name)
+    shared: дані циклу — data, json_path, prev_full, prev_1g
+    """
+    kind = job[0]
+    name = job[3] if kind == "full" else job[1]
+    started = time.perf_counter()
+    try:
+        if kind == "full":
+            _, day_ts, day_key, filename, date_str = job
+            outputs = gener_im_full.render_single_date(shared["data"], day_ts, day_key, filename, date_str,
+                                                       shared["prev_full"].get("data", {}))
+        else:
+            filename = gener_im_1_G.group_image_path(job[1]).name
+            renderer = gener_im_1_G.ImageRenderer(shared["data"], Path(shared["json_path"]),
+                                                  job[1], shared["prev_1g"])
+            outputs = renderer.render()
+        return {"kind": kind, "name": name, "ok": True, "seconds": time.perf_counter() - started,
+                "file": filename, "outputs": outputs, "font_cache": font_cache.take_stats()}
+    except Exception as e:
+        return {"kind": kind, "name": name, "ok": False, "seconds": time.perf_counter() - started,
+                "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+
+
+def build_jobs(schedule: Schedule, prev_1g: dict, force: bool = False) -> tuple:
+    """
+    Список завдань та групи, пропущені без змін.
+    Загальні зображення (найдовші) ставляться в чергу першими.
+    """
+    jobs = [("full",) + tuple(item) for item in gener_im_full.get_dates_to_generate(schedule.fact_data)]
+
+    groups = gener_im_1_G.DataProcessor.get_groups_from_data(schedule.data)
+    if force:
+        to_render, skipped = list(groups), []
+    else:
+        to_render, skipped = gener_im_1_G.select_groups_to_render(schedule, groups, prev_1g)
+    jobs.extend(("group", group) for group in to_render)
+    return jobs, skipped
+
+
+def default_workers() -> int:
+    return RENDER_WORKERS or os.cpu_count() or 1
+
+
+def render_all(data, json_path: str = "", workers: int = None, force: bool = False) -> dict:
+    """
+    Рендерить усі зображення циклу паралельно.
+
+    Args:
+        data: графік циклу — Schedule або повний JSON-словник (як його зберігає main.get_api_data_and_save)
+        json_path: шлях до вже записаного JSON цих даних (передається в ImageRenderer;
+            файли попередніх станів копіюються з нього без повторного кодування)
+        workers: розмір спільного пулу (None — RENDER_WORKERS або кількість ядер; 1 — без пулу)
+        force: перемалювати всі групи незалежно від змін
+
+    Returns:
+        {"results": [...], "errors": [...], "skipped": [...], "seconds": float}
+    """
+    schedule = Schedule.wrap(data)
+    data = schedule.data
+    fact = data.get("fact", {})
+    if "today" not in fact or "data" not in fact:
+        raise ValueError("JSON не містить ключі 'fact.today' або 'fact.data'")
+
+    started = time.perf_counter()
+    prev_full = _prev_states.get("full")
+    if prev_full is None:
+        prev_full = gener_im_full.load_previous_state()
+    prev_1g = _prev_states.get("1g")
+    if prev_1g is None:
+        prev_1g = gener_im_1_G.load_previous_state()
+    jobs, skipped = build_jobs(schedule, prev_1g, force=force)
+
+    # Розмір пулу не залежить від кількості завдань циклу, щоб пул не перестворювався
+    workers = max(1, workers or default_workers())
+    inline = workers == 1 or len(jobs) <= 1
+    log(f"🧵 Завдань рендерингу: {len(jobs)}, процесів: {1 if inline else workers}, груп без змін: {len(skipped)}")
+
+    shared = {"data": data, "json_path": json_path, "prev_full": prev_full, "prev_1g": prev_1g}
+    results = []
+    if inline:
+        results = [_run_job(job, shared) for job in jobs]
+    else:
+        pool = _get_pool(workers)
+        futures = {pool.submit(_run_job, job, shared): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Воркер упав цілком (наприклад, BrokenProcessPool)
+                if isinstance(e, BrokenProcessPool):
+                    _discard_pool(pool)
+                name = job[3] if job[0] == "full" else job[1]
+                results.append({"kind": job[0], "name": name, "ok": False, "seconds": 0.0,
+                                "error": f"{type(e).__name__}: {e}"})
+
+    errors = [r for r in results if not r["ok"]]
+    for r in results:
+        metrics.observe("toe_render_seconds", r["seconds"], image=r["name"])
+        if r["ok"]:
+            log(f"✅ {r['name']}: {r['seconds']:.2f} с")
+        else:
+            log(f"❌ {r['name']}: {r['error']}")
+        for variant, info in r.get("outputs", {}).items():
+            metrics.observe("toe_image_encode_seconds", info["seconds"], variant=variant)
+            metrics.observe("toe_image_bytes", info["bytes"], buckets=metrics.BYTES_BUCKETS, variant=variant)
+    font_stats = {}
+    for r in results:
+        font_cache.merge_stats(font_stats, r.get("font_cache"))
+    font_cache.report(font_stats)
+    log(f"🔤 Кеш шрифтів і тексту: {font_cache.describe(font_stats)}")
+    metrics.inc("toe_group_images_total", sum(r["kind"] == "group" and r["ok"] for r in results), result="rendered")
+    metrics.inc("toe_group_images_total", len(skipped), result="skipped")
+    if skipped:
+        log(f"⏭️ Без змін, пропущено: {', '.join(skipped)}")
+
+    # Стан і прибирання — лише для рендерера без помилок, щоб наступний цикл повторив невдалі
+    if not any(r["kind"] == "full" for r in errors):
+        gener_im_full.cleanup_tomorrow_image([r["name"] for r in results if r["kind"] == "full"])
+        _prev_states["full"] = gener_im_full.save_current_state(data, json_path)
+    if not any(r["kind"] == "group" for r in errors):
+        _prev_states["1g"] = gener_im_1_G.save_current_state(data, json_path)
+    # Маніфест файлів (PNG + варіанти) оновлюється лише тут — в одному процесі
+    image_variants.update_manifest({r["file"]: r["outputs"] for r in results if r["ok"]})
+
+    seconds = time.perf_counter() - started
+    log(f"🏁 Рендеринг завершено за {seconds:.2f} с: успішно {len(results) - len(errors)}, помилок {len(errors)}")
+    return {"results": results, "errors": errors, "skipped": skipped, "seconds": seconds}
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Кеш статичного шару зображень графіків.
+
+Частина кожного зображення не залежить від даних: рядок годин, заголовок колонки
+(«Черга» / «Дата»), лінії сітки, поля легенди та рядки футера. Цей шар малюється один
+раз для кожного макета (кількість рядків, тексти легенди, масштаб) і зберігається
+в пам'яті та на диску (out/cache/templates). Рендерер бере копію шаблону і домальовує
+лише динамічні частини; лінії сітки, які в оригінальному порядку малюються поверх
+клітинок, накладаються знову за маскою grid_mask — результат піксель-у-піксель
+збігається з повним перемальовуванням.
+
+Ключ шаблону включає значення констант рендерера (модуль gener_im_full або клас Config),
+вихідний код будівника, модуля рендерера і модулів, через які малюється шар (scaled_draw,
+font_cache), та файли шрифтів, тож зміна кольору, розміру чи коду малювання автоматично
+створює новий шаблон. Ця частина ключа (версія коду) записується поруч із шаблоном;
+файли шаблонів з іншою версією видаляються з диска під час першого звернення процесу.
+"""
+import hashlib
+import inspect
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image
+
+import font_cache
+import metrics
+import scaled_draw
+
+BASE = Path(__file__).parent.parent.absolute()
+CACHE_DIR = BASE / "out/cache/templates"
+MEMORY_LIMIT = 16  # Максимум шаблонів у пам'яті процесу
+
+# Модулі, через які малюється статичний шар будь-якого рендерера (масштаб, округлення, шрифти)
+DRAWING_MODULES = (scaled_draw, font_cache)
+
+
+class Template:
+    """Статичний шар: зображення, маска ліній сітки та метадані макета (координати тощо)"""
+    __slots__ = ("image", "grid_mask", "meta")
+
+    def __init__(self, image: Image.Image, grid_mask: Image.Image, meta: dict = None):
+        self.image = image
+        self.grid_mask = grid_mask
+        self.meta = meta or {}
+
+    def new_canvas(self) -> Image.Image:
+        """Копія статичного шару, на якій малюється динамічна частина"""
+        return self.image.copy()
+
+    def apply_grid(self, img: Image.Image, color: tuple):
+        """Накладає лінії сітки (те саме, що draw.line після клітинок)"""
+        img.paste(color, (0, 0), self.grid_mask)
+
+
+def constants_of(namespace) -> dict:
+    """Константи (ІМЕНА_ВЕЛИКИМИ) модуля або класу з простими значеннями"""
+    items = vars(namespace).items()
+    return {
+        name: value for name, value in items
+        if name.isupper() and isinstance(value, (int, float, str, tuple, bool))
+    }
+
+
+def _font_stamp(constants: dict) -> dict:
+    """Розмір і час зміни файлів шрифтів, на які посилаються константи *_FONT_PATH"""
+    stamp = {}
+    for name, value in constants.items():
+        if name.endswith("FONT_PATH"):
+            try:
+                st = os.stat(value)
+                stamp[value] = (st.st_size, int(st.st_mtime))
+            except OSError:
+                stamp[value] = None
+    return stamp
+
+
+@lru_cache(maxsize=None)
+def _source_digest(obj) -> str:
+    """Хеш вихідного коду (код не змінюється за життя процесу, тому рахується один раз)"""
+    try:
+        source = inspect.getsource(obj)
+    except (OSError, TypeError):
+        source = getattr(obj, "__qualname__", repr(obj))
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def code_version(constants: dict, builder, code=None) -> str:
+    """
+    Версія коду шаблонів рендерера: константи + код будівника, code (модуль рендерера
+    з допоміжними функціями малювання), DRAWING_MODULES + шрифти
+    """
+    objects = (builder,) + ((code,) if code is not None else ())
+    source = "".join(_source_digest(obj) for obj in objects + DRAWING_MODULES)
+    payload = json.dumps(
+        {"constants": constants, "fonts": _font_stamp(constants), "source": source},
+        sort_keys=True, ensure_ascii=False, default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def layout_key(version: str, **layout) -> str:
+    """Ключ шаблону: версія коду + параметри макета"""
+    payload = json.dumps({"version": version, "layout": layout}, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class TemplateCache:
+    """Потокобезпечний кеш шаблонів: пам'ять процесу + PNG/JSON на диску"""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, memory_limit: int = MEMORY_LIMIT):
+        self.cache_dir = Path(cache_dir)
+        self.memory_limit = memory_limit
+        self._memory = {}
+        self._pruned = set()  # (назва, версія), для яких застарілі файли вже видалено
+        self._lock = threading.Lock()
+
+    def _paths(self, name: str, key: str) -> tuple:
+        stem = f"{name}-{key}"
+        return (self.cache_dir / f"{stem}.png",
+                self.cache_dir / f"{stem}-grid.png",
+                self.cache_dir / f"{stem}.json")
+
+    def _load(self, name: str, key: str) -> Template:
+        image_path, mask_path, meta_path = self._paths(name, key)
+        if not (image_path.exists() and mask_path.exists() and meta_path.exists()):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)["meta"]
+            with Image.open(image_path) as im:
+                image = im.convert("RGB")
+            with Image.open(mask_path) as im:
+                grid_mask = im.convert("L")
+            return Template(image, grid_mask, meta)
+        except Exception:
+            return None
+
+    def _store(self, name: str, key: str, template: Template, version: str = None):
+        image_path, mask_path, meta_path = self._paths(name, key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            suffix = f".{os.getpid()}.tmp"
+            # Файли пишуться атомарно: паралельні воркери не побачать недописаний шаблон
+            for path, writer in (
+                (image_path, lambda p: template.image.save(p, format="PNG")),
+                (mask_path, lambda p: template.grid_mask.save(p, format="PNG")),
+                (meta_path, lambda p: p.write_text(json.dumps({"version": version, "meta": template.meta},
+                                                              ensure_ascii=False), encoding="utf-8")),
+            ):
+                tmp_path = path.with_name(path.name + suffix)
+                writer(tmp_path)
+                os.replace(tmp_path, path)
+        except Exception:
+            pass
+
+    def prune(self, name: str, version: str) -> int:
+        """Видаляє з диска шаблони name з іншою версією коду (або без неї); повертає їх кількість"""
+        removed = 0
+        for meta_path in self.cache_dir.glob(f"{name}-*.json"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    current = json.load(f).get("version") == version
+            except Exception:
+                current = False
+            if current:
+                continue
+            key = meta_path.stem[len(name) + 1:]
+            for path in self._paths(name, key):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            removed += 1
+        if removed:
+            metrics.inc("toe_template_cache_pruned_total", removed, template=name)
+        return removed
+
+    def get(self, name: str, key: str, builder, version: str = None) -> Template:
+        """
+        Шаблон name з ключем key; якщо його немає ні в пам'яті, ні на диску — builder().
+        version — версія коду (code_version): шаблони name інших версій видаляються з диска
+        """
+        if version is not None and (name, version) not in self._pruned:
+            with self._lock:
+                self._pruned.add((name, version))
+            self.prune(name, version)
+
+        with self._lock:
+            template = self._memory.get((name, key))
+        if template is not None:
+            metrics.inc("toe_template_cache_total", template=name, result="memory")
+            return template
+
+        template = self._load(name, key)
+        if template is not None:
+            metrics.inc("toe_template_cache_total", template=name, result="disk")
+        else:
+            template = builder()
+            self._store(name, key, template, version)
+            metrics.inc("toe_template_cache_total", template=name, result="built")
+
+        with self._lock:
+            if len(self._memory) >= self.memory_limit:
+                self._memory.pop(next(iter(self._memory)))
+            self._memory[(name, key)] = template
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+# Спільний кеш процесу
+CACHE = TemplateCache()
+
+
+def get_template(name: str, constants: dict, builder, code=None, **layout) -> Template:
+    """Шаблон для рендерера name з параметрами макета layout (builder(**layout) малює його)"""
+    version = code_version(constants, builder, code)
+    key = layout_key(version, **layout)
+    return CACHE.get(name, key, lambda: builder(**layout), version=version)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Малювання одразу у вихідній роздільній здатності.
+
+Рендерери рахують макет у логічних координатах (1 одиниця = 1 піксель зображення
+масштабу 1×). ScaledDraw приймає ті самі виклики, що й ImageDraw.Draw, і переводить їх
+у пікселі масштабу scale: логічний піксель стає блоком scale×scale, товщини ліній і
+розміри шрифтів множаться на scale, а textbbox повертається в логічних одиницях
+(шрифти й виміряні рамки тексту — зі спільного кешу font_cache).
+Результат відповідає колишньому «намалювати 1× і збільшити» без LANCZOS-проходу
+та проміжного буфера, а текст рендериться чітким шрифтом потрібного розміру.
+
+Масштаби для різних споживачів зображень задаються в config.IMAGE_TARGETS.
+"""
+import font_cache
+from config import IMAGE_TARGETS, IMAGE_TARGET
+
+
+def target_scale(target: str = None) -> int:
+    """Масштаб для цілі (None — основна ціль IMAGE_TARGET)"""
+    return IMAGE_TARGETS[target or IMAGE_TARGET]
+
+
+def target_filename(filename: str, target: str = None) -> str:
+    """Ім'я файлу для цілі: основна ціль — без змін, інші — з суфіксом (gpv-all-today-telegram.png)"""
+    if not target or target == IMAGE_TARGET:
+        return filename
+    stem, dot, ext = filename.rpartition(".")
+    return f"{stem}-{target}.{ext}" if dot else f"{filename}-{target}"
+
+
+def scaled_font(font, scale: int):
+    """Той самий шрифт у scale разів більший (растрові шрифти повертаються як є)"""
+    if scale == 1 or font is None:
+        return font
+    path = getattr(font, "path", None)
+    size = getattr(font, "size", None)
+    if not path or not size:
+        return font
+    try:
+        return font_cache.font(path, size * scale)
+    except Exception:
+        return font
+
+
+class ScaledDraw:
+    """
+    Обгортка ImageDraw.Draw: логічні координати -> пікселі масштабу scale.
+    image — зображення, на якому малює draw (для клітинок і накладання сітки).
+    Той самий набір методів реалізує svg_render.SvgCanvas, тож код макета спільний.
+    """
+
+    def __init__(self, draw, scale: int = 1, image=None):
+        self.draw = draw
+        self.scale = scale
+        self.image = image
+
+    def _box(self, xy) -> list:
+        """[x0, y0, x1, y1] (включно) -> пікселі, що покривають логічні пікселі x0..x1"""
+        (x0, y0, x1, y1) = xy if len(xy) == 4 else (*xy[0], *xy[1])
+        s = self.scale
+        return [x0 * s, y0 * s, x1 * s + s - 1, y1 * s + s - 1]
+
+    def rectangle(self, xy, fill=None, outline=None, width: int = 1):
+        self.draw.rectangle(self._box(xy), fill=fill, outline=outline, width=width * self.scale)
+
+    def rounded_rectangle(self, xy, radius: float = 0, fill=None, outline=None, width: int = 1):
+        self.draw.rounded_rectangle(self._box(xy), radius=radius * self.scale,
+                                    fill=fill, outline=outline, width=width * self.scale)
+
+    def line(self, xy, fill=None, width: int = 1):
+        """Горизонтальні та вертикальні лінії (інших рендерери не малюють)"""
+        (x0, y0), (x1, y1) = xy
+        if x0 == x1 or y0 == y1:
+            # Лінія товщиною width логічних пікселів = заповнений прямокутник
+            half = (width - 1) // 2
+            if x0 == x1:
+                box = [x0 - half, min(y0, y1), x0 - half + width - 1, max(y0, y1)]
+            else:
+                box = [min(x0, x1), y0 - half, max(x0, x1), y0 - half + width - 1]
+            self.draw.rectangle(self._box(box), fill=fill)
+        else:
+            s = self.scale
+            c = (s - 1) / 2
+            self.draw.line([(x0 * s + c, y0 * s + c), (x1 * s + c, y1 * s + c)], fill=fill, width=width * s)
+
+    def text(self, xy, text, fill=None, font=None, **kwargs):
+        x, y = xy
+        self.draw.text((x * self.scale, y * self.scale), text, fill=fill,
+                       font=scaled_font(font, self.scale), **kwargs)
+
+    def textbbox(self, xy, text, font=None, **kwargs) -> tuple:
+        """Рамка тексту в логічних одиницях"""
+        x, y = xy
+        s = self.scale
+        box = font_cache.textbbox(scaled_font(font, s), text, (x * s, y * s), **kwargs)
+        return tuple(v / s for v in box)
+
+    def paint_cells(self, painter, x0: int, y0: int, rows: list, changes: list = None):
+        """Клітинки таблиці (cell_painter.CellPainter) з лівим верхнім кутом x0, y0"""
+        painter.paint(self.image, x0, y0, rows, changes, self.scale)
+
+    def apply_grid(self, template, color: tuple):
+        """Лінії сітки шаблону поверх клітинок"""
+        template.apply_grid(self.image, color)
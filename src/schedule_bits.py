@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Компактне представлення графіка однієї групи на одну добу.
+48 півгодинних слотів зберігаються як дві бітові маски:
+- outage   — біт i встановлено, якщо у слоті i світла не буде (значення API "1")
+- possible — біт i встановлено, якщо у слоті i можливе відключення (значення API "10")
+Слот 2h — перша половина години h (00 хв), слот 2h+1 — друга (30 хв).
+
+Графік будується з сирих 48 точок API (DaySchedule.from_times) і зберігає кожну
+півгодину. Єдиний крок із втратами — to_hours_map: погодинний формат JSON не має статусу
+для пари «відключення + можливе відключення» (напр. "1" і "10" стає "msecond").
+
+Порівняння, пошук змін і "важкість" відключень рахуються кількома цілочисельними
+операціями над масками замість обходу словників рядків. Погодинні маски результатів
+мають біт 2h для години h (h = 0..23, тобто ключ JSON str(h + 1)).
+"""
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+SLOTS = 48
+FULL_MASK = (1 << SLOTS) - 1
+# Біти перших половин годин (0, 2, 4, ...) — позиції погодинних масок
+HOUR_MASK = int("01" * 24, 2)
+
+# Статус JSON -> (біти outage, біти possible) для пари слотів години (біт 0 — перша половина)
+STATUS_BITS = {
+    "yes": (0b00, 0b00),
+    "no": (0b11, 0b00),
+    "maybe": (0b00, 0b11),
+    "first": (0b01, 0b00),
+    "second": (0b10, 0b00),
+    "mfirst": (0b00, 0b01),
+    "msecond": (0b00, 0b10),
+}
+
+# Значення API однієї півгодини -> (біт outage, біт possible); API віддає рядки або числа
+SLOT_VALUE_BITS = {
+    "0": (0, 0), 0: (0, 0),
+    "1": (1, 0), 1: (1, 0),
+    "10": (0, 1), 10: (0, 1),
+}
+# Ключі times для слотів 0..47: "00:00", "00:30", ..., "23:30"
+SLOT_TIMES = tuple(f"{i // 2:02d}:{30 * (i % 2):02d}" for i in range(SLOTS))
+
+LOG_FILE = os.path.join("logs", "full_log.log")
+
+
+def log(message: str):
+    timestamp = datetime.now(ZoneInfo("Europe/Kyiv")).strftime("%Y-%m-%d %H:%M:%S")
+    line = f"{timestamp} [schedule_bits] {message}"
+    print(line)
+    try:
+        with open(LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception:
+        pass
+
+
+def _half_value(outage: int, possible: int) -> str:
+    """Значення API для однієї половини години"""
+    if possible:
+        return "10"
+    return "1" if outage else "0"
+
+
+def _pair_status(o: int, p: int) -> str:
+    """Статус години з бітів пари слотів (та сама логіка, що й ToeOutageParser.process_times)"""
+    v1 = _half_value(o & 1, p & 1)
+    v2 = _half_value(o & 2, p & 2)
+    if v1 == "10" and v2 == "10":
+        return "maybe"
+    if v1 == "10":
+        return "mfirst"
+    if v2 == "10":
+        return "msecond"
+    if v1 == "1" and v2 == "1":
+        return "no"
+    if v1 == "1":
+        return "first"
+    if v2 == "1":
+        return "second"
+    return "yes"
+
+
+# (біти outage, біти possible) пари -> статус
+PAIR_STATUS = {(o, p): _pair_status(o, p) for o in range(4) for p in range(4)}
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def hours_mask(h_keys) -> int:
+    """Погодинна маска з ключів JSON ("1".."24")"""
+    mask = 0
+    for h_key in h_keys:
+        try:
+            h = int(h_key) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= h < 24:
+            mask |= 1 << (2 * h)
+    return mask
+
+
+class DaySchedule:
+    """Графік однієї групи на одну добу: 48 слотів у двох бітових масках"""
+    __slots__ = ("outage", "possible")
+
+    def __init__(self, outage: int = 0, possible: int = 0):
+        self.outage = outage & FULL_MASK
+        self.possible = possible & FULL_MASK
+
+    # --- Конвертація ---
+    @classmethod
+    def from_times(cls, times: dict) -> "DaySchedule":
+        """
+        З 48 точок API {"00:00": "0", "00:30": "1", ...} без втрат ("1" — відключення,
+        "10" — можливе відключення). Відсутня точка — "0"; невідоме значення теж
+        вважається "0" (як у ToeOutageParser.process_times), але записується в лог.
+        """
+        outage = possible = 0
+        unknown = {}
+        for i, t_key in enumerate(SLOT_TIMES):
+            value = times.get(t_key, "0")
+            try:
+                o, p = SLOT_VALUE_BITS[value]
+            except (KeyError, TypeError):
+                unknown.setdefault(str(value), t_key)
+                continue
+            outage |= o << i
+            possible |= p << i
+        if unknown:
+            log(f"⚠️ Невідомі значення API {sorted(unknown)} (напр. о {min(unknown.values())}) — вважаються \"0\"")
+        return cls(outage, possible)
+
+    @classmethod
+    def from_hours_map(cls, hours_map: dict) -> "DaySchedule":
+        """З формату JSON {"1": "no", ..., "24": "yes"}; невідомий статус — ValueError"""
+        outage = possible = 0
+        for h_key, state in hours_map.items():
+            try:
+                bits = STATUS_BITS[state]
+            except (KeyError, TypeError):
+                raise ValueError(f"невідомий статус години {h_key}: {state!r}") from None
+            try:
+                shift = 2 * (int(h_key) - 1)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= shift < SLOTS:
+                outage |= bits[0] << shift
+                possible |= bits[1] << shift
+        return cls(outage, possible)
+
+    def to_hours_map(self) -> dict:
+        """У формат JSON {"1": ..., "24": ...} (змішані пари півгодин згортаються, див. PAIR_STATUS)"""
+        outage, possible = self.outage, self.possible
+        return {
+            str(h + 1): PAIR_STATUS[(outage >> (2 * h) & 3, possible >> (2 * h) & 3)]
+            for h in range(24)
+        }
+
+    def folded(self) -> "DaySchedule":
+        """Графік після згортання у to_hours_map — для порівняння з графіком, прочитаним з JSON"""
+        return DaySchedule.from_hours_map(self.to_hours_map())
+
+    # --- Погодинні площини ---
+    def severity_planes(self) -> tuple:
+        """
+        Погодинні маски рівнів "важкості" статусу години (більше — більше відключень):
+        s0 — світло є ("yes"), s2 — можливе відключення ("maybe", "mfirst", "msecond"),
+        s3 — відключення пів години ("first", "second"), s4 — повне відключення ("no")
+        """
+        o_first = self.outage & HOUR_MASK
+        o_second = (self.outage >> 1) & HOUR_MASK
+        p_any = (self.possible | (self.possible >> 1)) & HOUR_MASK
+        o_both = o_first & o_second
+        s4 = o_both & ~p_any
+        s3 = (o_first | o_second) & ~o_both & ~p_any
+        s2 = p_any
+        s0 = HOUR_MASK & ~(s2 | s3 | s4)
+        return s0, s2, s3, s4
+
+    # --- Порівняння ---
+    def compare_to(self, old: "DaySchedule") -> tuple:
+        """
+        Порівнює з попереднім графіком. Повертає погодинні маски (worse, better):
+        години, де рівень "важкості" (severity_planes) зріс / знизився.
+        """
+        n0, n2, n3, n4 = self.severity_planes()
+        o0, o2, o3, o4 = old.severity_planes()
+        worse = (n4 & ~o4) | (n3 & (o2 | o0)) | (n2 & o0)
+        better = (o4 & ~n4) | (o3 & (n2 | n0)) | (o2 & n0)
+        return worse, better
+
+    def __eq__(self, other):
+        if not isinstance(other, DaySchedule):
+            return NotImplemented
+        return self.outage == other.outage and self.possible == other.possible
+
+    def __hash__(self):
+        return hash((self.outage, self.possible))
+
+    def __repr__(self):
+        return f"DaySchedule(outage=0x{self.outage:012x}, possible=0x{self.possible:012x})"
+
+
+def pack_fact_data(fact_data: dict) -> dict:
+    """{ts: {group: hours_map}} -> {ts: {group: DaySchedule}} (ValueError на невідомому статусі)"""
+    return {
+        ts: {group: DaySchedule.from_hours_map(hours) for group, hours in groups.items() if isinstance(hours, dict)}
+        for ts, groups in fact_data.items()
+        if isinstance(groups, dict)
+    }
+
+
+def unpack_fact_data(packed: dict) -> dict:
+    """{ts: {group: DaySchedule}} -> {ts: {group: hours_map}} — формат fact.data у JSON"""
+    return {ts: {group: day.to_hours_map() for group, day in groups.items()} for ts, groups in packed.items()}
+
+
+def fold_packed(packed: dict) -> dict:
+    """Те саме {ts: {group: DaySchedule}} після згортання у погодинний JSON (DaySchedule.folded)"""
+    return {ts: {group: day.folded() for group, day in groups.items()} for ts, groups in packed.items()}
+
+
+def dump_packed(packed: dict) -> dict:
+    """{ts: {group: DaySchedule}} -> {ts: {group: [outage, possible]}} для JSON (кеш відповідей)"""
+    return {ts: {group: [day.outage, day.possible] for group, day in groups.items()} for ts, groups in packed.items()}
+
+
+def load_packed(raw: dict) -> dict:
+    """Зворотне до dump_packed"""
+    return {ts: {group: DaySchedule(*masks) for group, masks in groups.items()} for ts, groups in raw.items()}
+
+
+class Schedule:
+    """
+    Графік одного циклу, який main передає рендерерам без повторного читання JSON:
+    data   — повний JSON-словник (як записується у out/Ternopiloblenerho.json)
+    packed — той самий fact.data у вигляді {ts: {group: DaySchedule}}; з main — побудований
+             із сирих точок API, тобто без згортання змішаних півгодин
+    """
+    __slots__ = ("data", "packed")
+
+    def __init__(self, data: dict, packed: dict = None):
+        self.data = data
+        self.packed = packed if packed is not None else pack_fact_data(self.fact_data)
+
+    @classmethod
+    def wrap(cls, data) -> "Schedule":
+        """Schedule як є або з JSON-словника"""
+        return data if isinstance(data, cls) else cls(data)
+
+    @property
+    def fact_data(self) -> dict:
+        return self.data.get("fact", {}).get("data", {})
+
+    @property
+    def update(self) -> str:
+        return self.data.get("fact", {}).get("update")
+
+    @property
+    def today(self) -> int:
+        return self.data.get("fact", {}).get("today")
+
+    @property
+    def day_keys(self) -> list:
+        return list(self.fact_data.keys())
+
+    def day(self, day_key: str, group: str) -> DaySchedule:
+        """Графік групи на дату (порожній, якщо даних немає)"""
+        return self.packed.get(day_key, {}).get(group) or DaySchedule()
+
+    def __repr__(self):
+        return f"Schedule(days={self.day_keys}, update={self.update!r})"
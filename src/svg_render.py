@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Векторна (SVG) версія зображень графіків.
+
+SvgCanvas приймає ті самі виклики, що й ScaledDraw (rectangle, rounded_rectangle, line,
+text, textbbox, paint_cells, apply_grid), тож рендерери малюють SVG тим самим кодом
+макета, що й PNG. Координати логічні (1 одиниця = 1 піксель зображення масштабу 1×),
+а viewBox дозволяє показувати файл у будь-якому масштабі без втрати чіткості.
+
+- прямокутники — підшляхи <path>: сусідні прямокутники одного стилю (рядок годин, клітинки
+  одного кольору, лінії сітки) стають одним елементом; рамка — stroke усередині меж, як у Pillow;
+- клітинки — півгодини одного кольору поспіль у рядку об'єднуються в один прямокутник,
+  рамки змін — stroke у межах клітинки (як кільця cell_painter);
+- лінії сітки записуються через canvas.grid (аналог маски шаблону) і виводяться
+  поверх клітинок під час apply_grid;
+- текст — <text> з тим самим шрифтом (сімейство і накреслення з файлу TrueType);
+  розміри тексту для макета міряються Pillow, тому розташування збігається з PNG.
+"""
+from itertools import groupby
+
+import font_cache
+from cell_painter import half_hour_colors, changed_cells
+
+FONT_FAMILY = "DejaVu Sans"  # Шрифт рендерерів (DejaVuSans*.ttf); інші сімейства вказуються в <text>
+FONT_FALLBACK = "sans-serif"
+
+
+def _num(value) -> str:
+    """Число для атрибута SVG: 12, 12.5, 12.33"""
+    if type(value) is int:
+        return str(value)
+    return f"{round(float(value), 2):g}"
+
+
+def _color(color) -> str:
+    if isinstance(color, str):
+        return color
+    if isinstance(color, int):
+        color = (color, color, color)
+    return "#%02x%02x%02x" % tuple(color[:3])
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _box(xy) -> tuple:
+    """[x0, y0, x1, y1] (включно, як у Pillow) -> (x, y, ширина, висота)"""
+    (x0, y0, x1, y1) = xy if len(xy) == 4 else (*xy[0], *xy[1])
+    return x0, y0, x1 - x0 + 1, y1 - y0 + 1
+
+
+def _line_box(xy, width: int) -> tuple:
+    """Горизонтальна / вертикальна лінія товщиною width -> (x, y, ширина, висота)"""
+    (x0, y0), (x1, y1) = xy
+    half = (width - 1) // 2
+    if x0 == x1:
+        return x0 - half, min(y0, y1), width, abs(y1 - y0) + 1
+    return min(x0, x1), y0 - half, abs(x1 - x0) + 1, width
+
+
+def _style(fill=None, outline=None, width: int = 1) -> str:
+    attrs = [f'fill="{_color(fill)}"' if fill is not None else 'fill="none"']
+    if outline is not None:
+        attrs.append(f'stroke="{_color(outline)}"')
+        if width != 1:
+            attrs.append(f'stroke-width="{_num(width)}"')
+    return " ".join(attrs)
+
+
+def _rect(x, y, w, h, fill=None, outline=None, width: int = 1) -> tuple:
+    """
+    Прямокутник як елемент (стиль, підшлях); рамка (outline) шириною width лежить
+    усередині меж, як у Pillow. Сусідні елементи з однаковим стилем об'єднуються в один <path>.
+    """
+    if outline is not None:
+        inset = width / 2
+        x, y, w, h = x + inset, y + inset, w - width, h - width
+    w, h = max(w, 0), max(h, 0)
+    return ("path", _style(fill, outline, width)), f"M{_num(x)} {_num(y)}h{_num(w)}v{_num(h)}h{_num(-w)}z"
+
+
+class GridRecorder:
+    """Замість маски сітки: запам'ятовує лінії, які apply_grid виведе поверх клітинок"""
+
+    def __init__(self):
+        self.boxes = []
+
+    def line(self, xy, fill=None, width: int = 1):
+        self.boxes.append(_line_box(xy, width))
+
+
+class SvgCanvas:
+    """Полотно SVG з API ScaledDraw (логічні координати, масштаб 1)"""
+
+    scale = 1
+
+    def __init__(self, width: int, height: int, background: tuple, font_family: str = FONT_FAMILY):
+        self.size = (width, height)
+        self.background = background
+        self.font_family = font_family
+        self.grid = GridRecorder()
+        self._elements = []  # [((тип, атрибути групи), вміст)]
+
+    def copy(self) -> "SvgCanvas":
+        """Копія полотна (статичний шар, на якому малюється динамічна частина)"""
+        canvas = SvgCanvas(*self.size, self.background, self.font_family)
+        canvas.grid.boxes = list(self.grid.boxes)
+        canvas._elements = list(self._elements)
+        return canvas
+
+    # --- Примітиви ImageDraw ---
+    def rectangle(self, xy, fill=None, outline=None, width: int = 1):
+        self._elements.append(_rect(*_box(xy), fill=fill, outline=outline, width=width))
+
+    def rounded_rectangle(self, xy, radius: float = 0, fill=None, outline=None, width: int = 1):
+        x, y, w, h = _box(xy)
+        if outline is not None:
+            inset = width / 2
+            x, y, w, h = x + inset, y + inset, w - width, h - width
+            radius = max(0, radius - inset)
+        self._elements.append((("rect", _style(fill, outline, width)),
+                               f'x="{_num(x)}" y="{_num(y)}" width="{_num(w)}" height="{_num(h)}" rx="{_num(radius)}"'))
+
+    def line(self, xy, fill=None, width: int = 1):
+        """Горизонтальні та вертикальні лінії (інших рендерери не малюють)"""
+        self._elements.append(_rect(*_line_box(xy, width), fill=fill))
+
+    def text(self, xy, text, fill=None, font=None, **kwargs):
+        # Pillow розміщує текст за верхом висхідних елементів, SVG — за базовою лінією
+        x, y = xy
+        attrs = []
+        if hasattr(font, "getmetrics"):
+            family, style = font.getname() if hasattr(font, "getname") else (None, "")
+            y += font.getmetrics()[0]
+            attrs.append(f'font-size="{_num(font.size)}"')
+            if family and family != self.font_family:
+                attrs.append(f'font-family="{_escape(family)}, {FONT_FALLBACK}"')
+            if style and "Bold" in style:
+                attrs.append('font-weight="bold"')
+        else:
+            attrs.append('dominant-baseline="hanging"')
+        if fill is not None and _color(fill) != "#000000":
+            attrs.append(f'fill="{_color(fill)}"')
+        self._elements.append((("text", " ".join(attrs)), f'<text x="{_num(x)}" y="{_num(y)}">{_escape(text)}</text>'))
+
+    def textbbox(self, xy, text, font=None, **kwargs) -> tuple:
+        return font_cache.textbbox(font, text, xy, **kwargs)
+
+    # --- Клітинки та сітка ---
+    def paint_cells(self, painter, x0: int, y0: int, rows: list, changes: list = None):
+        """Клітинки таблиці з геометрією і кольорами художника cell_painter.CellPainter"""
+        colors = [_color(painter.palette[i:i + 3]) for i in range(0, len(painter.palette), 3)]
+        cw, ch, half = painter.cell_w, painter.cell_h, painter.cell_w // 2
+        # Межі півгодин: ліва половина [x, x + half), права [x + half, x + cell_w)
+        edges = [x0 + (k // 2) * cw + (k % 2) * half for k in range(49)]
+        edges[48] = x0 + 24 * cw
+
+        # Клітинки не перекриваються, тож порядок довільний: групуємо за кольором (один <path> на колір)
+        cells = []
+        for r, line in enumerate(half_hour_colors(rows).tolist()):
+            y = y0 + r * ch
+            start = 0
+            for k in range(1, 49):
+                if k == 48 or line[k] != line[start]:
+                    cells.append((line[start], _rect(edges[start], y, edges[k] - edges[start], ch,
+                                                     fill=colors[line[start]])))
+                    start = k
+        cells.sort(key=lambda cell: cell[0])
+        self._elements.extend(element for _, element in cells)
+
+        # Рамки змін: кільця з відступом 1..highlight_width-1 від ліній сітки клітинки
+        stroke = painter.highlight_width - 1
+        if stroke > 0:
+            for r, h, color in sorted(changed_cells(changes or []), key=lambda cell: cell[2]):
+                self._elements.append(_rect(x0 + h * cw + 1, y0 + r * ch + 1, cw - 1, ch - 1,
+                                            outline=colors[color], width=stroke))
+
+    def apply_grid(self, template, color: tuple):
+        """Лінії сітки поверх клітинок (ті самі, що вже є в статичному шарі, переносяться наверх)"""
+        lines = [_rect(*box, fill=color) for box in self.grid.boxes]
+        drawn = set(lines)
+        self._elements = [e for e in self._elements if e not in drawn] + lines
+
+    # --- Результат ---
+    def to_svg(self) -> str:
+        width, height = self.size
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" shape-rendering="crispEdges" '
+            f'font-family="{_escape(self.font_family)}, {FONT_FALLBACK}">',
+            f'<rect width="100%" height="100%" fill="{_color(self.background)}"/>',
+        ]
+        # Сусідні елементи з однаковими атрибутами — один <path> / одна група <g>
+        for (kind, attrs), group in groupby(self._elements, key=lambda element: element[0]):
+            bodies = [body for _, body in group]
+            if kind == "path":
+                parts.append(f'<path {attrs} d="{"".join(bodies)}"/>')
+            elif kind == "rect":
+                parts.extend(f"<rect {body} {attrs}/>" for body in bodies)
+            elif attrs:
+                parts.append(f"<g {attrs}>{''.join(bodies)}</g>")
+            else:
+                parts.extend(bodies)
+        parts.append("</svg>")
+        return "".join(parts)
@@ -1,4 +1,4 @@
-import requests
+import http_client
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -42,7 +42,7 @@ def send_photo(image_path, caption=None):
     try:
         url = f"https://api.telegram.org/bot{TOKEN}/sendPhoto"
         with open(image_path, "rb") as img:
-            requests.post(
+            http_client.post(
                 url,
                 data={"chat_id": CHAT_ID, "caption": caption or "", "parse_mode": "HTML"},
                 files={"photo": img}
@@ -65,7 +65,7 @@ def send_error(text):
             "text": f"<b>{BOT_PREFIX}</b>\n{text}",
             "parse_mode": "HTML"
         }
-        requests.post(url, data=data)
+        http_client.post(url, data=data)
         log(f"⚠️ Відправлено помилку: {text}")
 
     except Exception as e:
@@ -101,7 +101,7 @@ def send_message(text, silent=False):
             "parse_mode": "HTML",
             "disable_notification": silent  # Додано параметр для беззвучного режиму
         }
-        requests.post(url, data=data)
+        http_client.post(url, data=data)
         log(f"Відправлено {'безувучне ' if silent else ''}повідомлення: {text}")
 
     except Exception as e:
@@ -1,5 +1,3 @@
-import urllib.request
-import ssl
 from datetime import datetime, timedelta
 import json
 import os
@@ -8,7 +6,19 @@ import base64
 from zoneinfo import ZoneInfo
 from pathlib import Path
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
 from telegram_notify import send_message
+import http_client
+import metrics
+from api_cache import ResponseCache, body_digest
+from schedule_bits import DaySchedule, dump_packed, load_packed
+
+# Усі 12 черг, які мають бути в результаті
+ALL_GROUPS = [f"{q}.{s}" for q in range(1, 7) for s in (1, 2)]
+# Активна таблиця ключів, знайдена group_discovery.py (мінімальне покриття черг)
+ACTIVE_GROUP_KEYS_FILE = Path(__file__).parent.parent.absolute() / "out/group_keys.json"
 
 class ToeOutageParser:
     #BASE_URL = "https://api-toe-poweron.inneti.net/api"
@@ -17,6 +27,21 @@ class ToeOutageParser:
     LOG_DIR.mkdir(exist_ok=True)
     FULL_LOG_FILE = LOG_DIR / "full_log.log"
 
+    # --- Паралельне завантаження ---
+    REQUEST_TIMEOUT = 15        # Таймаут одного запиту (сек)
+    FETCH_CONCURRENCY = 6       # Максимум одночасних запитів
+    FETCH_PER_HOST_LIMIT = 4    # Максимум одночасних запитів до одного хоста
+    FETCH_DEADLINE = 45         # Загальний дедлайн на завантаження всіх груп (сек)
+
+    # Кількість запитів до API в останньому виклику fetch_all_groups
+    LAST_REQUEST_COUNT = 0
+
+    # Кеш відповідей (ETag / Last-Modified / sha256 тіла)
+    RESPONSE_CACHE = ResponseCache()
+
+    _host_limits = {}
+    _host_limits_lock = threading.Lock()
+
     @staticmethod
     def log(message):
         timestamp = datetime.now(ZoneInfo("Europe/Kyiv")).strftime("%Y-%m-%d %H:%M:%S")
@@ -44,115 +69,286 @@ class ToeOutageParser:
         (21534, 36593):    ['6.2'], # Горби (Козівська ОТГ), Горби    
     }
 
+    @staticmethod
+    def active_group_keys() -> dict:
+        """
+        Таблиця ключів для поточного циклу: out/group_keys.json, якщо він існує
+        і покриває всі черги, інакше — вбудований GROUP_KEYS.
+        """
+        if ACTIVE_GROUP_KEYS_FILE.exists():
+            try:
+                with open(ACTIVE_GROUP_KEYS_FILE, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                keys = {
+                    (int(item["cityId"]), int(item["streetId"])): list(item["groups"])
+                    for item in payload.get("keys", [])
+                }
+                covered = {g for groups in keys.values() for g in groups}
+                if keys and covered >= set(ALL_GROUPS):
+                    return keys
+                ToeOutageParser.log(f"⚠️ {ACTIVE_GROUP_KEYS_FILE} покриває не всі черги — використовую GROUP_KEYS")
+            except Exception as e:
+                ToeOutageParser.log(f"⚠️ Помилка читання {ACTIVE_GROUP_KEYS_FILE}: {e}")
+        return ToeOutageParser.GROUP_KEYS
+
     @staticmethod
     def build_debug_key(city_id: int, street_id: int) -> str:
         return base64.b64encode(f"{city_id}/{street_id}".encode()).decode()
 
+    @staticmethod
+    def classify_pair(v1: str, v2: str) -> str:
+        """Статус години за значеннями двох півгодин (рядки "0" / "1" / "10")"""
+        if v1 == "1" and v2 == "1":
+            return "no"
+        elif v1 == "0" and v2 == "0":
+            return "yes"
+        elif v1 == "10" and v2 == "10":
+            return "maybe"
+        elif v1 == "10":
+            return "mfirst"
+        elif v2 == "10":
+            return "msecond"
+        elif v1 == "1" and v2 == "0":
+            return "first"
+        elif v1 == "0" and v2 == "1":
+            return "second"
+        return "yes"
+
     @staticmethod
     def process_times(times: dict):
         """Перетворює 48 точок API у 24 години для JSON"""
+        status_table = STATUS_TABLE
         hours_map = {}
-        for h in range(1, 25):
-            t1 = f"{h-1:02d}:00"
-            t2 = f"{h-1:02d}:30"
-            
-            v1 = str(times.get(t1, "0"))
-            v2 = str(times.get(t2, "0"))
-
-            # Логіка визначення статусу
-            if v1 == "1" and v2 == "1":
-                status = "no"
-            elif v1 == "0" and v2 == "0":
-                status = "yes"
-            elif v1 == "10" and v2 == "10":
-                status = "maybe" 
-            elif v1 == "10":
-                status = "mfirst"
-            elif v2 == "10":
-                status = "msecond"
-            elif v1 == "1" and v2 == "0":
-                status = "first"
-            elif v1 == "0" and v2 == "1":
-                status = "second"
-            else:
-                status = "yes"
-            
-            hours_map[str(h)] = status
+        for h_key, t1, t2 in SLOT_KEYS:
+            v1 = times.get(t1, "0")
+            v2 = times.get(t2, "0")
+            try:
+                status = status_table[(v1, v2)]
+            except (KeyError, TypeError):
+                # Невідомі значення — загальна логіка
+                status = ToeOutageParser.classify_pair(str(v1), str(v2))
+            hours_map[h_key] = status
         return hours_map
 
     @staticmethod
-    def fetch_all_groups(before: str, after: str):
+    def process_times_batch(times_list: list) -> list:
+        """Декодує кілька словників times за один прохід (напр. усі групи відповіді)"""
+        process = ToeOutageParser.process_times
+        return [process(times) for times in times_list]
+
+    @staticmethod
+    def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+        """Семафор для обмеження кількості одночасних запитів до одного хоста"""
+        host = urlsplit(url).netloc
+        with ToeOutageParser._host_limits_lock:
+            sem = ToeOutageParser._host_limits.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(ToeOutageParser.FETCH_PER_HOST_LIMIT)
+                ToeOutageParser._host_limits[host] = sem
+            return sem
+
+    @staticmethod
+    def fetch_group(city_id: int, street_id: int, expected_groups: list, before: str, after: str,
+                    now_ts: int, deadline: float = None, base_url: str = None,
+                    use_cache: bool = True) -> dict:
+        """
+        Завантажує та розбирає графіки для однієї адреси (cityId, streetId).
+        Повертає {ts_key: {GPVx.y: DaySchedule}} — усі 48 півгодин без згортання.
+        Якщо сервер відповів 304 або тіло не змінилося (той самий sha256),
+        повертає раніше розібрані дані без json.loads і декодування.
+        use_cache=False — запит без умовних заголовків, кеш відповідей не читається
+        і не оновлюється (опитування адрес-кандидатів у group_discovery).
+        Запит, як і раніше, містить рівно один group[] — першу очікувану чергу: адресу
+        визначає X-debug-key, а відповідь містить усі черги адреси (Test_groups.py:
+        (1032, 9982) з group[]=4.1 повертає 4.1 і 5.1). Для адреси без відомих черг
+        (кандидат group_discovery) підставляється перша черга ALL_GROUPS.
+        """
+        key = ToeOutageParser.build_debug_key(city_id, street_id)
+        cache_key = ResponseCache.make_key(city_id, street_id, before, after)
+        #tp = f"{now_ts + i}%D0%B0"
+        #tp = f"{now_ts + i}"
+        tp = f"{now_ts + random.randint(0,500)}"
+        group = expected_groups[0] if expected_groups else ALL_GROUPS[0]
+        query = f"before={before.replace('+', '%2B')}&after={after.replace('+', '%2B')}&group[]={group}&time={tp}"
+        url = f"{base_url or ToeOutageParser.BASE_URL}/a_gpv_g?{query}"
+        ToeOutageParser.log(f"url: {url}")
+
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            #'Origin': 'https://toe-poweron.inneti.net',
+            'Origin': 'https://poweron.toe.com.ua',
+            'X-debug-key': key,
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        }
+        # Запис кешу читається один раз: за ним будуються умовні заголовки і ним же
+        # відповідається на 304 (інший процес міг тим часом змінити чи видалити запис)
+        cached = ToeOutageParser.RESPONSE_CACHE.get(cache_key) if use_cache else None
+        address = f"{city_id}/{street_id}"
+
+        def request(conditional: bool):
+            with ToeOutageParser._host_semaphore(url):
+                timeout = ToeOutageParser.REQUEST_TIMEOUT
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("вичерпано загальний дедлайн завантаження")
+                    timeout = min(timeout, remaining)
+
+                started = time.perf_counter()
+                request_headers = {**headers, **ResponseCache.conditional_headers(cached)} if conditional else headers
+                resp = http_client.get(url, headers=request_headers, timeout=timeout)
+
+            metrics.observe("toe_group_fetch_seconds", time.perf_counter() - started, address=address)
+            metrics.observe("toe_group_fetch_bytes", len(resp.content), buckets=metrics.BYTES_BUCKETS, address=address)
+            return resp
+
+        resp = request(conditional=True)
+        if resp.status_code == 304:
+            if cached is not None:
+                ToeOutageParser.log(f"♻️ 304 Not Modified для {address} — використано кеш")
+                metrics.inc("toe_response_cache_total", result="not_modified")
+                return load_packed(cached["data"])
+            # 304 без запису в кеші — це промах: один повтор без умовних заголовків
+            ToeOutageParser.log(f"⚠️ 304 для {address} без запису в кеші — повторний запит без умовних заголовків")
+            resp = request(conditional=False)
+            if resp.status_code == 304:
+                raise ValueError(f"сервер відповів 304 на безумовний запит для {address}")
+        resp.raise_for_status()
+
+        body = resp.content
+        digest = body_digest(body)
+        if cached is not None and cached.get("digest") == digest:
+            ToeOutageParser.log(f"♻️ Відповідь для {city_id}/{street_id} не змінилася — розбір пропущено")
+            metrics.inc("toe_response_cache_total", result="same_body")
+            return load_packed(cached["data"])
+        if use_cache:
+            metrics.inc("toe_response_cache_total", result="miss")
+
+        raw_data = json.loads(body.decode("utf-8"))
+        decoded = ToeOutageParser.decode_members(raw_data.get("hydra:member", []))
+        if not use_cache:
+            return decoded
+        ToeOutageParser.RESPONSE_CACHE.put(
+            cache_key, digest, dump_packed(decoded),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        return decoded
+
+    @staticmethod
+    def decode_members(members: list) -> dict:
+        """
+        Розбирає hydra:member у {ts_key: {GPVx.y: DaySchedule}} прямо з сирих times:
+        змішані пари півгодин, які process_times згортає, зберігаються до to_hours_map
+        """
+        decoded = {}
+        for member in members:
+            raw_date = member.get("dateGraph", "").split("T")[0]
+            if not raw_date:
+                continue
+
+            dt = datetime.strptime(raw_date, "%Y-%m-%d").replace(tzinfo=ZoneInfo("Europe/Kyiv"))
+            ts_key = str(int(dt.timestamp()))
+
+            if ts_key not in decoded:
+                decoded[ts_key] = {}
+
+            data_json = member.get("dataJson", {})
+            for raw_group_name, group_info in data_json.items():
+                clean_name = raw_group_name.split("#")[0]
+                full_name = f"GPV{clean_name}"
+                decoded[ts_key][full_name] = DaySchedule.from_times(group_info.get("times", {}))
+        return decoded
+
+    @staticmethod
+    def merge_decoded(data_structure: dict, decoded: dict) -> int:
+        """Додає дані однієї адреси у data_structure. Повертає кількість оброблених груп"""
+        processed_count = 0
+        for ts_key, groups in decoded.items():
+            if ts_key not in data_structure:
+                data_structure[ts_key] = {}
+            data_structure[ts_key].update(groups)
+            processed_count += len(groups)
+        return processed_count
+
+    @staticmethod
+    def report_api_error(city_id: int, street_id: int, error: Exception):
+        metrics.inc("toe_group_fetch_errors_total", address=f"{city_id}/{street_id}")
+        ToeOutageParser.log(f"❌ Помилка API ({city_id}/{street_id}): {str(error)}")
+        send_message(f"❌ Помилка API ({city_id}/{street_id}): {str(error)}", silent=True)
+
+    @staticmethod
+    def fetch_all_groups(before: str, after: str, concurrent: bool = True):
+        """
+        Завантажує графіки для всіх GROUP_KEYS.
+
+        concurrent=True — запити виконуються паралельно (FETCH_CONCURRENCY потоків,
+        не більше FETCH_PER_HOST_LIMIT на хост, загальний дедлайн FETCH_DEADLINE),
+        тож тривалість циклу визначає найповільніший запит, а не сума всіх.
+        Результати зливаються в порядку GROUP_KEYS, тому data_structure
+        ідентична послідовному режиму.
+        """
         ToeOutageParser.log(f"🚀 Початок завантаження графіків (Before: {before}, After: {after})")
         data_structure = {}
         now_ts = int(time.time() * 1000)
         processed_count = 0
+        items = list(ToeOutageParser.active_group_keys().items())
+        ToeOutageParser.LAST_REQUEST_COUNT = len(items)
 
-        for i, ((city_id, street_id), expected_groups) in enumerate(ToeOutageParser.GROUP_KEYS.items()):
-            key = ToeOutageParser.build_debug_key(city_id, street_id)
-            #tp = f"{now_ts + i}%D0%B0"
-            #tp = f"{now_ts + i}"
-            tp = f"{now_ts + random.randint(0,500)}"
-            query = f"before={before.replace('+', '%2B')}&after={after.replace('+', '%2B')}&group[]={expected_groups[0]}&time={tp}"
-            url = f"{ToeOutageParser.BASE_URL}/a_gpv_g?{query}"
-            ToeOutageParser.log(f"url: {url}")
-
-            headers = {
-                'Accept': 'application/json, text/plain, */*',
-                #'Origin': 'https://toe-poweron.inneti.net',
-                'Origin': 'https://poweron.toe.com.ua',
-                'X-debug-key': key,
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            }
-
+        if concurrent and len(items) > 1:
+            deadline = time.monotonic() + ToeOutageParser.FETCH_DEADLINE
+            workers = max(1, min(ToeOutageParser.FETCH_CONCURRENCY, len(items)))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="toe_fetch")
             try:
-                #ToeOutageParser.log(f"🛰 Запит для {city_id}/{street_id} (Групи: {expected_groups})")
-                
-                req = urllib.request.Request(url, headers=headers)
-                ctx = ssl.create_default_context()
-                
-                with urllib.request.urlopen(req, timeout=15, context=ctx) as resp:
-                    raw_data = json.loads(resp.read().decode("utf-8"))
-
-                members = raw_data.get("hydra:member", [])
-                if not members:
-                    ToeOutageParser.log(f"⚠️ Порожня відповідь для {city_id}/{street_id}")
-                    continue
-
-                for member in members:
-                    raw_date = member.get("dateGraph", "").split("T")[0]
-                    if not raw_date:
+                futures = [
+                    executor.submit(ToeOutageParser.fetch_group, city_id, street_id, expected_groups,
+                                    before, after, now_ts, deadline)
+                    for (city_id, street_id), expected_groups in items
+                ]
+                wait(futures, timeout=max(0, deadline - time.monotonic()))
+
+                for ((city_id, street_id), _), future in zip(items, futures):
+                    if not future.done():
+                        future.cancel()
+                        ToeOutageParser.report_api_error(
+                            city_id, street_id,
+                            TimeoutError(f"перевищено дедлайн {ToeOutageParser.FETCH_DEADLINE} с"))
+                        continue
+                    try:
+                        decoded = future.result()
+                    except Exception as e:
+                        ToeOutageParser.report_api_error(city_id, street_id, e)
+                        continue
+                    if not decoded:
+                        ToeOutageParser.log(f"⚠️ Порожня відповідь для {city_id}/{street_id}")
                         continue
-                    
-                    dt = datetime.strptime(raw_date, "%Y-%m-%d").replace(tzinfo=ZoneInfo("Europe/Kyiv"))
-                    ts_key = str(int(dt.timestamp()))
-
-                    if ts_key not in data_structure:
-                        data_structure[ts_key] = {}
-
-                    data_json = member.get("dataJson", {})
-                    for raw_group_name, group_info in data_json.items():
-                        clean_name = raw_group_name.split("#")[0]
-                        full_name = f"GPV{clean_name}"
-                        
-                        times_dict = group_info.get("times", {})
-                        processed_times = ToeOutageParser.process_times(times_dict)
-                        
-                        data_structure[ts_key][full_name] = processed_times
-                        processed_count += 1
-                
-                #ToeOutageParser.log(f"✅ Дані для {city_id}/{street_id} успішно оброблені")
+                    processed_count += ToeOutageParser.merge_decoded(data_structure, decoded)
+            finally:
+                # Не чекаємо на запити, що не вклалися в дедлайн
+                executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for (city_id, street_id), expected_groups in items:
+                try:
+                    #ToeOutageParser.log(f"🛰 Запит для {city_id}/{street_id} (Групи: {expected_groups})")
+                    decoded = ToeOutageParser.fetch_group(city_id, street_id, expected_groups,
+                                                          before, after, now_ts)
+                    if not decoded:
+                        ToeOutageParser.log(f"⚠️ Порожня відповідь для {city_id}/{street_id}")
+                        continue
+                    processed_count += ToeOutageParser.merge_decoded(data_structure, decoded)
+                    #ToeOutageParser.log(f"✅ Дані для {city_id}/{street_id} успішно оброблені")
+                except Exception as e:
+                    ToeOutageParser.report_api_error(city_id, street_id, e)
 
-            except Exception as e:
-                ToeOutageParser.log(f"❌ Помилка API ({city_id}/{street_id}): {str(e)}")
-                send_message(f"❌ Помилка API ({city_id}/{street_id}): {str(e)}", silent=True)
+        try:
+            ToeOutageParser.RESPONSE_CACHE.save()
+        except Exception as e:
+            ToeOutageParser.log(f"⚠️ Не вдалося зберегти кеш відповідей: {e}")
 
-        
         ToeOutageParser.log(f"🏁 Завершено. Оброблено груп: {processed_count}. Дати: {list(data_structure.keys())}")
         
         # ============ ПЕРЕВІРКА ВСІХ 12 ГРУП ============
-        all_expected_groups = set()
-        for groups_list in ToeOutageParser.GROUP_KEYS.values():
-            all_expected_groups.update(groups_list)
+        all_expected_groups = set(ALL_GROUPS)
 
         # Збираємо які групи фактично отримали
         found_groups = set()
@@ -181,4 +377,18 @@ class ToeOutageParser:
         #full_data_json = json.dumps(data_structure, ensure_ascii=False, indent=4)
         #ToeOutageParser.log(f"📊 ПОВНИЙ ДАМП ОТРИМАНИХ ДАНИХ:\n{full_data_json}")
         # ------------------------------
-        return data_structure
\ No newline at end of file
+        return data_structure
+
+
+# --- Таблиці для швидкого декодування process_times ---
+# (ключ години, перша півгодина, друга півгодина)
+SLOT_KEYS = tuple((str(h), f"{h-1:02d}:00", f"{h-1:02d}:30") for h in range(1, 25))
+
+# (значення першої половини, значення другої половини) -> статус.
+# API повертає значення як рядки або числа, тому таблиця містить обидва варіанти
+_KNOWN_VALUES = ("0", "1", "10", 0, 1, 10)
+STATUS_TABLE = {
+    (v1, v2): ToeOutageParser.classify_pair(str(v1), str(v2))
+    for v1 in _KNOWN_VALUES
+    for v2 in _KNOWN_VALUES
+}
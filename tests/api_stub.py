@@ -0,0 +1,82 @@
+"""
+Локальна заміна API обленерго для тестів: ThreadingHTTPServer на 127.0.0.1, який на
+/api/a_gpv_g віддає заготовлені відповіді hydra:member. Адреса запиту береться із
+заголовка X-debug-key (base64 "cityId/streetId"), як у ToeOutageParser.fetch_group.
+Як і справжній запит, він має містити рівно один параметр group[] з назвою черги
+(інакше — 400); відповідь містить усі черги адреси незалежно від group[]
+(поведінка, зафіксована в Test_groups.py).
+"""
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DATE_GRAPH = "2026-10-17T00:00:00+03:00"
+QUEUES = {f"{q}.{s}" for q in range(1, 7) for s in (1, 2)}
+
+
+def times(state: str = "0") -> dict:
+    """48 півгодинних точок {"00:00": ..., "23:30": ...} з однаковим значенням"""
+    return {f"{h:02d}:{m:02d}": state for h in range(24) for m in (0, 30)}
+
+
+def member(groups: list, date_graph: str = DATE_GRAPH) -> dict:
+    return {"dateGraph": date_graph, "dataJson": {f"{g}#stub": {"times": times()} for g in groups}}
+
+
+class StubApi:
+    """
+    with StubApi({(1032, 9982): ["4.1", "5.1"], ...}) as api: api.base_url ...
+    Адреси без запису отримують порожній hydra:member; api.requests — [(адреса, заголовки)],
+    api.groups — значення group[] кожного запиту (список, як у parse_qs).
+    If-None-Match з поточним ETag дає 304; api.force_not_modified — скільки наступних
+    відповідей будуть 304 незалежно від заголовків (як у зламаного проксі чи CDN).
+    """
+
+    def __init__(self, addresses: dict):
+        self.addresses = addresses
+        self.requests = []
+        self.groups = []
+        self.force_not_modified = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                city_id, street_id = base64.b64decode(self.headers["X-debug-key"]).decode().split("/")
+                address = (int(city_id), int(street_id))
+                stub.requests.append((address, dict(self.headers)))
+                group_param = parse_qs(urlsplit(self.path).query).get("group[]", [])
+                stub.groups.append(group_param)
+                if len(group_param) != 1 or group_param[0] not in QUEUES:
+                    self.send_error(400, f"group[] має бути однією чергою: {group_param}")
+                    return
+                groups = stub.addresses.get(address, [])
+                body = json.dumps({"hydra:member": [member(groups)] if groups else []}).encode()
+                etag = f'"{len(body)}"'
+                if stub.force_not_modified or self.headers.get("If-None-Match") == etag:
+                    stub.force_not_modified = max(0, stub.force_not_modified - 1)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api"
+
+    def __enter__(self) -> "StubApi":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
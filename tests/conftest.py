@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Модулі проєкту лежать пласко в src/ і імпортують один одного напряму
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,50 @@
+"""ToeOutageParser.fetch_group: умовні запити і 304 з кешем відповідей та без нього"""
+import pytest
+
+from api_cache import ResponseCache
+from api_stub import StubApi
+from schedule_bits import load_packed
+from toe_api_parser import ToeOutageParser
+
+ADDRESS = (1032, 9982)
+BEFORE, AFTER = "2026-10-18T00:00:00+03:00", "2026-10-17T00:00:00+03:00"
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(ToeOutageParser, "FULL_LOG_FILE", tmp_path / "full_log.log")
+    monkeypatch.setattr(ToeOutageParser, "RESPONSE_CACHE", ResponseCache(tmp_path / "api_response_cache.json"))
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+
+
+@pytest.fixture
+def api():
+    with StubApi({ADDRESS: ["4.1", "5.1"]}) as stub:
+        yield stub
+
+
+def fetch(api) -> dict:
+    return ToeOutageParser.fetch_group(*ADDRESS, ["4.1"], BEFORE, AFTER, 0, base_url=api.base_url)
+
+
+def test_not_modified_uses_the_cached_entry(api):
+    first = fetch(api)
+    assert {group for day in first.values() for group in day} == {"GPV4.1", "GPV5.1"}
+    assert fetch(api) == first
+    assert "If-None-Match" in api.requests[-1][1]
+
+
+def test_not_modified_without_an_entry_is_retried_as_a_miss(api):
+    api.force_not_modified = 1
+    decoded = fetch(api)
+    assert {group for day in decoded.values() for group in day} == {"GPV4.1", "GPV5.1"}
+    assert len(api.requests) == 2
+    assert not any("If-None-Match" in headers for _, headers in api.requests)
+    cached = ToeOutageParser.RESPONSE_CACHE.get(ResponseCache.make_key(*ADDRESS, BEFORE, AFTER))
+    assert load_packed(cached["data"]) == decoded
+
+
+def test_repeated_not_modified_without_an_entry_fails_cleanly(api):
+    api.force_not_modified = 2
+    with pytest.raises(ValueError, match="304"):
+        fetch(api)
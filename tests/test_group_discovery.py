@@ -0,0 +1,99 @@
+"""group_discovery проти локальної заміни API (tests/api_stub.py)"""
+import json
+
+import pytest
+
+import group_discovery
+import toe_api_parser
+from api_cache import ResponseCache
+from api_stub import StubApi
+from toe_api_parser import ALL_GROUPS, ToeOutageParser
+
+# Шість адрес, кожна з яких повертає дві черги, і одна порожня
+PAIRED = {
+    (1032, 9982): ["4.1", "5.1"],
+    (1032, 9996): ["1.1", "2.1"],
+    (1032, 9999): ["1.2", "2.2"],
+    (1032, 10021): ["3.1", "6.1"],
+    (21346, 35118): ["3.2", "4.2"],
+    (21547, 36889): ["5.2", "6.2"],
+    (604, 6050): [],
+}
+SINGLE = {address: groups for address, groups in ToeOutageParser.GROUP_KEYS.items()}
+BEFORE, AFTER = "2026-10-18T00:00:00+03:00", "2026-10-17T00:00:00+03:00"
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """Журнал, кеш відповідей і таблиця ключів — у tmp_path"""
+    monkeypatch.setattr(ToeOutageParser, "FULL_LOG_FILE", tmp_path / "full_log.log")
+    monkeypatch.setattr(ToeOutageParser, "RESPONSE_CACHE", ResponseCache(tmp_path / "api_response_cache.json"))
+    monkeypatch.setattr(toe_api_parser, "ACTIVE_GROUP_KEYS_FILE", tmp_path / "group_keys.json")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+
+
+@pytest.fixture
+def api():
+    with StubApi({**SINGLE, **PAIRED}) as stub:
+        yield stub
+
+
+def test_probe_reads_groups_per_address(api):
+    coverage = group_discovery.probe(list(PAIRED), BEFORE, AFTER, base_url=api.base_url)
+    assert coverage == {address: set(groups) for address, groups in PAIRED.items() if groups}
+
+
+def test_probe_bypasses_response_cache(api):
+    group_discovery.probe(list(PAIRED), BEFORE, AFTER, base_url=api.base_url)
+    cache = ToeOutageParser.RESPONSE_CACHE
+    assert all(cache.get(ResponseCache.make_key(*address, BEFORE, AFTER)) is None for address in PAIRED)
+    assert not any("If-None-Match" in headers for _, headers in api.requests)
+
+
+def test_minimal_cover_shrinks_the_keys(api):
+    candidates = list(SINGLE) + list(PAIRED)
+    coverage = group_discovery.probe(candidates, BEFORE, AFTER, base_url=api.base_url)
+
+    greedy = group_discovery.greedy_cover(coverage, set(ALL_GROUPS))
+    cover = group_discovery.minimal_cover(coverage, set(ALL_GROUPS))
+    assert len(cover) == 6 <= len(greedy) < len(SINGLE)
+
+    keys = group_discovery.build_group_keys(cover, coverage)
+    assigned = [g for groups in keys.values() for g in groups]
+    assert sorted(assigned) == sorted(ALL_GROUPS)  # кожна черга — рівно за однією адресою
+
+
+def test_discover_saves_a_complete_cover(api):
+    keys = group_discovery.discover(list(SINGLE) + list(PAIRED), base_url=api.base_url,
+                                    path=toe_api_parser.ACTIVE_GROUP_KEYS_FILE)
+    assert len(keys) == 6
+    assert ToeOutageParser.active_group_keys() == keys
+
+
+def test_incomplete_cover_is_not_saved(api):
+    # Без адрес з 5.2 / 6.2 покриття неповне — таблиця не зберігається
+    candidates = [a for a in PAIRED if a != (21547, 36889)]
+    keys = group_discovery.discover(candidates, base_url=api.base_url, path=toe_api_parser.ACTIVE_GROUP_KEYS_FILE)
+    assert not {"5.2", "6.2"} & {g for groups in keys.values() for g in groups}
+    assert not toe_api_parser.ACTIVE_GROUP_KEYS_FILE.exists()
+    assert ToeOutageParser.active_group_keys() is ToeOutageParser.GROUP_KEYS
+
+
+def test_active_group_keys_rejects_an_incomplete_file():
+    group_discovery.save_group_keys({(1032, 9982): ["4.1", "5.1"]}, toe_api_parser.ACTIVE_GROUP_KEYS_FILE)
+    assert json.loads(toe_api_parser.ACTIVE_GROUP_KEYS_FILE.read_text(encoding="utf-8"))["keys"]
+    assert ToeOutageParser.active_group_keys() is ToeOutageParser.GROUP_KEYS
+
+
+def test_probe_sends_one_group_even_without_a_hint(api):
+    # (21547, 36889) немає в GROUP_KEYS — підказки черг немає, але запит має той самий формат
+    assert (21547, 36889) not in ToeOutageParser.GROUP_KEYS
+    coverage = group_discovery.probe([(21547, 36889), (1032, 47891)], BEFORE, AFTER, base_url=api.base_url)
+    assert coverage == {(21547, 36889): {"5.2", "6.2"}, (1032, 47891): {"4.1"}}
+    assert api.groups == [["1.1"], ["4.1"]]
+
+
+def test_fetch_group_sends_only_the_first_expected_group(api):
+    decoded = ToeOutageParser.fetch_group(1032, 9982, ["4.1", "5.1"], BEFORE, AFTER, 0, base_url=api.base_url)
+    assert {g for day in decoded.values() for g in day} == {"GPV4.1", "GPV5.1"}
+    assert api.groups == [["4.1"]]
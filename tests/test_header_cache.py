@@ -0,0 +1,45 @@
+"""Кеш OCR заголовків: LRU у пам'яті, запис на диск лише для нових результатів і на виході"""
+import json
+
+import pytest
+
+import recognizer
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "header_ocr.json")
+    monkeypatch.setattr(recognizer, "HEADER_CACHE_PATH", path)
+    monkeypatch.setattr(recognizer, "HEADER_CACHE_LIMIT", 2)
+    monkeypatch.setattr(recognizer, "_header_caches", {})
+    monkeypatch.setattr(recognizer, "_header_dirty", set())
+    return path
+
+
+def saved(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return list(json.load(f))
+
+
+def test_hit_does_not_touch_the_disk(cache_path, monkeypatch):
+    recognizer.remember_header("a", "17.10.2026", "16.10.2026 21:45")
+    writes = []
+    monkeypatch.setattr(recognizer, "_load_json_cache", lambda path: pytest.fail("cache reloaded"))
+    monkeypatch.setattr(recognizer, "_save_json_cache", lambda path, cache: writes.append(list(cache)))
+    assert recognizer.cached_header("a") == ("17.10.2026", "16.10.2026 21:45")
+    assert recognizer.cached_header("missing") is None
+    assert writes == []
+
+
+def test_lru_eviction_and_order_saved_at_exit(cache_path):
+    for digest in "abc":
+        recognizer.remember_header(digest, "x", "y")
+    assert saved(cache_path) == ["b", "c"]
+
+    recognizer.cached_header("b")              # порядок змінився лише в пам'яті
+    assert saved(cache_path) == ["b", "c"]
+    recognizer._save_header_order()
+    assert saved(cache_path) == ["c", "b"]
+
+    recognizer.remember_header("d", "x", "y")  # витісняється давно не використаний "c"
+    assert saved(cache_path) == ["b", "d"]
@@ -0,0 +1,95 @@
+"""ocr_engine з підставним модулем tesserocr: черга -> Future, таймаут і повернення до pytesseract"""
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+import ocr_engine
+
+
+class FakeApi:
+    """PyTessBaseAPI: запам'ятовує потік і розмір зображення; behaviour — "ok", "block" або "fail\""""
+    instances = []
+    behaviour = "ok"
+    release = threading.Event()
+
+    def __init__(self, lang, psm, oem):
+        self.args = (lang, psm, oem)
+        self.threads = set()
+        self.size = None
+        FakeApi.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def SetImageBytes(self, data, width, height, channels, bytes_per_line):
+        assert len(data) == height * bytes_per_line
+        self.size = (width, height, channels)
+
+    def GetUTF8Text(self):
+        self.threads.add(threading.current_thread().name)
+        if FakeApi.behaviour == "block":
+            FakeApi.release.wait(5)
+        if FakeApi.behaviour == "fail":
+            raise RuntimeError("зламаний рушій")
+        width, height, channels = self.size
+        return f"{width}x{height}x{channels}"
+
+
+@pytest.fixture(autouse=True)
+def fake_tesserocr(tmp_path, monkeypatch):
+    FakeApi.instances = []
+    FakeApi.behaviour = "ok"
+    FakeApi.release = threading.Event()
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=FakeApi))
+    monkeypatch.setattr(ocr_engine, "LOG_FILE", str(tmp_path / "full_log.log"))
+    monkeypatch.setattr(ocr_engine, "_engine", None)
+    monkeypatch.setattr(ocr_engine, "_engine_failed", False)
+    fallback_calls = []
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string",
+                        lambda image, lang, config: fallback_calls.append((lang, config)) or "pytesseract")
+    yield fallback_calls
+    FakeApi.release.set()
+    ocr_engine.shutdown()
+
+
+def test_requests_go_through_one_engine_thread(fake_tesserocr):
+    gray = np.zeros((20, 30), dtype=np.uint8)
+    color = np.zeros((10, 40, 3), dtype=np.uint8)
+    assert ocr_engine.image_to_string(gray) == "30x20x1"
+    futures = [ocr_engine.get_engine().submit(color) for _ in range(5)]
+    assert [f.result(5) for f in futures] == ["40x10x3"] * 5
+
+    (api,) = FakeApi.instances  # моделі завантажено один раз
+    assert api.args == (ocr_engine.OCR_LANG, ocr_engine.OCR_PSM, ocr_engine.OCR_OEM)
+    assert api.threads == {"ocr-engine"}
+    assert fake_tesserocr == []
+
+
+def test_engine_timeout_raises():
+    engine = ocr_engine.OcrEngine().start()
+    FakeApi.behaviour = "block"
+    with pytest.raises(TimeoutError):
+        engine.image_to_string(np.zeros((4, 4), dtype=np.uint8), timeout=0.1)
+    FakeApi.release.set()
+    engine.close()
+
+
+def test_engine_error_falls_back_to_pytesseract(fake_tesserocr):
+    FakeApi.behaviour = "fail"
+    assert ocr_engine.image_to_string(np.zeros((4, 4), dtype=np.uint8)) == "pytesseract"
+    assert fake_tesserocr == [(ocr_engine.OCR_LANG, f"--psm {ocr_engine.OCR_PSM} --oem {ocr_engine.OCR_OEM}")]
+    assert ocr_engine.get_engine() is not None  # рушій лишається для наступних вирізок
+
+
+def test_missing_tesserocr_falls_back_once(fake_tesserocr, monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", None)  # import tesserocr -> ImportError
+    image = np.zeros((4, 4), dtype=np.uint8)
+    assert ocr_engine.image_to_string(image) == ocr_engine.image_to_string(image) == "pytesseract"
+    assert ocr_engine.get_engine() is None and ocr_engine._engine_failed
+    assert len(fake_tesserocr) == 2
@@ -0,0 +1,39 @@
+"""PaletteEncoder.quantize: точні базові кольори, найближчі для решти, без таблиці на 2^24 кольорів"""
+import numpy as np
+from PIL import Image
+
+from png_encoder import PaletteEncoder
+
+WHITE, BLACK, RED = (255, 255, 255), (0, 0, 0), (200, 30, 30)
+
+
+def test_base_colors_exact_and_others_nearest():
+    encoder = PaletteEncoder((WHITE, BLACK, RED))
+    pixels = np.array([[WHITE, WHITE, RED, (190, 40, 35)], [BLACK, (20, 10, 5), WHITE, RED]], dtype=np.uint8)
+    out = encoder.quantize(Image.fromarray(pixels, "RGB"))
+    assert out.mode == "P"
+    assert np.asarray(out).tolist() == [[0, 0, 2, 2], [1, 1, 0, 2]]
+    assert np.array_equal(np.asarray(out.convert("RGB"))[0, :3], pixels[0, :3])
+
+
+def test_known_colors_stay_small_and_sorted():
+    encoder = PaletteEncoder((WHITE, BLACK), ramps=((BLACK, WHITE),))
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    first = np.asarray(encoder.quantize(Image.fromarray(pixels, "RGB")))
+    assert np.array_equal(np.asarray(encoder.quantize(Image.fromarray(pixels, "RGB"))), first)
+    assert encoder._table[0].size == len(np.unique(pixels.reshape(-1, 3), axis=0))
+    assert np.all(np.diff(encoder._table[0].astype(np.int64)) > 0)
+
+
+def test_concurrent_quantize_matches_single_thread():
+    from concurrent.futures import ThreadPoolExecutor
+    colors = [(r, g, b) for r in (0, 128, 255) for g in (0, 128, 255) for b in (0, 255)]
+    rng = np.random.default_rng(1)
+    images = [Image.fromarray(rng.integers(0, 256, size=(48, 48, 3), dtype=np.uint8), "RGB") for _ in range(16)]
+    expected = [np.asarray(PaletteEncoder(colors).quantize(img)) for img in images]
+
+    shared = PaletteEncoder(colors)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda img: np.asarray(shared.quantize(img)), images * 4))
+    assert all(np.array_equal(result, expected[i % len(images)]) for i, result in enumerate(results))
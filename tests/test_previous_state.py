@@ -0,0 +1,35 @@
+"""Попередні стани рендерерів: копія вже записаного JSON замість повторного кодування"""
+import json
+
+import pytest
+
+import gener_im_1_G
+import gener_im_full
+
+DATA = {"1760648400": {"GPV1.1": {str(h): "yes" for h in range(1, 25)}}}
+FULL_JSON = {"regionId": "Ternopil", "fact": {"data": DATA, "update": "17.10.2026 10:00", "today": 1760648400}}
+
+
+@pytest.fixture(params=[gener_im_full, gener_im_1_G], ids=["full", "1g"])
+def renderer(request, tmp_path, monkeypatch):
+    module = request.param
+    monkeypatch.setattr(module, "PREV_STATE_FILE", tmp_path / "previous_state.json")
+    monkeypatch.setattr(module, "FULL_LOG_FILE", tmp_path / "full_log.log")
+    return module
+
+
+def test_state_is_copied_from_the_written_json(renderer, tmp_path, monkeypatch):
+    source = tmp_path / "Ternopiloblenerho.json"
+    source.write_text(json.dumps(FULL_JSON, ensure_ascii=False, indent=2), encoding="utf-8")
+    monkeypatch.setattr(json, "dump", lambda *args, **kwargs: pytest.fail("стан закодовано повторно"))
+
+    state = renderer.save_current_state(FULL_JSON, source)
+    assert renderer.PREV_STATE_FILE.read_bytes() == source.read_bytes()
+    assert state == {"data": DATA, "update": "17.10.2026 10:00"}
+    assert renderer.load_previous_state() == state
+
+
+def test_standalone_state_file_still_loads(renderer):
+    state = renderer.save_current_state(FULL_JSON)
+    assert json.loads(renderer.PREV_STATE_FILE.read_text(encoding="utf-8"))["data"] == DATA
+    assert renderer.load_previous_state() == state
@@ -0,0 +1,38 @@
+"""Кеш шаблонів: версія коду в ключі та видалення застарілих шаблонів з диска"""
+from PIL import Image
+
+import render_templates
+from render_templates import Template, TemplateCache, code_version, layout_key
+
+CONSTANTS = {"BG": (255, 255, 255), "CELL_W": 40}
+
+
+def build(n_rows: int = 1) -> Template:
+    return Template(Image.new("RGB", (4, 4 * n_rows)), Image.new("L", (4, 4 * n_rows)), {"legend_x": n_rows})
+
+
+def test_version_covers_drawing_modules(monkeypatch):
+    version = code_version(CONSTANTS, build, render_templates)
+    # Інший код scaled_draw (або font_cache) — інша версія і, отже, інший ключ
+    digest = render_templates._source_digest
+    monkeypatch.setattr(render_templates, "_source_digest",
+                        lambda obj: digest(obj) + ("-changed" if obj is render_templates.scaled_draw else ""))
+    changed = code_version(CONSTANTS, build, render_templates)
+    assert changed != version
+    assert layout_key(changed, n_rows=2) != layout_key(version, n_rows=2)
+
+
+def test_outdated_templates_are_pruned(tmp_path):
+    old = TemplateCache(tmp_path)
+    for n_rows in (1, 2):
+        old.get("full", layout_key("old", n_rows=n_rows), lambda: build(n_rows), version="old")
+    assert len(list(tmp_path.glob("full-*"))) == 6
+
+    cache = TemplateCache(tmp_path)
+    key = layout_key("new", n_rows=1)
+    template = cache.get("full", key, lambda: build(1), version="new")
+    assert template.meta == {"legend_x": 1}
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(p.name for p in cache._paths("full", key))
+
+    # Шаблон поточної версії читається з диска новим процесом
+    assert TemplateCache(tmp_path).get("full", key, lambda: None, version="new").meta == {"legend_x": 1}
@@ -0,0 +1,58 @@
+"""DaySchedule: 48 півгодин із сирих точок API, згортання лише в to_hours_map"""
+import pytest
+
+import schedule_bits
+from schedule_bits import DaySchedule, SLOT_TIMES, fold_packed, pack_fact_data, unpack_fact_data
+from toe_api_parser import ToeOutageParser
+
+
+@pytest.fixture(autouse=True)
+def isolated_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(schedule_bits, "LOG_FILE", str(tmp_path / "full_log.log"))
+
+
+def times(**slots) -> dict:
+    """48 точок "0" з окремими значеннями, напр. times(**{"00:00": "1"})"""
+    return {**{t: "0" for t in SLOT_TIMES}, **slots}
+
+
+def test_from_times_keeps_mixed_half_hours():
+    # Перша половина — відключення, друга — можливе: у погодинному JSON це "msecond"
+    mixed = DaySchedule.from_times(times(**{"05:00": "1", "05:30": "10"}))
+    only_possible = DaySchedule.from_times(times(**{"05:30": "10"}))
+    assert mixed.outage == 1 << 10 and mixed.possible == 1 << 11
+    assert mixed != only_possible
+    assert mixed.to_hours_map()["6"] == only_possible.to_hours_map()["6"] == "msecond"
+    assert mixed.folded() == only_possible.folded() == only_possible
+
+
+def test_from_times_matches_process_times_after_folding():
+    values = ["0", "1", "10", 0, 1, 10]
+    raw = {t: values[i * 7 % len(values)] for i, t in enumerate(SLOT_TIMES)}
+    assert DaySchedule.from_times(raw).to_hours_map() == ToeOutageParser.process_times(raw)
+
+
+def test_unknown_api_value_is_logged(tmp_path):
+    day = DaySchedule.from_times(times(**{"10:00": "7", "10:30": "1"}))
+    assert day.outage == 1 << 21
+    assert "Невідомі значення API" in (tmp_path / "full_log.log").read_text(encoding="utf-8")
+
+
+def test_unknown_status_in_hours_map_is_an_error():
+    hours = DaySchedule().to_hours_map()
+    hours["3"] = "storm"
+    with pytest.raises(ValueError, match="storm"):
+        DaySchedule.from_hours_map(hours)
+    with pytest.raises(ValueError):
+        pack_fact_data({"1760648400": {"GPV1.1": hours}})
+
+
+def test_decode_members_builds_from_raw_times():
+    members = [{"dateGraph": "2026-10-17T00:00:00+03:00",
+                "dataJson": {"1.1#x": {"times": times(**{"00:00": "1", "00:30": "10"})}}}]
+    (groups,) = ToeOutageParser.decode_members(members).values()
+    day = groups["GPV1.1"]
+    assert (day.outage, day.possible) == (0b01, 0b10)
+    packed = {"ts": groups}
+    assert unpack_fact_data(packed) == {"ts": {"GPV1.1": day.to_hours_map()}}
+    assert pack_fact_data(unpack_fact_data(packed)) == fold_packed(packed)
@@ -0,0 +1,48 @@
+"""select_groups_to_render: які зображення груп перемальовуються після зміни набору дат"""
+import gener_im_1_G
+from gener_im_1_G import select_groups_to_render
+
+GROUPS = [f"GPV{q}.{s}" for q in range(1, 7) for s in (1, 2)]
+TODAY, TOMORROW, DAY_AFTER = "1760648400", "1760734800", "1760821200"
+
+
+def day(state: str = "yes") -> dict:
+    return {group: {str(h): state for h in range(1, 25)} for group in GROUPS}
+
+
+def schedule(days: dict) -> dict:
+    return {"fact": {"data": days}}
+
+
+def existing_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(gener_im_1_G, "OUT_DIR", tmp_path)
+    monkeypatch.setattr(gener_im_1_G, "FULL_LOG_FILE", tmp_path / "full_log.log")
+    for group in GROUPS:
+        gener_im_1_G.group_image_path(group).touch()
+
+
+def test_unchanged_groups_are_skipped(tmp_path, monkeypatch):
+    existing_images(tmp_path, monkeypatch)
+    days = {TODAY: day(), TOMORROW: day("no")}
+    assert select_groups_to_render(schedule(days), GROUPS, {"data": days}) == ([], GROUPS)
+
+
+def test_withdrawn_tomorrow_rerenders_all_groups(tmp_path, monkeypatch):
+    existing_images(tmp_path, monkeypatch)
+    prev_state = {"data": {TODAY: day(), TOMORROW: day("no")}}
+    assert select_groups_to_render(schedule({TODAY: day()}), GROUPS, prev_state) == (GROUPS, [])
+
+
+def test_new_tomorrow_rerenders_all_groups(tmp_path, monkeypatch):
+    existing_images(tmp_path, monkeypatch)
+    prev_state = {"data": {TODAY: day()}}
+    data = schedule({TODAY: day(), TOMORROW: day()})
+    assert select_groups_to_render(data, GROUPS, prev_state) == (GROUPS, [])
+
+
+def test_day_rollover_rerenders_all_groups(tmp_path, monkeypatch):
+    # Учорашнє «завтра» стало «сьогодні» з тими самими рядками, але дати зсунулися
+    existing_images(tmp_path, monkeypatch)
+    prev_state = {"data": {TODAY: day(), TOMORROW: day()}}
+    data = schedule({TOMORROW: day(), DAY_AFTER: day()})
+    assert select_groups_to_render(data, GROUPS, prev_state) == (GROUPS, [])